@@ -0,0 +1,134 @@
+"""
+Equivalence of the scaler-folded model (dashboard_app.folding) with the original model.
+
+Run (from the project root):
+    python -m benchmarks.folded_equivalence --scale 1
+
+Folds scaler.pkl into xgb_model.pkl and, over the full dataset's float32 raw rows,
+compares the folded model on raw input with the original on the same rows scaled in
+float64 and cast (what the dashboard feeds it):
+  - class probabilities for every row,
+  - path-dependent SHAP values for every row (--shap-rows to limit),
+  - interventional SHAP on --interventional-rows rows against a 50-row background,
+  - probabilities on probe rows placed on and just below every folded threshold.
+Everything must match exactly (max abs diff 0), including the store's own scaled copy.
+It also times scaling + prediction against prediction alone.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.background import explainer_from_data, make_tree_explainer
+from dashboard_app.data import load_model_and_data
+from dashboard_app.feature_store import uniform_sample_indices
+from dashboard_app.folding import _scaled32, fold_model
+from dashboard_app.inference import predict_proba
+from dashboard_app.thresholds import split_thresholds
+
+
+def _max_diff(a, b) -> float:
+    return float(np.max(np.abs(np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64))))
+
+
+def _probe_rows(raw: np.ndarray, thresholds: dict[int, np.ndarray], seed: int = 0) -> np.ndarray:
+    """
+    Dataset rows with one feature set to a folded threshold or the float32 just below it.
+    """
+    rng = np.random.default_rng(seed)
+    blocks = []
+    for f, values in thresholds.items():
+        probes = np.concatenate([values, np.nextafter(values, np.float32(-np.inf))])
+        rows = raw[rng.integers(0, len(raw), len(probes))].copy()
+        rows[:, f] = probes
+        blocks.append(rows)
+    return np.concatenate(blocks)
+
+
+def _median_s(fn, repeats: int) -> float:
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shap-rows", type=int, default=None, help="Path-dependent SHAP on the first N rows only.")
+    parser.add_argument("--interventional-rows", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=20, help="Timed calls per prediction path.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    if store.folded:
+        print("FAIL: the workspace already loads a folded model; remove its xgb_model_folded.pkl")
+        return 1
+
+    start = time.perf_counter()
+    folded = fold_model(xgb_model, scaler)
+    fold_seconds = time.perf_counter() - start
+    booster, folded_booster = xgb_model.get_booster(), folded.get_booster()
+    raw = np.asarray(store.buffer[0])
+    scaled = _scaled32(raw, scaler.mean_, scaler.scale_)
+    thresholds = split_thresholds(folded_booster)
+    print(f"{store.n_rows:,} rows, {sum(len(t) for t in thresholds.values()):,} distinct thresholds, folded in {fold_seconds:.2f} s")
+
+    checks: dict[str, float] = {}
+    checks["store X_scaled"] = _max_diff(store.X_scaled, scaled)
+    checks["probabilities"] = _max_diff(predict_proba(booster, scaled), predict_proba(folded_booster, raw))
+
+    rows = slice(None, args.shap_rows)
+    original, refolded = make_tree_explainer(xgb_model), make_tree_explainer(folded)
+    values = _max_diff(original.shap_values(scaled[rows]), refolded.shap_values(raw[rows]))
+    # Compared after shap_values, which refreshes expected_value from the computed bias terms.
+    checks["SHAP (path-dependent)"] = max(values, _max_diff(original.expected_value, refolded.expected_value))
+
+    background = np.sort(uniform_sample_indices(store.n_rows, 50))
+    rows = slice(None, args.interventional_rows)
+    checks["SHAP (interventional)"] = _max_diff(
+        explainer_from_data(booster, scaled[background]).shap_values(scaled[rows]),
+        explainer_from_data(folded_booster, raw[background]).shap_values(raw[rows]),
+    )
+
+    probes = _probe_rows(raw, thresholds)
+    probes_scaled = _scaled32(probes, scaler.mean_, scaler.scale_)
+    checks[f"threshold probes ({len(probes):,} rows)"] = _max_diff(
+        predict_proba(booster, probes_scaled), predict_proba(folded_booster, probes)
+    )
+
+    print(f"{'check':<36}{'max abs diff':>14}")
+    for name, diff in checks.items():
+        print(f"{name:<36}{diff:>14.2e}")
+
+    with_scaling = _median_s(
+        lambda: predict_proba(booster, scaler.transform(X).astype(np.float32)), args.repeats
+    )
+    folded_only = _median_s(lambda: predict_proba(folded_booster, raw), args.repeats)
+    print(
+        f"full-dataset scoring: scaler.transform + predict {with_scaling * 1e3:.1f} ms, "
+        f"folded predict {folded_only * 1e3:.1f} ms ({with_scaling / folded_only:.2f}x)"
+    )
+
+    ok = all(diff == 0.0 for diff in checks.values())
+    print("PASS: the folded model is exactly equivalent" if ok else "FAIL: the folded model differs")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
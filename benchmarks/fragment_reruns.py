@@ -0,0 +1,149 @@
+"""
+Compare whole-app rerun time with fragment-scoped rerun time for common widget changes.
+
+Run (from the project root):
+    python -m benchmarks.fragment_reruns --repeats 5
+
+Drives `streamlit_xai_dashboard.py` with `streamlit.testing` and changes one widget per
+step (Scientist class, PDP feature, threshold feature, a what-if slider, the Public
+Health Officer sample size, the Public User mode). Each rerun's stage timings are read
+back from the metrics log: the "rerun" stage is what the change costs when the whole
+script re-executes (DASHBOARD_FRAGMENTS=0), and the "fragment.<panel>" span of the
+innermost panel holding the widget is what a fragment-scoped rerun executes.
+
+AppTest always re-executes the full script, so the fragment cost is measured as a span
+inside it; in production, fragment-only reruns are logged as the "fragment_rerun" stage.
+Exits non-zero if any panel is not cheaper than the full rerun.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+# Metrics are configured at import time, so enable them before the app modules load.
+_METRICS_DIR = Path(tempfile.mkdtemp(prefix="fragment-reruns-"))
+os.environ["DASHBOARD_METRICS"] = "1"
+os.environ["DASHBOARD_METRICS_DIR"] = str(_METRICS_DIR)
+
+import numpy as np  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory  # noqa: E402
+from benchmarks.synthetic import build_workspace  # noqa: E402
+
+
+APP_SCRIPT = Path(__file__).resolve().parent.parent / "streamlit_xai_dashboard.py"
+
+
+def _slider_midpoint(at: AppTest, key: str, step: int) -> None:
+    slider = at.slider(key=key)
+    lo, hi = float(slider.min), float(slider.max)
+    slider.set_value(lo + (hi - lo) * (0.25 if step % 2 else 0.75))
+
+
+# (name, role, innermost panel, action(at, step)); actions alternate values so every step changes the widget.
+INTERACTIONS = [
+    (
+        "scientist:class_select",
+        "Scientist",
+        "scientist",
+        lambda at, i: at.selectbox(key="scientist_class_select").set_value(["2", "All Classes"][i % 2]),
+    ),
+    (
+        "scientist:pdp_feature",
+        "Scientist",
+        "pdp",
+        lambda at, i: at.selectbox(key="scientist_pdp_feature").set_value(["PM2_5", "AQI"][i % 2]),
+    ),
+    (
+        "regulator:threshold_feature",
+        "Regulator",
+        "thresholds",
+        lambda at, i: at.selectbox(key="reg_thr_feature").set_value(["PM10", "AQI"][i % 2]),
+    ),
+    (
+        "regulator:whatif_slider",
+        "Regulator",
+        "whatif_sliders",
+        lambda at, i: _slider_midpoint(at, "reg_whatif_0_AQI", i),
+    ),
+    (
+        "public_health_officer:n_instances",
+        "Public Health Officer",
+        "public_health_officer",
+        lambda at, i: at.slider(key="pho_n").set_value([30, 20][i % 2]),
+    ),
+    (
+        "public_user:mode",
+        "Public User",
+        "public_user",
+        lambda at, i: at.radio(key="public_user_mode").set_value(["Today's conditions", "Record index"][i % 2]),
+    ),
+]
+
+
+def _last_record() -> dict:
+    with open(_METRICS_DIR / "stage_timings.jsonl", encoding="utf-8") as f:
+        *_, last = f
+    return json.loads(last)
+
+
+def _stage_seconds(record: dict, stage: str) -> float | None:
+    return next((s["seconds"] for s in record["spans"] if s["stage"] == stage), None)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5, help="Widget changes per interaction.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-rerun timeout in seconds.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+
+    ok = True
+    with working_directory(workdir):
+        at = AppTest.from_file(str(APP_SCRIPT), default_timeout=args.timeout)
+        at.run()
+        print(f"{'interaction':<36} {'full rerun':>12} {'fragment':>12} {'saved':>7}")
+        for name, role, panel, action in INTERACTIONS:
+            at.sidebar.radio(key="role_select").set_value(role)
+            at.run()
+            full, fragment = [], []
+            for i in range(args.repeats):
+                action(at, i)
+                at.run()
+                if at.exception:
+                    print(f"FAIL: {name}: {at.exception[0].message}")
+                    return 1
+                record = _last_record()
+                full.append(_stage_seconds(record, "rerun"))
+                fragment.append(_stage_seconds(record, f"fragment.{panel}"))
+            if None in fragment:
+                print(f"{name:<36} panel '{panel}' did not run")
+                ok = False
+                continue
+            full_ms = float(np.median(full)) * 1000
+            fragment_ms = float(np.median(fragment)) * 1000
+            ok &= fragment_ms < full_ms
+            print(f"{name:<36} {full_ms:9.1f} ms {fragment_ms:9.1f} ms {1 - fragment_ms / full_ms:6.0%}")
+
+    print(f"{'PASS' if ok else 'FAIL'}: every panel reruns for less than the whole app (metrics in {_METRICS_DIR})")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
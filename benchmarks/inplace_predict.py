@@ -0,0 +1,113 @@
+"""
+In-place prediction (dashboard_app.inference) vs the sklearn predict paths it replaces.
+
+Run (from the project root):
+    python -m benchmarks.inplace_predict --repeats 200 --batch 1 1000 100000
+
+For single rows and each batch size the script times:
+  - pipeline.predict(DataFrame): scaler.transform + DMatrix build (the old Regulator path),
+  - model.predict(X_scaled): DMatrix build on pre-scaled rows (the old Public User path),
+  - predict_classes(booster, X_scaled): in-place prediction on a view of the shared matrix,
+and reports the median latency and the Python/NumPy bytes allocated per call (tracemalloc;
+allocations inside XGBoost are not seen, but the output array it returns is). The in-place
+path must match model.predict exactly, pipeline.predict on the raw view must match the
+store path on every row, and predict_proba on zero rows must return an empty
+(0, n_classes) array. PASS if all hold and in-place prediction is faster than
+pipeline.predict at every size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.data import load_model_and_data
+from dashboard_app.inference import predict_classes, predict_proba
+
+
+def _median_s(paths: dict, repeats: int) -> dict[str, float]:
+    """
+    Median seconds per call for each path, timed round-robin so machine noise hits all paths alike.
+    """
+    times: dict[str, list[float]] = {name: [] for name in paths}
+    for fn in paths.values():
+        fn()  # warm-up
+    for _ in range(repeats):
+        for name, fn in paths.items():
+            start = time.perf_counter()
+            fn()
+            times[name].append(time.perf_counter() - start)
+    return {name: float(np.median(t)) for name, t in times.items()}
+
+
+def _allocated_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 1000, 100_000])
+    parser.add_argument("--repeats", type=int, default=200, help="Timed calls per path (scaled down for big batches).")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    booster = xgb_model.get_booster()
+
+    print(f"{store.n_rows:,} rows")
+    differ = int((pipeline.predict(X) != predict_classes(booster, store.X_scaled)).sum())
+    if differ:
+        print(f"FAIL: pipeline.predict(X) differs from predict_classes(X_scaled) on {differ:,} rows")
+        return 1
+    empty = predict_proba(booster, store.X_scaled[:0])
+    if empty.shape != (0, xgb_model.n_classes_):
+        print(f"FAIL: predict_proba on zero rows returned shape {empty.shape}")
+        return 1
+    print(f"{'rows':>8}  {'path':<28}{'median':>12}{'alloc/call':>13}{'speedup':>9}")
+    ok = True
+    for size in sorted(args.batch):
+        size = min(size, store.n_rows)
+        repeats = max(3, args.repeats * 1000 // max(size, 1000))
+        X_frame, X_scaled = X.iloc[:size], store.X_scaled[:size]
+        out = np.empty(size, dtype=np.int8)
+        paths = {
+            "pipeline.predict(DataFrame)": lambda: pipeline.predict(X_frame),
+            "model.predict(X_scaled)": lambda: xgb_model.predict(X_scaled),
+            "inplace predict_classes": lambda: predict_classes(booster, X_scaled, out=out),
+        }
+        results = {name: np.asarray(fn()).astype(np.int64) for name, fn in paths.items()}
+        if not np.array_equal(results["inplace predict_classes"], results["model.predict(X_scaled)"]):
+            print(f"FAIL: in-place predictions differ from model.predict at {size} rows")
+            return 1
+
+        medians = _median_s(paths, repeats)
+        base = medians["pipeline.predict(DataFrame)"]
+        for name, fn in paths.items():
+            seconds = medians[name]
+            alloc = _allocated_bytes(fn)
+            print(f"{size:>8}  {name:<28}{seconds * 1e6:>10.0f}us{alloc:>12,}B{base / seconds:>8.1f}x")
+        ok &= seconds < base
+
+    print("PASS: in-place prediction is faster at every size" if ok else "FAIL: in-place prediction is slower somewhere")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
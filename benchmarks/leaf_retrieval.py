@@ -0,0 +1,111 @@
+"""
+Measure leaf-index retrieval and check it against brute-force shared-leaf counts.
+
+Run (from the project root):
+    python -m benchmarks.leaf_retrieval --queries 500 --k 10
+
+Builds `LeafIndex` over the workspace, then queries random stored records. Every result
+is checked against a brute-force count over the full (rows x trees) leaf matrix, ranked
+by count with ties broken by row index. The ranking is also checked on `--tie-trials`
+random count vectors with few distinct values, so the k-th count is nearly always tied.
+Each record's raw values are also scaled as the "Today's conditions" query scales its
+inputs; that query must find the record itself, sharing every leaf. For comparison, it
+reports how often the top-k records share the query's predicted class, for the leaf
+index and for Euclidean neighbours over all standardized features. Exits non-zero if
+any result differs, a raw query misses its record or the p95 query time exceeds
+`--budget-ms`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.neighbors import KDTree
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.config import FEATURE_COLS
+from dashboard_app.data import get_shap_explainer, load_model_and_data
+from dashboard_app.feature_store import scale_raw
+from dashboard_app.folding import is_folded, source_scaler
+from dashboard_app.neighbors import LeafIndex, top_k_by_count
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=500, help="Random stored records to query.")
+    parser.add_argument("--k", type=int, default=10, help="Records returned per query.")
+    parser.add_argument("--tie-trials", type=int, default=2000, help="Random tied count vectors to rank.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    parser.add_argument("--budget-ms", type=float, default=10.0, help="p95 budget per query.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    explainer = get_shap_explainer.__wrapped__(xgb_model)
+
+    start = time.perf_counter()
+    index = LeafIndex(xgb_model, explainer, store.X_scaled, FEATURE_COLS)
+    print(
+        f"{index.n_rows:,} rows x {index.n_trees} trees, {index.n_leaves:,} leaves: built in "
+        f"{time.perf_counter() - start:.2f} s, {index.nbytes / 2**20:.1f} MB"
+    )
+
+    leaves = xgb_model.get_booster().predict(xgb.DMatrix(store.X_scaled), pred_leaf=True).astype(np.int32)
+    raw_scaler = source_scaler(xgb_model) if is_folded(xgb_model) else scaler
+    standardized = (X.to_numpy(dtype=np.float64) - raw_scaler.mean_) / raw_scaler.scale_
+    tree = KDTree(standardized)
+
+    rng = np.random.default_rng(0)
+    times, mismatches, raw_misses, leaf_agree, euclid_agree = [], 0, 0, [], []
+    for row in rng.choice(index.n_rows, min(args.queries, index.n_rows), replace=False):
+        row = int(row)
+        start = time.perf_counter()
+        indices, shared = index.query(store.X_scaled[row], k=args.k, exclude=row)
+        times.append(time.perf_counter() - start)
+
+        brute = (leaves == leaves[row]).sum(axis=1)
+        brute[row] = -1
+        expected = np.lexsort((np.arange(len(brute)), -brute))[: args.k]
+        mismatches += int(not (np.array_equal(indices, expected) and np.array_equal(shared, brute[expected])))
+        _, raw_shared = index.query(scale_raw(X.iloc[[row]], scaler, FEATURE_COLS)[0], k=1)
+        raw_misses += int(raw_shared[0] != index.n_trees)
+
+        pred = index.predictions[row]
+        leaf_agree.append(float((index.predictions[indices] == pred).mean()))
+        _, nearest = tree.query(standardized[row : row + 1], k=args.k + 1)
+        nearest = [i for i in nearest[0] if i != row][: args.k]
+        euclid_agree.append(float((index.predictions[nearest] == pred).mean()))
+
+    ms = np.asarray(times) * 1000
+    p95 = float(np.percentile(ms, 95))
+    print(f"query: p50={np.percentile(ms, 50):.2f} ms p95={p95:.2f} ms max={ms.max():.2f} ms")
+    print(
+        f"top-{args.k} sharing the query's predicted class: leaf index {np.mean(leaf_agree):.1%}, "
+        f"Euclidean {np.mean(euclid_agree):.1%}"
+    )
+    print(f"queries whose results differ from brute force: {mismatches}")
+    tie_mismatches = 0
+    for _ in range(args.tie_trials):
+        counts = rng.integers(0, 5, size=int(rng.integers(1, 500)))
+        k = int(rng.integers(0, len(counts) + 1))
+        reference = np.lexsort((np.arange(len(counts)), -counts))[:k]
+        tie_mismatches += int(not np.array_equal(top_k_by_count(counts, k), reference))
+    print(f"tied count vectors ranked differently from the lowest-index reference: {tie_mismatches}")
+    print(f"raw-value queries not matching their record in every tree: {raw_misses}")
+    ok = mismatches == 0 and tie_mismatches == 0 and raw_misses == 0 and p95 <= args.budget_ms
+    print(f"{'PASS' if ok else 'FAIL'}: p95 {p95:.2f} ms (budget {args.budget_ms:.0f} ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
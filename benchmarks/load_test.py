@@ -0,0 +1,246 @@
+"""
+Simulate N concurrent dashboard sessions against one in-process app replica.
+
+Run (from the project root):
+    python -m benchmarks.load_test --concurrency 1 2 4 8 --iterations 3
+
+Each session is a `streamlit.testing` AppTest driving `streamlit_xai_dashboard.py`:
+it switches roles, changes the Scientist class selector and presses "Check My Risk"
+and "Generate Aggregated Analysis". Sessions run in threads of one process, the same
+way a Streamlit server runs its script threads, so they share `st.cache_resource`
+state and the GIL. An interaction that submits a background job is timed until the
+job finishes and its result has rendered, not just until the submission returns.
+The report gives per-interaction latency percentiles plus process CPU and RSS at
+each concurrency level.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import psutil  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.run_benchmarks import RESULTS_DIR, WORKSPACES_DIR, _git_commit  # noqa: E402
+from benchmarks.synthetic import build_workspace  # noqa: E402
+
+
+APP_SCRIPT = Path(__file__).resolve().parent.parent / "streamlit_xai_dashboard.py"
+
+
+def _set_role(at: AppTest, role: str) -> None:
+    at.sidebar.radio(key="role_select").set_value(role)
+
+
+def session_script(at: AppTest, iteration: int) -> list[tuple[str, callable, str | None]]:
+    """
+    The interactions one simulated user performs, in order.
+
+    The third item is the session-state key of the background job the interaction
+    submits, if any.
+    """
+    scientist_class = ["All Classes", "0", "1", "2", "3", "4"][iteration % 6]
+    return [
+        ("role:Scientist", lambda: _set_role(at, "Scientist"), None),
+        (
+            "scientist:class_select",
+            lambda: at.selectbox(key="scientist_class_select").set_value(scientist_class),
+            None,
+        ),
+        ("role:Public User", lambda: _set_role(at, "Public User"), None),
+        ("public_user:check_my_risk", lambda: at.button(key="public_user_btn").click(), None),
+        ("role:Public Health Officer", lambda: _set_role(at, "Public Health Officer"), None),
+        ("pho:generate_aggregated", lambda: at.button(key="pho_btn").click(), "pho_job"),
+        ("role:Regulator", lambda: _set_role(at, "Regulator"), None),
+    ]
+
+
+def wait_for_job(at: AppTest, state_key: str, timeout: float, poll_interval: float = 0.05) -> None:
+    """
+    Block until the session's job under `state_key` is done, then rerun so its result renders.
+    """
+    from dashboard_app.data import get_job_scheduler
+
+    job_id = at.session_state[state_key] if state_key in at.session_state else None
+    if job_id is None:
+        return
+    scheduler = get_job_scheduler()
+    deadline = time.perf_counter() + timeout
+    while (job := scheduler.get(job_id)) is not None and not job.done:
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"job {state_key} still running after {timeout:.0f}s")
+        time.sleep(poll_interval)
+    at.run()
+
+
+class ResourceSampler(threading.Thread):
+    """
+    Sample process CPU% and RSS at a fixed interval until stopped.
+    """
+
+    def __init__(self, interval: float = 0.2) -> None:
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.proc = psutil.Process()
+        self.cpu: list[float] = []
+        self.rss: list[int] = []
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        self.proc.cpu_percent(None)
+        while not self._stop_event.wait(self.interval):
+            self.cpu.append(self.proc.cpu_percent(None))
+            self.rss.append(self.proc.memory_info().rss)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def run_session(
+    session_id: int,
+    iterations: int,
+    timeout: float,
+    latencies: dict[str, list[float]],
+    errors: list[str],
+    lock: threading.Lock,
+) -> None:
+    at = AppTest.from_file(str(APP_SCRIPT), default_timeout=timeout)
+    try:
+        start = time.perf_counter()
+        at.run()
+        with lock:
+            latencies["initial_load"].append(time.perf_counter() - start)
+
+        for it in range(iterations):
+            for name, action, job_key in session_script(at, session_id + it):
+                action()
+                start = time.perf_counter()
+                at.run()
+                if job_key is not None:
+                    wait_for_job(at, job_key, timeout)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies[name].append(elapsed)
+                if at.exception:
+                    with lock:
+                        errors.append(f"session {session_id} {name}: {at.exception[0].message}")
+    except Exception as e:  # keep the other sessions running
+        with lock:
+            errors.append(f"session {session_id}: {type(e).__name__}: {e}")
+
+
+def _percentiles(samples: list[float]) -> dict:
+    arr = np.asarray(samples) * 1000.0
+    return {
+        "count": int(arr.size),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p90_ms": float(np.percentile(arr, 90)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+
+def run_level(concurrency: int, iterations: int, timeout: float) -> dict:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    sampler = ResourceSampler()
+    sampler.start()
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=run_session, args=(i, iterations, timeout, latencies, errors, lock))
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    sampler.stop()
+
+    n_interactions = sum(len(v) for v in latencies.values())
+    return {
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "interactions_per_s": n_interactions / wall if wall > 0 else 0.0,
+        "cpu_percent_mean": float(np.mean(sampler.cpu)) if sampler.cpu else 0.0,
+        "cpu_percent_max": float(np.max(sampler.cpu)) if sampler.cpu else 0.0,
+        "rss_mb_max": (max(sampler.rss) / 2**20) if sampler.rss else 0.0,
+        "latency": {name: _percentiles(v) for name, v in sorted(latencies.items())},
+        "errors": errors,
+    }
+
+
+def print_level(level: dict) -> None:
+    print(
+        f"\n=== concurrency={level['concurrency']} wall={level['wall_s']:.1f}s "
+        f"throughput={level['interactions_per_s']:.2f}/s "
+        f"cpu(mean/max)={level['cpu_percent_mean']:.0f}%/{level['cpu_percent_max']:.0f}% "
+        f"rss(max)={level['rss_mb_max']:.0f} MB"
+    )
+    for name, p in level["latency"].items():
+        print(
+            f"  {name:<30} n={p['count']:<4} p50={p['p50_ms']:8.1f} ms "
+            f"p90={p['p90_ms']:8.1f} ms p99={p['p99_ms']:8.1f} ms"
+        )
+    for err in level["errors"][:5]:
+        print(f"  ! {err}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8], help="Concurrent session counts to test.")
+    parser.add_argument("--iterations", type=int, default=2, help="Times each session repeats its interaction script.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier (1 = bundled CSV size).")
+    parser.add_argument("--workdir", type=Path, default=None, help="Directory with real artifacts to use instead of a synthetic workspace.")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-rerun timeout in seconds.")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path (default: benchmarks/results/load-<timestamp>-<commit>.json).")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = args.workdir
+    if workdir is None:
+        workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+        if not (workdir / "xgb_model.pkl").exists():
+            print(f"Building synthetic workspace in {workdir}")
+            build_workspace(workdir, scale=args.scale)
+    # The app loads its artifacts relative to the working directory.
+    os.chdir(workdir)
+
+    levels = []
+    for concurrency in args.concurrency:
+        level = run_level(concurrency, args.iterations, args.timeout)
+        print_level(level)
+        levels.append(level)
+
+    commit = _git_commit()
+    now = datetime.now(timezone.utc)
+    payload = {
+        "meta": {"commit": commit, "timestamp": now.isoformat(), "cpu_count": os.cpu_count(), "workdir": str(workdir)},
+        "levels": levels,
+    }
+    output = args.output or RESULTS_DIR / f"load-{now:%Y%m%d-%H%M%S}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, indent=2))
+    print(f"\nWrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
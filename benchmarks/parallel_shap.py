@@ -0,0 +1,83 @@
+"""
+Scaling of multiprocess SHAP (dashboard_app.parallel_shap) with worker count.
+
+Run (from the project root):
+    python -m benchmarks.parallel_shap --scale 10 --workers 1 2 4 8
+
+Explains every row of the synthetic dataset once per worker count and reports wall time,
+rows/s, speedup over one worker and parallel efficiency (speedup / workers), and checks that
+every run matches the single-process result exactly. PASS if the efficiency at the largest
+worker count that fits the machine's cores is at least --min-efficiency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.config import FEATURE_COLS
+from dashboard_app.data import get_shap_explainer, load_model_and_data
+from dashboard_app.parallel_shap import parallel_shap_values
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rows", type=int, default=None, help="Explain only the first N rows.")
+    parser.add_argument("--min-efficiency", type=float, default=0.7)
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    explainer = get_shap_explainer.__wrapped__(xgb_model)
+    X_scaled = store.X_scaled if args.rows is None else store.X_scaled[: args.rows]
+
+    cores = os.cpu_count() or 1
+    print(f"{len(X_scaled):,} rows, {cores} cores")
+    print(f"{'workers':>8}{'seconds':>10}{'rows/s':>12}{'speedup':>9}{'efficiency':>12}{'max diff':>11}")
+
+    reference = None
+    base_seconds = None
+    efficiency: dict[int, float] = {}
+    for workers in sorted(set(args.workers) | {1}):
+        start = time.perf_counter()
+        values = parallel_shap_values(xgb_model, explainer, X_scaled, FEATURE_COLS, workers=workers)
+        seconds = time.perf_counter() - start
+        if reference is None:
+            reference, base_seconds = values, seconds
+        diff = float(np.max(np.abs(values - reference)))
+        speedup = base_seconds / seconds
+        efficiency[workers] = speedup / workers
+        flag = "" if workers <= cores else "  (more workers than cores)"
+        print(
+            f"{workers:>8}{seconds:>10.2f}{len(X_scaled) / seconds:>12,.0f}{speedup:>9.2f}"
+            f"{efficiency[workers]:>12.2f}{diff:>11.2e}{flag}"
+        )
+        if diff > 1e-6:
+            print(f"FAIL: {workers} workers differ from the single-process result by {diff:.2e}")
+            return 1
+
+    fitting = [w for w in efficiency if 1 < w <= cores]
+    if not fitting:
+        print(f"SKIP: scaling needs more than {cores} core(s); results match the single-process run")
+        return 0
+    workers = max(fitting)
+    verdict = "PASS" if efficiency[workers] >= args.min_efficiency else "FAIL"
+    print(f"{verdict}: efficiency {efficiency[workers]:.2f} at {workers} workers (min {args.min_efficiency:.2f})")
+    return 0 if verdict == "PASS" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
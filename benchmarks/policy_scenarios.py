@@ -0,0 +1,102 @@
+"""
+Time population-wide policy scenarios and check them against the sklearn pipeline.
+
+Run (from the project root):
+    python -m benchmarks.policy_scenarios --scenarios 4 --repeats 5
+
+Each repeat draws `--scenarios` random scenarios (one to three features scaled by -30%..+10%,
+some shifted or capped) and scores them together with `ScenarioEngine.evaluate` on every
+record, uncached. The transition matrices are checked against `pipeline.predict` on the
+edited raw features. Exits non-zero if the median evaluation exceeds `--budget-ms` or any
+predicted class differs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.config import FEATURE_COLS, SCENARIO_SHAP_ROWS
+from dashboard_app.data import get_shap_explainer, get_shap_sample, load_model_and_data
+from dashboard_app.feature_store import uniform_sample_indices
+from dashboard_app.scenarios import FeatureEdit, Scenario, ScenarioEngine
+
+
+def random_scenario(rng: np.random.Generator, X, name: str) -> Scenario:
+    features = rng.choice(FEATURE_COLS, size=int(rng.integers(1, 4)), replace=False)
+    edits = []
+    for feature in features:
+        values = X[feature].to_numpy()
+        shift = float(rng.uniform(-0.05, 0.05) * values.std()) if rng.random() < 0.3 else 0.0
+        cap = float(np.quantile(values, rng.uniform(0.7, 0.99))) if rng.random() < 0.3 else None
+        edits.append(FeatureEdit(str(feature), scale=float(rng.uniform(0.7, 1.1)), shift=shift, cap=cap))
+    return Scenario(name, tuple(edits))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, default=4, help="Scenarios evaluated together.")
+    parser.add_argument("--repeats", type=int, default=5, help="Independent batches of random scenarios.")
+    parser.add_argument("--shap-rows", type=int, default=SCENARIO_SHAP_ROWS, help="SHAP sample rows used for SHAP shifts.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Median budget per batch of scenarios.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    original = X.to_numpy(dtype=np.float64)  # a writable copy of the raw view
+    explainer = get_shap_explainer.__wrapped__(xgb_model)
+    sample, _, _ = get_shap_sample.__wrapped__(explainer, store)
+    pick = uniform_sample_indices(len(sample.indices), args.shap_rows)
+
+    start = time.perf_counter()
+    engine = ScenarioEngine(xgb_model, explainer, scaler, store, sample.indices[pick], sample.weights[pick])
+    print(f"{store.n_rows:,} rows; engine built in {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(0)
+    times, mismatches = [], 0
+    for rep in range(args.repeats):
+        scenarios = [random_scenario(rng, X, f"S{rep}.{i}") for i in range(args.scenarios)]
+        start = time.perf_counter()
+        results = engine.evaluate(scenarios)
+        times.append(time.perf_counter() - start)
+
+        for scenario, result in zip(scenarios, results):
+            edited = original.copy()
+            for edit in scenario.edits:
+                j = FEATURE_COLS.index(edit.feature)
+                edited[:, j] = edit.apply(X[edit.feature].to_numpy())
+            expected = pipeline.predict(pd.DataFrame(edited, columns=FEATURE_COLS)).astype(np.int64)
+            counts = np.bincount(
+                engine.baseline_pred.astype(np.int64) * engine.n_classes + expected,
+                minlength=engine.n_classes**2,
+            )
+            mismatches += int(np.abs(counts - result.transitions.reshape(-1)).sum())
+        print(
+            f"batch {rep}: {times[-1] * 1000:7.1f} ms, records changing class: "
+            + ", ".join(f"{r.n_changed:,}" for r in results)
+        )
+
+    median_ms = float(np.median(times)) * 1000
+    print(f"transition-count mismatches vs pipeline.predict: {mismatches}")
+    ok = median_ms <= args.budget_ms and mismatches == 0
+    print(
+        f"{'PASS' if ok else 'FAIL'}: {args.scenarios} scenarios x {store.n_rows:,} rows, "
+        f"median {median_ms:.0f} ms (budget {args.budget_ms:.0f} ms)"
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,270 @@
+"""
+Time the dashboard hot paths at realistic and scaled-up dataset sizes.
+
+Run (from the project root):
+    python -m benchmarks.run_benchmarks --scales 1 10 100
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<previous>.json
+
+Each scale gets a synthetic workspace (dataset + stand-in model) under
+`benchmarks/.workspaces/`, so no artifact download is needed. Results are written
+as JSON to `benchmarks/results/` for comparison between commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.synthetic import build_workspace  # noqa: E402
+from dashboard_app.config import FEATURE_COLS  # noqa: E402
+from dashboard_app.data import get_shap_explainer, load_model_and_data  # noqa: E402
+from dashboard_app.shap_utils import (  # noqa: E402
+    global_mean_abs_by_class,
+    global_shap_total_bar_values,
+    global_shap_total_exp,
+    local_shap_1d_and_base_value,
+)
+from dashboard_app.views.plots import (  # noqa: E402
+    plot_global_shap_all_classes_stacked_bar,
+    plot_global_shap_for_class,
+    plot_global_shap_total_bar,
+)
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+WORKSPACES_DIR = BENCH_DIR / ".workspaces"
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+@contextmanager
+def working_directory(path: Path):
+    prev = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(prev)
+
+
+def time_call(fn: Callable[[], object], repeat: int) -> dict:
+    """
+    Run `fn` `repeat` times and summarize wall-clock seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "max_s": max(samples),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=BENCH_DIR.parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _run_dice(X: pd.DataFrame, y: pd.Series, pipeline, desired_class: int) -> None:
+    # Mirrors the DiCE block in `regulator_view`.
+    from dice_ml import Data, Dice, Model
+
+    dice_df = pd.concat([X, y.rename("HealthImpactClass")], axis=1)
+    dice_data = Data(
+        dataframe=dice_df,
+        continuous_features=FEATURE_COLS,
+        outcome_name="HealthImpactClass",
+    )
+    dice_model = Model(model=pipeline, backend="sklearn", model_type="classifier")
+    dice_exp = Dice(dice_data, dice_model, method="genetic")
+    dice_exp.generate_counterfactuals(
+        X.iloc[0:1],
+        total_CFs=3,
+        desired_class=int(desired_class),
+        proximity_weight=0.5,
+        diversity_weight=1.0,
+    )
+
+
+def bench_scale(scale: int, args: argparse.Namespace) -> list[dict]:
+    workdir = WORKSPACES_DIR / f"scale-{scale}"
+    if not (workdir / "xgb_model.pkl").exists() or args.rebuild:
+        print(f"[scale={scale}] building synthetic workspace in {workdir}")
+        build_workspace(workdir, scale=scale)
+
+    results: list[dict] = []
+
+    def record(name: str, rows: int, fn: Callable[[], object], repeat: int) -> None:
+        stats = time_call(fn, repeat)
+        results.append({"name": name, "scale": scale, "rows": rows, **stats})
+        print(f"[scale={scale}] {name:<40} rows={rows:<9} median={stats['median_s'] * 1000:10.2f} ms")
+
+    with working_directory(workdir):
+        load = load_model_and_data.__wrapped__
+        xgb_model, scaler, pipeline, X, y, _df = load()
+        n_rows = len(X)
+        record("load_model_and_data", n_rows, load, args.repeat_slow)
+
+    explainer = get_shap_explainer.__wrapped__(xgb_model)
+    record("get_shap_explainer", n_rows, lambda: get_shap_explainer.__wrapped__(xgb_model), args.repeat)
+    record("scaler.transform[full]", n_rows, lambda: scaler.transform(X), args.repeat)
+
+    X_scaled = scaler.transform(X)
+    instance = X_scaled[0:1]
+    record(
+        "shap_utils.local_shap_1d_and_base_value",
+        1,
+        lambda: local_shap_1d_and_base_value(explainer, instance, 0, FEATURE_COLS),
+        args.repeat,
+    )
+
+    rng = np.random.default_rng(42)
+    for shap_rows in args.shap_rows:
+        m = min(shap_rows, n_rows)
+        idx = rng.choice(n_rows, m, replace=False)
+        X_sample = X.iloc[idx]
+        X_sample_scaled = X_scaled[idx]
+
+        record(
+            "shap_utils.global_mean_abs_by_class",
+            m,
+            lambda: global_mean_abs_by_class(explainer, X_sample_scaled, FEATURE_COLS),
+            args.repeat_slow,
+        )
+        record(
+            "shap_utils.global_shap_total_bar_values",
+            m,
+            lambda: global_shap_total_bar_values(explainer, X_sample_scaled, FEATURE_COLS),
+            args.repeat_slow,
+        )
+        record(
+            "shap_utils.global_shap_total_exp",
+            m,
+            lambda: global_shap_total_exp(explainer, X_sample_scaled, X_sample.values, FEATURE_COLS),
+            args.repeat_slow,
+        )
+        record(
+            "plots.plot_global_shap_for_class",
+            m,
+            lambda: plot_global_shap_for_class(explainer, X_sample, X_sample_scaled, FEATURE_COLS, 0),
+            args.repeat_slow,
+        )
+
+    mean_abs = global_mean_abs_by_class(explainer, X_scaled[: min(1000, n_rows)], FEATURE_COLS)
+    record(
+        "plots.plot_global_shap_all_classes_stacked_bar",
+        mean_abs.shape[1],
+        lambda: plot_global_shap_all_classes_stacked_bar(FEATURE_COLS, mean_abs, max_display=12),
+        args.repeat,
+    )
+    record(
+        "plots.plot_global_shap_total_bar",
+        mean_abs.shape[1],
+        lambda: plot_global_shap_total_bar(FEATURE_COLS, mean_abs.mean(axis=0)),
+        args.repeat,
+    )
+
+    if not args.skip_dice and n_rows <= args.dice_max_rows:
+        pred = int(pipeline.predict(X.iloc[0:1])[0])
+        desired = 1 if pred == 0 else 0
+        record("regulator.dice_generate_counterfactuals", n_rows, lambda: _run_dice(X, y, pipeline, desired), 1)
+
+    return results
+
+
+def compare(current: dict, baseline_path: Path, threshold: float) -> int:
+    """
+    Print median ratios against a previous results file; return the number of regressions.
+    """
+    baseline = json.loads(baseline_path.read_text())
+    base_by_key = {(r["name"], r["scale"], r["rows"]): r for r in baseline["results"]}
+
+    regressions = 0
+    print(f"\nComparison against {baseline_path} (commit {baseline['meta'].get('commit')})")
+    for r in current["results"]:
+        base = base_by_key.get((r["name"], r["scale"], r["rows"]))
+        if base is None or base["median_s"] <= 0:
+            continue
+        ratio = r["median_s"] / base["median_s"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"  {r['name']:<40} scale={r['scale']:<5} rows={r['rows']:<9} x{ratio:6.2f} {flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10], help="Dataset size multipliers (1 = bundled CSV size).")
+    parser.add_argument("--shap-rows", type=int, nargs="+", default=[1000, 10000], help="Row counts for global SHAP/plot benchmarks.")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions for fast calls.")
+    parser.add_argument("--repeat-slow", type=int, default=3, help="Repetitions for slow calls.")
+    parser.add_argument("--skip-dice", action="store_true", help="Skip the DiCE counterfactual benchmark.")
+    parser.add_argument("--dice-max-rows", type=int, default=60000, help="Only run DiCE when the dataset has at most this many rows.")
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate synthetic workspaces.")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path (default: benchmarks/results/<timestamp>-<commit>.json).")
+    parser.add_argument("--compare", type=Path, default=None, help="Previous results JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Median ratio above which a result counts as a regression.")
+    args = parser.parse_args(argv)
+
+    # Plot functions call st.pyplot outside a Streamlit runtime ("bare mode").
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    results: list[dict] = []
+    for scale in args.scales:
+        results.extend(bench_scale(scale, args))
+
+    commit = _git_commit()
+    now = datetime.now(timezone.utc)
+    payload = {
+        "meta": {
+            "commit": commit,
+            "timestamp": now.isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"{now:%Y%m%d-%H%M%S}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, indent=2))
+    print(f"\nWrote {output}")
+
+    if args.compare is not None:
+        return 1 if compare(payload, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
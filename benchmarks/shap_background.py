@@ -0,0 +1,118 @@
+"""
+Speed vs fidelity of interventional SHAP per background summary size.
+
+Run (from the project root):
+    python -m benchmarks.shap_background --sizes 10 25 50 100 --explain-rows 100
+
+Interventional TreeExplainer cost grows linearly with the number of background rows. The
+reference is interventional SHAP over `--reference-size` uniformly drawn records; each
+summary (class-stratified records, k-means medoids, and a uniform random draw as the
+naive baseline) is scored on the same rows by:
+  - build s / ms/row: background + explainer build time and SHAP time per explained row,
+  - rel err: ||SHAP - reference|| / ||reference|| over all rows, classes and features,
+  - top-5: overlap of the global top-5 features (total mean(|SHAP|)) with the reference,
+  - base err: largest |expected_value - reference expected_value| across classes.
+The tree path-dependent explainer is listed for comparison. PASS if the configured
+summary (SHAP_BACKGROUND_METHOD at SHAP_BACKGROUND_SIZE rows) is within --max-rel-error.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.background import Background, make_tree_explainer, summarize_background
+from dashboard_app.config import FEATURE_COLS, SHAP_BACKGROUND_METHOD, SHAP_BACKGROUND_SIZE
+from dashboard_app.data import load_model_and_data
+from dashboard_app.shap_utils import _global_shap_to_class_list
+
+
+def _explain(explainer, X: np.ndarray) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    values = np.stack(_global_shap_to_class_list(explainer.shap_values(X), FEATURE_COLS), axis=0)
+    return values, (time.perf_counter() - start) / len(X)
+
+
+def _top(values: np.ndarray, k: int = 5) -> set[int]:
+    return set(np.argsort(-np.abs(values).mean(axis=1).sum(axis=0), kind="stable")[:k].tolist())
+
+
+def _uniform(X_scaled: np.ndarray, size: int, seed: int) -> Background:
+    rows = np.sort(np.random.default_rng(seed).choice(len(X_scaled), size, replace=False))
+    data = np.asarray(X_scaled[rows], dtype=np.float32)
+    return Background(method="uniform", prototypes=data, weights=np.full(size, 1.0 / size), data=data)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 25, 50, 100])
+    parser.add_argument("--explain-rows", type=int, default=100)
+    parser.add_argument("--reference-size", type=int, default=500)
+    parser.add_argument("--max-rel-error", type=float, default=0.20, help="Fidelity budget for the configured summary.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+
+    labels = y.to_numpy()
+    rng = np.random.default_rng(0)
+    X_explain = np.asarray(store.X_scaled[np.sort(rng.choice(store.n_rows, args.explain_rows, replace=False))])
+
+    reference = make_tree_explainer(xgb_model, "interventional", _uniform(store.X_scaled, args.reference_size, seed=1))
+    ref_values, ref_per_row = _explain(reference, X_explain)
+    ref_base = np.atleast_1d(reference.expected_value)
+    ref_norm = np.linalg.norm(ref_values)
+    ref_top = _top(ref_values)
+    print(
+        f"{store.n_rows:,} rows; reference: interventional, {args.reference_size} uniform background rows, "
+        f"{ref_per_row * 1000:.1f} ms/row over {args.explain_rows} rows"
+    )
+    print(f"{'explainer':<24}{'rows':>6}{'build s':>9}{'ms/row':>9}{'rel err':>9}{'top-5':>7}{'base err':>10}")
+
+    def report(label: str, n_rows: int, build_s: float, explainer) -> float:
+        values, per_row = _explain(explainer, X_explain)
+        rel = np.linalg.norm(values - ref_values) / ref_norm
+        base = np.max(np.abs(np.atleast_1d(explainer.expected_value) - ref_base))
+        overlap = len(_top(values) & ref_top)
+        print(f"{label:<24}{n_rows:>6}{build_s:>9.3f}{per_row * 1000:>9.2f}{rel * 100:>8.2f}%{overlap:>5}/5{base:>10.4f}")
+        return rel
+
+    start = time.perf_counter()
+    path_dependent = make_tree_explainer(xgb_model, "tree_path_dependent")
+    report("tree_path_dependent", 0, time.perf_counter() - start, path_dependent)
+
+    errors: dict[tuple[str, int], float] = {}
+    for size in sorted(set(args.sizes) | {SHAP_BACKGROUND_SIZE}):
+        for method in ("stratified", "kmeans", "uniform"):
+            start = time.perf_counter()
+            if method == "uniform":
+                background = _uniform(store.X_scaled, size, seed=2)
+            else:
+                background = summarize_background(store.X_scaled, size, method, y=labels)
+            explainer = make_tree_explainer(xgb_model, "interventional", background)
+            errors[(method, size)] = report(
+                f"interventional/{method}", background.size, time.perf_counter() - start, explainer
+            )
+
+    rel = errors[(SHAP_BACKGROUND_METHOD, SHAP_BACKGROUND_SIZE)]
+    verdict = "PASS" if rel <= args.max_rel_error else "FAIL"
+    print(
+        f"{verdict}: {SHAP_BACKGROUND_METHOD} background with {SHAP_BACKGROUND_SIZE} rows is {rel * 100:.1f}% "
+        f"from the {args.reference_size}-row reference (budget {args.max_rel_error * 100:.0f}%)"
+    )
+    return 0 if verdict == "PASS" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+"""
+Variance/compute trade-off of uniform vs class-stratified SHAP samples.
+
+Run (from the project root):
+    python -m benchmarks.stratified_sampling --sizes 250 500 1000 2000 --repeats 50
+
+SHAP is computed once for every row; each sample is then an index draw, so many
+repetitions are cheap. For each sample size and method the script reports the estimated
+SHAP compute time of the sample, the fewest rows any class gets (what its beeswarm is
+drawn from) and two relative RMSEs per class c against the full data:
+  - "pop": the population mean(|SHAP|) vector for class c's output (weighted sample),
+  - "in": the mean(|SHAP|) vector for class c's output over rows labelled c only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.config import FEATURE_COLS, SHAP_SAMPLE_MIN_PER_CLASS
+from dashboard_app.data import get_shap_explainer, load_model_and_data
+from dashboard_app.sampling import allocate_quotas, stratified_row_order, stratum_weights
+from dashboard_app.shap_utils import _global_shap_to_class_list
+
+
+def _draw(method: str, y: np.ndarray, population: np.ndarray, size: int, min_per_class: int, seed: int):
+    if method == "uniform":
+        rows = np.random.default_rng(seed).choice(len(y), size, replace=False)
+        return rows, np.full(size, 1.0 / size)
+    quotas = allocate_quotas(population, size, min_per_class)
+    rows = stratified_row_order(y, quotas, seed, min_per_class)[:size]
+    return rows, stratum_weights(y[rows], population)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000])
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--min-per-class", type=int, default=SHAP_SAMPLE_MIN_PER_CLASS)
+    parser.add_argument("--reference-size", type=int, default=1000, help="Uniform size the stratified sampler must match.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    explainer = get_shap_explainer.__wrapped__(xgb_model)
+
+    start = time.perf_counter()
+    per_class = _global_shap_to_class_list(explainer.shap_values(store.X_scaled), FEATURE_COLS)
+    per_row_s = (time.perf_counter() - start) / store.n_rows
+    abs_vals = np.abs(np.stack(per_class, axis=0)).astype(np.float64)  # (classes, rows, features)
+    truth = abs_vals.mean(axis=1)
+
+    labels = y.to_numpy().astype(np.int64)
+    population = np.bincount(labels)
+    n_classes = truth.shape[0]
+    in_truth = np.stack([abs_vals[c, labels == c].mean(axis=0) for c in range(n_classes)])
+    print(f"{store.n_rows:,} rows, class counts {population.tolist()}, SHAP {per_row_s * 1000:.3f} ms/row")
+    print(
+        f"{'method':<11}{'size':>6}{'SHAP s':>8}{'min rows':>9}  "
+        + "  ".join(f"pop c{c:<2}" for c in range(n_classes))
+        + "  "
+        + "  ".join(f" in c{c:<2}" for c in range(n_classes))
+    )
+
+    errors: dict[tuple[str, int], np.ndarray] = {}
+    for size in sorted(set(args.sizes) | {args.reference_size}):
+        size = min(size, store.n_rows)
+        for method in ("uniform", "stratified"):
+            sq_err = np.zeros(n_classes)
+            sq_in = np.zeros(n_classes)
+            min_rows = []
+            for r in range(args.repeats):
+                rows, weights = _draw(method, labels, population, size, args.min_per_class, seed=r)
+                estimate = np.einsum("crf,r->cf", abs_vals[:, rows], weights)
+                sq_err += np.sum(np.square(estimate - truth), axis=1) / np.sum(np.square(truth), axis=1)
+                for c in range(n_classes):
+                    mine = rows[labels[rows] == c]
+                    est_in = abs_vals[c, mine].mean(axis=0) if len(mine) else np.zeros_like(in_truth[c])
+                    sq_in[c] += np.sum(np.square(est_in - in_truth[c])) / np.sum(np.square(in_truth[c]))
+                min_rows.append(np.bincount(labels[rows], minlength=len(population)).min())
+            errors[(method, size)] = np.concatenate([np.sqrt(sq_err / args.repeats), np.sqrt(sq_in / args.repeats)])
+            print(
+                f"{method:<11}{size:>6}{size * per_row_s:>8.2f}{int(np.mean(min_rows)):>9}  "
+                + "  ".join(f"{e * 100:>6.2f}%" for e in errors[(method, size)])
+            )
+
+    reference = errors[("uniform", min(args.reference_size, store.n_rows))]
+    for label, part in (("population", slice(0, n_classes)), ("within-class", slice(n_classes, None))):
+        matching = [
+            size
+            for (method, size), e in sorted(errors.items(), key=lambda kv: kv[0][1])
+            if method == "stratified" and np.all(e[part] <= reference[part])
+        ]
+        if matching:
+            print(f"{label}: stratified n={matching[0]} matches or beats uniform n={args.reference_size} for every class")
+        else:
+            print(f"{label}: no stratified size tried matches uniform n={args.reference_size} for every class")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from dashboard_app.config import FEATURE_COLS
+
+
+SOURCE_CSV = Path(__file__).resolve().parent.parent / "air_quality_health_impact_data.csv"
+TARGET_COL = "HealthImpactClass"
+
+
+def generate_synthetic_data(
+    scale: int = 10,
+    seed: int = 42,
+    jitter: float = 0.02,
+    source_csv: Path = SOURCE_CSV,
+) -> pd.DataFrame:
+    """
+    Build a dataset with `scale` times as many rows as the bundled CSV.
+
+    Rows are bootstrapped from the source (so class balance and the feature/label
+    relationship are kept) and continuous features get a small Gaussian jitter,
+    clipped to the observed range. Count features are resampled as-is so their
+    integer distribution is reproduced exactly.
+    """
+    src = pd.read_csv(source_csv)
+    rng = np.random.default_rng(seed)
+    n_rows = int(len(src) * scale)
+
+    rows = rng.integers(0, len(src), size=n_rows)
+    out = {"RecordID": np.arange(1, n_rows + 1)}
+    for col in FEATURE_COLS:
+        values = src[col].to_numpy()[rows]
+        if np.issubdtype(src[col].dtype, np.floating):
+            noise = rng.normal(0.0, jitter * src[col].std(), size=n_rows)
+            values = np.clip(values + noise, src[col].min(), src[col].max())
+        out[col] = values
+    out["HealthImpactScore"] = src["HealthImpactScore"].to_numpy()[rows]
+    out[TARGET_COL] = src[TARGET_COL].to_numpy()[rows]
+    return pd.DataFrame(out)
+
+
+def train_standin_model(
+    df: pd.DataFrame,
+    n_estimators: int = 60,
+    max_depth: int = 4,
+    seed: int = 42,
+) -> Pipeline:
+    """
+    Train a small scaler + XGBoost pipeline with the same step names as the real artifact.
+    """
+    X = df[FEATURE_COLS]
+    y = df[TARGET_COL].astype(int)
+    pipeline = Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            (
+                "xgb",
+                xgb.XGBClassifier(
+                    n_estimators=n_estimators,
+                    max_depth=max_depth,
+                    learning_rate=0.1,
+                    random_state=seed,
+                    eval_metric="mlogloss",
+                ),
+            ),
+        ]
+    )
+    pipeline.fit(X, y)
+    return pipeline
+
+
+def build_workspace(
+    workdir: Path,
+    scale: int = 1,
+    seed: int = 42,
+    train_rows: int = 20000,
+) -> Path:
+    """
+    Write `xgb_model.pkl`, `scaler.pkl` and the dataset CSV into `workdir`.
+
+    The stand-in model is trained on at most `train_rows` rows so building a 1000x
+    workspace doesn't spend minutes fitting. The directory layout matches what
+    `load_model_and_data` expects, so the app can run from `workdir` unchanged.
+    """
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    df = generate_synthetic_data(scale=scale, seed=seed)
+    train_df = df.sample(n=min(train_rows, len(df)), random_state=seed)
+    pipeline = train_standin_model(train_df, seed=seed)
+
+    df.to_csv(workdir / "air_quality_health_impact_data.csv", index=False)
+    joblib.dump(pipeline, workdir / "xgb_model.pkl")
+    joblib.dump(pipeline.named_steps["scaler"], workdir / "scaler.pkl")
+    return workdir
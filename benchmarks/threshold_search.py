@@ -0,0 +1,78 @@
+"""
+Compare the breakpoint threshold finder against a fine grid search.
+
+Run (from the project root):
+    python -m benchmarks.threshold_search --rows 2000 --grid 1000
+
+For each feature, times `class_transitions` (one evaluation per constant piece) and a
+uniform grid search over the feature's observed range, then checks that every grid
+point's predicted class matches the class of the piece it falls in. Exits non-zero on
+any mismatch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.config import FEATURE_COLS
+from dashboard_app.data import load_model_and_data
+from dashboard_app.feature_store import uniform_sample_indices
+from dashboard_app.pdp import compute_partial_dependence
+from dashboard_app.thresholds import class_transitions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="Records evaluated per feature.")
+    parser.add_argument("--grid", type=int, default=1000, help="Grid points for the grid-search baseline.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    booster = xgb_model.get_booster()
+    rows = np.sort(uniform_sample_indices(store.n_rows, args.rows))
+    X_rows = store.X_scaled[rows]
+
+    total_fast = total_grid = 0.0
+    mismatches = 0
+    for j, feat in enumerate(FEATURE_COLS):
+        start = time.perf_counter()
+        result = class_transitions(booster, store.X_scaled, FEATURE_COLS, feat, scaler, rows=rows)
+        fast = time.perf_counter() - start
+
+        col = store.X_scaled[:, j]
+        grid = np.linspace(col.min(), col.max(), args.grid, dtype=np.float32)
+        start = time.perf_counter()
+        grid_classes = compute_partial_dependence(booster, X_rows, j, grid).argmax(axis=2)
+        slow = time.perf_counter() - start
+
+        splits = (result.thresholds - scaler.mean_[j]) / scaler.scale_[j]
+        piece = np.searchsorted(splits.astype(np.float32), grid, side="right")
+        bad = int((grid_classes != result.classes[:, piece]).sum())
+        mismatches += bad
+        total_fast += fast
+        total_grid += slow
+        print(
+            f"{feat:<22} splits={len(result.thresholds):>4}  breakpoints {fast * 1000:8.1f} ms  "
+            f"grid {slow * 1000:8.1f} ms  mismatches={bad}"
+        )
+
+    print(f"total: breakpoints {total_fast:.2f} s, grid {total_grid:.2f} s ({total_grid / max(total_fast, 1e-9):.1f}x)")
+    print(f"{'PASS' if mismatches == 0 else 'FAIL'}: {mismatches} grid points disagree with the breakpoint classes")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+"""
+Time chunked ingest of an uploaded CSV (dashboard_app.ingest) and check its edge cases.
+
+Run (from the project root):
+    python -m benchmarks.upload_ingest --scale 50 --chunk-rows 50000
+
+Ingests a `--scale` synthetic upload (about 1% of rows with a non-numeric feature) and
+reports wall time, rows/s and the peak Python/NumPy allocation (tracemalloc). It then
+ingests two small files, each in 10-row chunks:
+  - every row invalid: the ingest must finish with no valid rows and the upload panel
+    must show its "no valid rows" warning,
+  - first chunk invalid, the rest valid: the invalid chunk must be skipped and counted.
+Exits non-zero if a row count is wrong, a check fails or ingest exceeds `--budget-s`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace, generate_synthetic_data
+from dashboard_app.config import FEATURE_COLS
+from dashboard_app.data import get_shap_explainer, load_model_and_data
+from dashboard_app.ingest import iter_ingest
+
+
+def _ingest(data: bytes, model, explainer, scaler, chunk_rows: int, shap_rows: int):
+    summary = None
+    for summary in iter_ingest(
+        io.BytesIO(data), "upload.csv", model, explainer, scaler, FEATURE_COLS, chunk_rows, shap_rows
+    ):
+        pass
+    return summary
+
+
+def _render_warning_app(summary, feature_cols) -> None:
+    from dashboard_app.views.upload import _render_summary
+
+    _render_summary(summary, None, feature_cols, "bench")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=50, help="Upload size as a multiple of the bundled CSV.")
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--shap-rows", type=int, default=2_000, help="SHAP rows per chunk.")
+    parser.add_argument("--budget-s", type=float, default=60.0, help="Budget for ingesting the large upload.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / "scale-1"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=1)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    explainer = get_shap_explainer.__wrapped__(xgb_model)
+
+    upload = generate_synthetic_data(scale=args.scale, seed=7)[FEATURE_COLS].astype(object)
+    rng = np.random.default_rng(0)
+    bad = rng.random(len(upload)) < 0.01
+    upload.loc[bad, "AQI"] = "n.a."
+    data = upload.to_csv(index=False).encode()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    summary = _ingest(data, xgb_model, explainer, scaler, args.chunk_rows, args.shap_rows)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f"{len(upload):,} rows ({len(data) / 2**20:.0f} MB) in {seconds:.1f} s "
+        f"({len(upload) / seconds:,.0f} rows/s), peak {peak / 2**20:.0f} MB allocated"
+    )
+    checks = {
+        "large upload row counts": summary.n_rows == int((~bad).sum()) and summary.n_invalid == int(bad.sum()),
+    }
+
+    small = X.iloc[:30].astype(object)
+    invalid = small.copy()
+    invalid["AQI"] = "bad"
+    summary = _ingest(invalid.to_csv(index=False).encode(), xgb_model, explainer, scaler, 10, 10)
+    checks["fully invalid file: no valid rows"] = summary.n_rows == 0 and summary.n_invalid == 30
+    at = AppTest.from_function(_render_warning_app, args=(summary, FEATURE_COLS), default_timeout=60)
+    at.run()
+    checks["fully invalid file: warning shown"] = not at.exception and any(
+        "no valid rows" in w.value for w in at.warning
+    )
+
+    first_bad = small.copy()
+    first_bad.iloc[:10, FEATURE_COLS.index("AQI")] = "bad"
+    summary = _ingest(first_bad.to_csv(index=False).encode(), xgb_model, explainer, scaler, 10, 10)
+    checks["invalid first chunk skipped"] = summary.n_rows == 20 and summary.n_invalid == 10
+
+    for name, ok in checks.items():
+        print(f"{'ok' if ok else 'FAILED':<8}{name}")
+    ok = all(checks.values()) and seconds <= args.budget_s
+    print(f"{'PASS' if ok else 'FAIL'}: ingest {seconds:.1f} s (budget {args.budget_s:.0f} s)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""
+Measure and enforce the what-if latency budget.
+
+Run (from the project root):
+    python -m benchmarks.whatif_latency --edits 500
+
+Simulates slider edits (one feature moved to a point of its slider's grid, from a random
+record) against `WhatIfEngine` and checks each prediction against `pipeline.predict` on
+the values the slider reports. It also evaluates `--records` stored records unchanged,
+which must keep their stored prediction. Exits non-zero on any mismatch or if the p95
+latency of uncached evaluations exceeds `WHATIF_LATENCY_BUDGET_S`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+
+import numpy as np
+
+from benchmarks.run_benchmarks import WORKSPACES_DIR, working_directory
+from benchmarks.synthetic import build_workspace
+from dashboard_app.config import FEATURE_COLS
+from dashboard_app.data import get_shap_explainer, load_model_and_data
+from dashboard_app.whatif import WHATIF_LATENCY_BUDGET_S, WhatIfEngine
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edits", type=int, default=500, help="Number of simulated slider edits.")
+    parser.add_argument("--records", type=int, default=1000, help="Stored records evaluated unchanged.")
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset multiplier.")
+    parser.add_argument("--budget-ms", type=float, default=WHATIF_LATENCY_BUDGET_S * 1000, help="p95 budget for uncached evaluations.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = WORKSPACES_DIR / f"scale-{args.scale}"
+    if not (workdir / "xgb_model.pkl").exists():
+        build_workspace(workdir, scale=args.scale)
+    with working_directory(workdir):
+        xgb_model, scaler, pipeline, X, y, store = load_model_and_data.__wrapped__()
+    explainer = get_shap_explainer.__wrapped__(xgb_model)
+    engine = WhatIfEngine.from_data(xgb_model, explainer, scaler, X, FEATURE_COLS)
+
+    rng = np.random.default_rng(0)
+    n_steps = np.floor((X.max().to_numpy(dtype=np.float64) - engine.lows) / engine.steps).astype(int)
+    engine.evaluate(X.iloc[0].to_numpy(dtype=np.float64))  # warm-up
+
+    misses, hits, mismatches = [], [], 0
+    for _ in range(args.edits):
+        values = X.iloc[int(rng.integers(len(X)))].to_numpy(dtype=np.float64)
+        j = int(rng.integers(len(FEATURE_COLS)))
+        # What a slider reports: min + n * step, computed in the browser's float64.
+        values[j] = engine.lows[j] + int(rng.integers(n_steps[j] + 1)) * engine.steps[j]
+
+        result = engine.evaluate(values)
+        (hits if result.cached else misses).append(result.latency_s)
+        hits.append(engine.evaluate(values).latency_s)
+
+        expected = int(pipeline.predict(values.reshape(1, -1))[0])
+        mismatches += expected != result.pred_class
+
+    n = min(args.records, len(X))
+    stored = pipeline.predict(X.iloc[:n])
+    unchanged = sum(
+        engine.evaluate(X.iloc[i].to_numpy(dtype=np.float64)).pred_class != int(stored[i]) for i in range(n)
+    )
+
+    def summary(samples: list[float]) -> str:
+        arr = np.asarray(samples) * 1000
+        return f"n={arr.size} p50={np.percentile(arr, 50):.2f} ms p95={np.percentile(arr, 95):.2f} ms max={arr.max():.2f} ms"
+
+    print(f"uncached: {summary(misses)}")
+    print(f"cached:   {summary(hits)}")
+    print(f"prediction mismatches vs pipeline.predict: {mismatches}")
+    print(f"unchanged records 0-{n - 1} predicted differently from pipeline.predict: {unchanged}")
+
+    p95 = float(np.percentile(np.asarray(misses) * 1000, 95)) if misses else 0.0
+    ok = p95 <= args.budget_ms and mismatches == 0 and unchanged == 0
+    print(f"{'PASS' if ok else 'FAIL'}: uncached p95 {p95:.2f} ms (budget {args.budget_ms:.0f} ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,7 +3,6 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
-import numpy as np
 import streamlit as st
 
 from dashboard_app.config import (
@@ -12,9 +11,26 @@ from dashboard_app.config import (
     FEATURE_COLS,
     FEATURE_DESCRIPTIONS,
     ROLES,
+    SHAP_BACKGROUND_METHOD,
+    SHAP_EXPLAINER_MODE,
 )
-from dashboard_app.data import get_shap_explainer, load_model_and_data
+from dashboard_app.data import (
+    get_drift_reference,
+    get_leaf_index,
+    get_model_version,
+    get_neighbor_index,
+    get_scenario_engine,
+    get_shap_explainer,
+    get_shap_sample,
+    get_whatif_engine,
+    load_model_and_data,
+)
+from dashboard_app.metrics import current_session_id, rerun_scope, span
+from dashboard_app.profiling import PROFILING_ENABLED, arm_from_query_params, captures, profile_scope, remaining_reruns
 from dashboard_app.styles import apply_light_theme_css
+from dashboard_app.views.admin import render_memory_panel, render_metrics_panel, render_profile_panel
+from dashboard_app.views.comparison import model_comparison_view
+from dashboard_app.views.monitoring import monitoring_view
 from dashboard_app.views.public_health import public_health_officer_view
 from dashboard_app.views.public_user import public_user_view
 from dashboard_app.views.scientist import scientist_view
@@ -29,6 +45,17 @@ def main() -> None:
         initial_sidebar_state="expanded",
     )
 
+    labels = {"session": current_session_id()}
+    arm_from_query_params()
+    with profile_scope("app.main"):
+        with rerun_scope(labels) as spans:
+            _render_dashboard(labels, spans)
+    # Rendered after the profile is written, so this rerun's capture is already listed.
+    if PROFILING_ENABLED and (remaining_reruns() or captures()):
+        render_profile_panel()
+
+
+def _render_dashboard(labels: dict, spans) -> None:
     apply_light_theme_css()
 
     st.markdown(
@@ -37,17 +64,15 @@ def main() -> None:
     )
 
     with st.spinner("Loading model and data..."):
-        xgb_model, scaler, pipeline, X, y, _df = load_model_and_data()
-        explainer = get_shap_explainer(xgb_model)
-
-        # SHAP sampling for performance, deterministic
-        sample_size = min(1000, len(X))
-        rng = np.random.default_rng(42)
-        sample_indices = rng.choice(len(X), sample_size, replace=False)
-        X_shap = X.iloc[sample_indices].copy()
-        X_scaled_shap = scaler.transform(X_shap)
+        with span("load_model_and_data"):
+            xgb_model, scaler, pipeline, X, y, store = load_model_and_data()
+            explainer = get_shap_explainer(xgb_model, SHAP_EXPLAINER_MODE, store)
 
-        X_scaled = scaler.transform(X)
+        # Scaled matrix and the SHAP sample are shared, read-only views built once per
+        # process. The sample is sized adaptively (see sampling.adaptive_shap_sample).
+        X_scaled = store.X_scaled
+        with span("shap_sample"):
+            shap_sample, X_shap, X_scaled_shap = get_shap_sample(explainer, store)
 
     # Sidebar - Role selection
     st.sidebar.title("👤 Select Your Role")
@@ -58,17 +83,37 @@ def main() -> None:
         key="role_select",
     )
     st.sidebar.markdown(f"**{ROLES[selected_role]['description']}**")
+    labels["role"] = selected_role
 
     # Sidebar - Dataset info
     st.sidebar.markdown("---")
     st.sidebar.subheader("📊 Dataset Info")
-    st.sidebar.markdown(f"Total Instances: {len(X)}")
+    # Counts come from the store's one-pass statistics, not a scan of `y` per rerun.
+    stats = store.stats
+    st.sidebar.markdown(f"Total Instances: {stats.n_rows}")
     st.sidebar.markdown(f"Features: {len(FEATURE_COLS)}")
+    if store.storage == "memmap":
+        st.sidebar.markdown("Storage: out-of-core (memory-mapped)")
     st.sidebar.markdown("**Class Distribution:**")
-    for cls in sorted(np.unique(y)):
-        count = int((y == cls).sum())
-        pct = (count / len(y)) * 100
-        st.sidebar.markdown(f"- Class {cls}: {count} ({pct:.1f}%)")
+    pcts = stats.class_counts / stats.n_rows * 100
+    st.sidebar.markdown(
+        "\n".join(
+            f"- Class {cls}: {count} ({pct:.1f}%)"
+            for cls, (count, pct) in enumerate(zip(stats.class_counts, pcts))
+            if count
+        )
+    )
+
+    status = "converged" if shap_sample.converged else "size cap reached"
+    strata = "stratified by class, " if shap_sample.stratified else ""
+    st.sidebar.markdown(
+        f"SHAP sample: {shap_sample.size} rows ({strata}{status}, "
+        f"max CI ±{shap_sample.rel_error * 100:.1f}% of top importance)"
+    )
+    if explainer.feature_perturbation == "interventional":
+        st.sidebar.markdown(f"SHAP mode: interventional ({SHAP_BACKGROUND_METHOD}, {len(explainer.data)} background rows)")
+    else:
+        st.sidebar.markdown("SHAP mode: tree path-dependent")
 
     with st.sidebar.expander("📖 Feature Descriptions"):
         for feat in FEATURE_COLS:
@@ -80,14 +125,65 @@ def main() -> None:
 
     st.markdown("---")
 
-    if selected_role == "Scientist":
-        scientist_view(explainer, X_shap, X_scaled_shap, FEATURE_COLS, y)
-    elif selected_role == "Regulator":
-        regulator_view(explainer, X_shap, X_scaled_shap, X, y, FEATURE_COLS, pipeline)
-    elif selected_role == "Public Health Officer":
-        public_health_officer_view(explainer, X, X_scaled, FEATURE_COLS, y)
-    elif selected_role == "Public User":
-        public_user_view(explainer, X, X_scaled, FEATURE_COLS, xgb_model)
+    with span(f"view.{selected_role}"):
+        if selected_role == "Scientist":
+            scientist_view(
+                explainer,
+                X_shap,
+                X_scaled_shap,
+                shap_sample.weights,
+                FEATURE_COLS,
+                y,
+                X_scaled,
+                xgb_model,
+                store,
+                scaler,
+            )
+        elif selected_role == "Regulator":
+            whatif_engine = get_whatif_engine(xgb_model, explainer, scaler, store, store.fingerprint)
+            scenario_engine = get_scenario_engine(
+                xgb_model,
+                explainer,
+                scaler,
+                store,
+                shap_sample.indices,
+                shap_sample.weights,
+                get_model_version(xgb_model),
+                store.fingerprint,
+            )
+            regulator_view(
+                explainer,
+                X_shap,
+                X_scaled_shap,
+                shap_sample.weights,
+                X,
+                y,
+                FEATURE_COLS,
+                pipeline,
+                X_scaled,
+                whatif_engine,
+                xgb_model,
+                store,
+                scaler,
+                scenario_engine,
+            )
+        elif selected_role == "Public Health Officer":
+            leaf_index = get_leaf_index(xgb_model, explainer, store, get_model_version(xgb_model), store.fingerprint)
+            public_health_officer_view(explainer, X, X_scaled, FEATURE_COLS, y, xgb_model, store, leaf_index)
+        elif selected_role == "Public User":
+            neighbor_index = get_neighbor_index(xgb_model, explainer, store, scaler, store.fingerprint)
+            whatif_engine = get_whatif_engine(xgb_model, explainer, scaler, store, store.fingerprint)
+            leaf_index = get_leaf_index(xgb_model, explainer, store, get_model_version(xgb_model), store.fingerprint)
+            public_user_view(
+                explainer, X, X_scaled, FEATURE_COLS, xgb_model, neighbor_index, whatif_engine, leaf_index, scaler
+            )
+        elif selected_role == "Data Monitor":
+            drift_reference = get_drift_reference(explainer, store, X_scaled_shap, shap_sample.weights)
+            monitoring_view(explainer, drift_reference, scaler, FEATURE_COLS)
+        elif selected_role == "Model Comparison":
+            model_comparison_view(
+                xgb_model, explainer, scaler, store, shap_sample.indices, shap_sample.weights, FEATURE_COLS
+            )
 
     st.markdown("---")
     st.markdown(
@@ -95,3 +191,7 @@ def main() -> None:
         unsafe_allow_html=True,
     )
 
+    if spans is not None:
+        render_metrics_panel(spans)
+        render_memory_panel(store, {"SHAP sample": X_scaled_shap.base})
+
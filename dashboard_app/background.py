@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import shap
+from sklearn.cluster import KMeans
+from sklearn.metrics import pairwise_distances_argmin
+
+from dashboard_app.metrics import span
+from dashboard_app.sampling import allocate_quotas, stratified_row_order
+
+
+EXPLAINER_MODES = ("tree_path_dependent", "interventional")
+BACKGROUND_METHODS = ("stratified", "kmeans")
+
+
+@dataclass(frozen=True)
+class Background:
+    """
+    Compact background for interventional SHAP.
+
+    `prototypes` are the summary points and `weights` their population shares (sum to 1).
+    TreeExplainer averages over background rows equally, so `data` repeats each prototype
+    in proportion to its weight within `len(data)` rows (prototypes that round to zero
+    copies are dropped).
+    """
+
+    method: str
+    prototypes: np.ndarray
+    weights: np.ndarray
+    data: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+def _apportion(weights: np.ndarray, total: int) -> np.ndarray:
+    """
+    Largest-remainder integer counts summing to `total`.
+    """
+    exact = np.asarray(weights, dtype=np.float64) * total / np.sum(weights)
+    counts = np.floor(exact).astype(np.int64)
+    counts[np.argsort(counts - exact, kind="stable")[: total - counts.sum()]] += 1
+    return counts
+
+
+def summarize_background(
+    X_scaled: np.ndarray,
+    size: int = 50,
+    method: str = "stratified",
+    y: np.ndarray | None = None,
+    seed: int = 42,
+    fit_rows: int = 20_000,
+) -> Background:
+    """
+    Summarize `X_scaled` into at most `size` background rows.
+
+    - "stratified": real rows drawn in proportion to class sizes (uniform if `y` is None),
+      equally weighted.
+    - "kmeans": the record nearest each of `size` k-means centroids (fit on up to
+      `fit_rows` rows), weighted by cluster share. Real records rather than centroids, since
+      centroids fall between the trees' split points and bias the attributions.
+    """
+    if method not in BACKGROUND_METHODS:
+        raise ValueError(f"Unknown background method: {method}")
+    size = min(size, len(X_scaled))
+
+    with span("shap.background"):
+        if method == "kmeans":
+            rng = np.random.default_rng(seed)
+            fit = X_scaled if len(X_scaled) <= fit_rows else X_scaled[rng.choice(len(X_scaled), fit_rows, replace=False)]
+            km = KMeans(n_clusters=size, n_init=1, random_state=seed).fit(fit)
+            prototypes = np.asarray(fit[pairwise_distances_argmin(km.cluster_centers_, fit)], dtype=np.float32)
+            weights = np.bincount(km.labels_, minlength=size) / len(fit)
+        else:
+            if y is None:
+                rows = np.random.default_rng(seed).choice(len(X_scaled), size, replace=False)
+            else:
+                population = np.bincount(np.asarray(y).astype(np.int64))
+                rows = stratified_row_order(y, allocate_quotas(population, size), seed)[:size]
+            prototypes = np.asarray(X_scaled[np.sort(rows)], dtype=np.float32)
+            weights = np.full(size, 1.0 / size)
+
+    data = np.repeat(prototypes, _apportion(weights, size), axis=0)
+    return Background(method=method, prototypes=prototypes, weights=weights, data=data)
+
+
+def make_tree_explainer(
+    model,
+    mode: str = "tree_path_dependent",
+    background: Background | None = None,
+) -> "shap.TreeExplainer":
+    """
+    TreeExplainer in the given mode; interventional mode needs a `background`.
+
+    Outputs stay in raw (margin) units in both modes, so `shap_utils` handles them the same way.
+    """
+    if mode == "tree_path_dependent":
+        return shap.TreeExplainer(model)
+    if mode != "interventional":
+        raise ValueError(f"Unknown explainer mode: {mode}")
+    if background is None:
+        raise ValueError("Interventional SHAP needs a background")
+    return explainer_from_data(model, background.data)
+
+
+def explainer_from_data(model, background_data: np.ndarray | None) -> "shap.TreeExplainer":
+    """
+    Interventional TreeExplainer over `background_data` rows (path-dependent if None).
+    """
+    if background_data is None:
+        return shap.TreeExplainer(model)
+    # The default Independent masker subsamples to 100 rows; keep the whole summary.
+    masker = shap.maskers.Independent(background_data, max_samples=len(background_data))
+    return shap.TreeExplainer(model, data=masker, feature_perturbation="interventional")
+
+
+def explainer_like(model, reference: "shap.TreeExplainer") -> "shap.TreeExplainer":
+    """
+    TreeExplainer for `model` with the same mode and background as `reference`.
+    """
+    return explainer_from_data(model, background_data_of(reference))
+
+
+def background_data_of(explainer: "shap.TreeExplainer") -> np.ndarray | None:
+    """
+    Background rows of an interventional explainer, or None for a path-dependent one.
+    """
+    if explainer.feature_perturbation != "interventional":
+        return None
+    return np.asarray(explainer.data)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import shap
+
+from dashboard_app.inference import predict_classes
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import _global_shap_to_class_list
+
+
+@dataclass(frozen=True)
+class ModelComparison:
+    """
+    Baseline (A) vs candidate (B) model over the same shared scaled matrix.
+
+    `pred_a`/`pred_b` cover every row; SHAP-based fields cover `shap_rows` only.
+    `explanation_change[i]` is the L1 distance between the two models' SHAP vectors for
+    row `shap_rows[i]`, averaged over classes.
+    """
+
+    pred_a: np.ndarray
+    pred_b: np.ndarray
+    shap_rows: np.ndarray
+    mean_abs_a: np.ndarray  # (n_classes, n_features)
+    mean_abs_b: np.ndarray
+    explanation_change: np.ndarray
+    top_changed_feature: np.ndarray  # feature index with the largest |delta SHAP| per row
+
+    @property
+    def agreement(self) -> float:
+        return float((self.pred_a == self.pred_b).mean())
+
+    def confusion(self) -> pd.DataFrame:
+        """
+        Row: baseline class, column: candidate class, value: record count.
+        """
+        classes = np.union1d(self.pred_a, self.pred_b)
+        counts = pd.crosstab(pd.Series(self.pred_a, name="Baseline"), pd.Series(self.pred_b, name="Candidate"))
+        counts = counts.reindex(index=classes, columns=classes, fill_value=0)
+        counts.index = [f"Class {c}" for c in counts.index]
+        counts.columns = [f"Class {c}" for c in counts.columns]
+        return counts
+
+    def rank_shift_table(self, feature_cols: list[str], class_idx: int | None = None) -> pd.DataFrame:
+        """
+        Global importance rank of each feature under both models (total across classes by default).
+        """
+        a = self.mean_abs_a.sum(axis=0) if class_idx is None else self.mean_abs_a[class_idx]
+        b = self.mean_abs_b.sum(axis=0) if class_idx is None else self.mean_abs_b[class_idx]
+        rank_a = np.argsort(np.argsort(-a, kind="stable"), kind="stable") + 1
+        rank_b = np.argsort(np.argsort(-b, kind="stable"), kind="stable") + 1
+        return pd.DataFrame(
+            {
+                "Feature": feature_cols,
+                "Rank (baseline)": rank_a,
+                "Rank (candidate)": rank_b,
+                "Rank shift": rank_a - rank_b,
+                "mean|SHAP| baseline": a,
+                "mean|SHAP| candidate": b,
+            }
+        ).sort_values("Rank (candidate)")
+
+    def top_changed_rows(self, feature_cols: list[str], k: int = 20) -> pd.DataFrame:
+        """
+        Rows whose explanations changed most between versions.
+        """
+        order = np.argsort(-self.explanation_change, kind="stable")[:k]
+        rows = self.shap_rows[order]
+        return pd.DataFrame(
+            {
+                "Row": rows,
+                "Baseline class": self.pred_a[rows],
+                "Candidate class": self.pred_b[rows],
+                "Explanation change (L1)": self.explanation_change[order],
+                "Most changed feature": [feature_cols[j] for j in self.top_changed_feature[order]],
+            }
+        )
+
+
+def compare_models(
+    model_a,
+    model_b,
+    explainer_a: "shap.TreeExplainer",
+    explainer_b: "shap.TreeExplainer",
+    X_scaled: np.ndarray,
+    feature_cols: list[str],
+    shap_rows: np.ndarray,
+    shap_weights: np.ndarray | None = None,
+    chunk_rows: int = 2048,
+) -> ModelComparison:
+    """
+    Batched predictions for every row and SHAP for `shap_rows`, from both models.
+
+    SHAP rows are gathered chunk by chunk, so only one chunk (and the per-row summaries)
+    is held beyond the shared matrix. `shap_weights` (aligned with `shap_rows`) weight the
+    global mean(|SHAP|), e.g. for a class-stratified sample.
+    """
+    with span("compare.predict"):
+        pred_a = predict_classes(model_a.get_booster(), X_scaled)
+        pred_b = predict_classes(model_b.get_booster(), X_scaled)
+
+    shap_rows = np.asarray(shap_rows)
+    weights = np.ones(len(shap_rows)) if shap_weights is None else np.asarray(shap_weights, dtype=np.float64)
+    sum_abs_a = sum_abs_b = None
+    change = np.empty(len(shap_rows), dtype=np.float64)
+    top_feature = np.empty(len(shap_rows), dtype=np.int64)
+    for start in range(0, len(shap_rows), chunk_rows):
+        stop = min(start + chunk_rows, len(shap_rows))
+        chunk = X_scaled[shap_rows[start:stop]]
+        with span("explainer.shap_values"):
+            a = np.stack(_global_shap_to_class_list(explainer_a.shap_values(chunk), feature_cols), axis=0)
+            b = np.stack(_global_shap_to_class_list(explainer_b.shap_values(chunk), feature_cols), axis=0)
+
+        w = weights[start:stop]
+        batch_a, batch_b = np.einsum("crf,r->cf", np.abs(a), w), np.einsum("crf,r->cf", np.abs(b), w)
+        sum_abs_a = batch_a if sum_abs_a is None else sum_abs_a + batch_a
+        sum_abs_b = batch_b if sum_abs_b is None else sum_abs_b + batch_b
+
+        delta = np.abs(a - b)  # (n_classes, rows, n_features)
+        change[start:stop] = delta.sum(axis=2).mean(axis=0)
+        top_feature[start:stop] = delta.mean(axis=0).argmax(axis=1)
+
+    n = weights.sum()
+    return ModelComparison(
+        pred_a=pred_a,
+        pred_b=pred_b,
+        shap_rows=shap_rows,
+        mean_abs_a=sum_abs_a / n,
+        mean_abs_b=sum_abs_b / n,
+        explanation_change=change,
+        top_changed_feature=top_feature,
+    )
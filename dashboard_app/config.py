@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from typing import Dict
 
 
@@ -21,6 +22,14 @@ ROLES: Dict[str, Dict[str, str]] = {
         "icon": "👤",
         "description": "Personal health risk awareness",
     },
+    "Data Monitor": {
+        "icon": "📡",
+        "description": "Drift of incoming data and explanations against the training distribution",
+    },
+    "Model Comparison": {
+        "icon": "🔀",
+        "description": "Compare a retrained model version against the deployed one",
+    },
 }
 
 
@@ -124,3 +133,105 @@ FEATURE_HIGH_EXPLANATION = {
         "advice": "stay alert to health advisories and limit exposure to outdoor risk factors",
     },
 }
+
+
+# Adaptive SHAP sample (see sampling.adaptive_shap_sample): grow in batches until every
+# class's mean(|SHAP|) CI is within the tolerance and its top-feature ranking is stable.
+SHAP_SAMPLE_TOLERANCE = 0.05
+SHAP_SAMPLE_BATCH_SIZE = 250
+SHAP_SAMPLE_MIN_SIZE = 250
+SHAP_SAMPLE_MAX_SIZE = 5000
+# Draw the SHAP sample stratified by class, with at least this many rows per class, so
+# rare classes get enough rows for their beeswarms; global estimates are reweighted.
+SHAP_SAMPLE_STRATIFIED = True
+SHAP_SAMPLE_MIN_PER_CLASS = 100
+
+
+# SHAP explainer mode: "tree_path_dependent" (conditional on the trees' training cover, no
+# background data) or "interventional" (marginal over a background set, which TreeExplainer
+# scans once per explained row, so it is summarized into SHAP_BACKGROUND_SIZE rows of
+# "stratified" class-proportional records or "kmeans" cluster medoids; see background.py
+# and benchmarks/shap_background.py for the speed/fidelity trade-off).
+SHAP_EXPLAINER_MODE = os.environ.get("DASHBOARD_SHAP_MODE", "tree_path_dependent").strip().lower()
+SHAP_BACKGROUND_METHOD = os.environ.get("DASHBOARD_SHAP_BACKGROUND", "stratified").strip().lower()
+SHAP_BACKGROUND_SIZE = 50
+
+
+# Features a member of the public can read off a weather/air-quality report; used for
+# the "similar conditions" nearest-neighbour lookup.
+CONDITION_FEATURES = [
+    "AQI",
+    "PM10",
+    "PM2_5",
+    "NO2",
+    "SO2",
+    "O3",
+    "Temperature",
+    "Humidity",
+    "WindSpeed",
+]
+
+
+# Dataset storage: "memory" loads the CSV into RAM; "memmap" streams it once in chunks into
+# memory-mapped float32 files under DATA_CACHE_DIR (reused while the CSV and scaler are
+# unchanged); "auto" uses memmap for CSVs larger than DATA_MEMMAP_MIN_BYTES.
+DATA_MODE = os.environ.get("DASHBOARD_DATA_MODE", "auto").strip().lower()
+DATA_MEMMAP_MIN_BYTES = 512 * 1024 * 1024
+DATA_CACHE_DIR = os.environ.get("DASHBOARD_DATA_CACHE_DIR", ".dashboard_cache")
+DATA_CHUNK_ROWS = 200_000
+# DiCE keeps its training frame in memory; larger datasets give it a uniform sample.
+DICE_MAX_ROWS = 100_000
+
+
+# Model with the scaler folded into its split thresholds (`python -m dashboard_app.folding`).
+# When this file exists and was folded from the current xgb_model.pkl + scaler.pkl, it is
+# used instead and the dashboard keeps no scaled copy of the data; "" disables it.
+FOLDED_MODEL_PATH = os.environ.get("DASHBOARD_FOLDED_MODEL", "xgb_model_folded.pkl")
+
+
+# Role views and their independent panels (PDP, thresholds, what-if, uploads) run as
+# `st.fragment`s, so a widget inside one reruns only that panel. DASHBOARD_FRAGMENTS=0
+# restores whole-app reruns (e.g. to compare rerun times).
+FRAGMENTS_ENABLED = os.environ.get("DASHBOARD_FRAGMENTS", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+# Operator profiling: when DASHBOARD_PROFILE_TOKEN is set, opening the app with
+# `?profile=<token>&reruns=N` captures cProfile profiles of that session's next N reruns
+# (default PROFILE_RERUNS, at most PROFILE_MAX_RERUNS) into PROFILE_DIR and lists their
+# top PROFILE_TOP_N functions in a sidebar panel (the session keeps its last PROFILE_KEEP
+# summaries). Unset, profiling costs nothing.
+PROFILE_TOKEN = os.environ.get("DASHBOARD_PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("DASHBOARD_PROFILE_DIR", "profiles")
+PROFILE_RERUNS = 5
+PROFILE_MAX_RERUNS = 50
+PROFILE_TOP_N = 30
+PROFILE_KEEP = 10
+
+
+# Regulator policy scenarios: up to SCENARIO_MAX scenarios are scored together on every
+# record; SHAP shifts are estimated on SCENARIO_SHAP_ROWS rows of the SHAP sample (about
+# 0.7 ms per row and scenario on one core, so the default keeps 4 scenarios under a second).
+SCENARIO_MAX = 4
+SCENARIO_SHAP_ROWS = 200
+
+
+# Background jobs (DiCE counterfactuals, Public Health Officer aggregation): worker threads
+# shared by all sessions, per-job time limit, and how many finished results are kept.
+JOB_WORKERS = 2
+JOB_TIMEOUT_S = 180.0
+JOB_RESULT_CACHE_SIZE = 64
+
+
+# Scientist view uploads: CSVs are read UPLOAD_CHUNK_ROWS rows at a time; SHAP runs on at
+# most UPLOAD_SHAP_ROWS_PER_CHUNK rows of each chunk (weighted back to the chunk) and
+# UPLOAD_SAMPLE_ROWS explained rows are kept for the beeswarm. Ingest runs as a background
+# job with its own time limit. Streamlit's `server.maxUploadSize` (MB) caps the file size.
+UPLOAD_CHUNK_ROWS = 50_000
+UPLOAD_SHAP_ROWS_PER_CHUNK = 2_000
+UPLOAD_SAMPLE_ROWS = 2_000
+UPLOAD_JOB_TIMEOUT_S = 900.0
+
+
+# Default path of the retrained model compared against xgb_model.pkl in the
+# "Model Comparison" view (same format: XGBClassifier or scaler+model Pipeline).
+CANDIDATE_MODEL_PATH = "xgb_model_candidate.pkl"
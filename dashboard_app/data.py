@@ -1,52 +1,395 @@
 from __future__ import annotations
 
+import os
+import threading
+import weakref
+
 import joblib
+import numpy as np
 import pandas as pd
-import shap
 import streamlit as st
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from dashboard_app.config import (
+    CONDITION_FEATURES,
+    DATA_CACHE_DIR,
+    DATA_CHUNK_ROWS,
+    DATA_MEMMAP_MIN_BYTES,
+    DATA_MODE,
+    DICE_MAX_ROWS,
+    FEATURE_COLS,
+    FOLDED_MODEL_PATH,
+    JOB_RESULT_CACHE_SIZE,
+    JOB_TIMEOUT_S,
+    JOB_WORKERS,
+    SCENARIO_SHAP_ROWS,
+    SHAP_BACKGROUND_METHOD,
+    SHAP_BACKGROUND_SIZE,
+    SHAP_SAMPLE_BATCH_SIZE,
+    SHAP_SAMPLE_MAX_SIZE,
+    SHAP_SAMPLE_MIN_PER_CLASS,
+    SHAP_SAMPLE_MIN_SIZE,
+    SHAP_SAMPLE_STRATIFIED,
+    SHAP_SAMPLE_TOLERANCE,
+)
+from dashboard_app.background import explainer_like, make_tree_explainer, summarize_background
+from dashboard_app.compare import compare_models
+from dashboard_app.drift import build_drift_reference
+from dashboard_app.feature_store import (
+    QUANTILE_LEVELS,
+    build_feature_store,
+    build_feature_store_memmap,
+    uniform_sample_indices,
+)
+from dashboard_app.folding import fold_model, folding_source, identity_scaler, is_folded, source_scaler
+from dashboard_app.jobs import JobScheduler
+from dashboard_app.neighbors import LeafIndex, SimilarConditionsIndex
+from dashboard_app.pdp import model_version, partial_dependence
+from dashboard_app.sampling import adaptive_shap_sample
+from dashboard_app.scenarios import ScenarioEngine
+from dashboard_app.thresholds import class_transitions
+from dashboard_app.whatif import WhatIfEngine
+
+
+def _unpack_model(model_obj, scaler):
+    """
+    Return (tree model, scaler) from a saved model object that may be a Pipeline.
+    """
+    # If the saved object is a (imblearn/sklearn) Pipeline, TreeExplainer can't use it directly.
+    # SHAP TreeExplainer supports tree models, not preprocessing/sampling pipelines.
+    if hasattr(model_obj, "named_steps"):
+        steps = getattr(model_obj, "named_steps", {})
+        # Try common names first
+        xgb_model = steps.get("classifier") or steps.get("xgb")
+        if xgb_model is None and len(steps) > 0:
+            # Fall back to last step
+            xgb_model = list(steps.values())[-1]
 
-from dashboard_app.config import FEATURE_COLS
+        # Prefer scaler from the pipeline if present (keeps things consistent)
+        scaler_in_pipe = steps.get("scaler")
+        if scaler_in_pipe is not None:
+            scaler = scaler_in_pipe
+        return xgb_model, scaler
+    return model_obj, scaler
+
+
+def _as_float64(X):
+    return X.astype(np.float64)
+
+
+def _load_folded(xgb_model, scaler):
+    """
+    The folded model at FOLDED_MODEL_PATH if it was built from (xgb_model, scaler), else None.
+    """
+    if not FOLDED_MODEL_PATH or not os.path.exists(FOLDED_MODEL_PATH):
+        return None
+    folded = joblib.load(FOLDED_MODEL_PATH)
+    if folded.get_booster().attr("folded_from") != folding_source(xgb_model.get_booster(), scaler):
+        st.warning(f"{FOLDED_MODEL_PATH} is out of date; using xgb_model.pkl with scaling. Re-run the export.")
+        return None
+    return folded
 
 
 @st.cache_resource
 def load_model_and_data():
     """
     Load model/scaler and dataset.
+
+    Returns (xgb_model, scaler, pipeline, X, y, store). `X`/`y` are read-only views into
+    the shared float32 `FeatureStore`; the float64 CSV frame is dropped after loading. In
+    out-of-core mode (see DATA_MODE) the CSV is never loaded whole: it is streamed into
+    memory-mapped files instead.
+
+    With an up-to-date folded model (see FOLDED_MODEL_PATH) that model is returned with an
+    identity scaler and as its own "pipeline": nothing is scaled and `store.X_scaled` is
+    the raw matrix.
     """
     try:
-        model_obj = joblib.load("xgb_model.pkl")
-        scaler = joblib.load("scaler.pkl")
-
-        # If the saved object is a (imblearn/sklearn) Pipeline, TreeExplainer can't use it directly.
-        # SHAP TreeExplainer supports tree models, not preprocessing/sampling pipelines.
-        if hasattr(model_obj, "named_steps"):
-            steps = getattr(model_obj, "named_steps", {})
-            # Try common names first
-            xgb_model = steps.get("classifier") or steps.get("xgb")
-            if xgb_model is None and len(steps) > 0:
-                # Fall back to last step
-                xgb_model = list(steps.values())[-1]
-
-            # Prefer scaler from the pipeline if present (keeps things consistent)
-            scaler_in_pipe = steps.get("scaler")
-            if scaler_in_pipe is not None:
-                scaler = scaler_in_pipe
-        else:
-            xgb_model = model_obj
+        xgb_model, scaler = _unpack_model(joblib.load("xgb_model.pkl"), joblib.load("scaler.pkl"))
+        folded = _load_folded(xgb_model, scaler)
+        if folded is not None:
+            xgb_model, scaler = folded, identity_scaler(len(FEATURE_COLS))
+        store_scaler = None if folded is not None else scaler
 
-        df = pd.read_csv("air_quality_health_impact_data.csv")
-        X = df[FEATURE_COLS]
-        y = df["HealthImpactClass"].astype(int)
+        csv_path = "air_quality_health_impact_data.csv"
+        memmap = DATA_MODE == "memmap" or (
+            DATA_MODE == "auto" and os.path.getsize(csv_path) > DATA_MEMMAP_MIN_BYTES
+        )
+        if memmap:
+            store = build_feature_store_memmap(
+                csv_path, store_scaler, FEATURE_COLS, "HealthImpactClass", DATA_CACHE_DIR, DATA_CHUNK_ROWS
+            )
+        else:
+            df = pd.read_csv(csv_path, usecols=FEATURE_COLS + ["HealthImpactClass"])
+            store = build_feature_store(df[FEATURE_COLS], df["HealthImpactClass"], store_scaler, FEATURE_COLS)
+            del df
 
-        pipeline = Pipeline([("scaler", scaler), ("classifier", xgb_model)])
-        return xgb_model, scaler, pipeline, X, y, df
+        # `X` is float32; the cast makes the scaler work in float64 as `store.X_scaled` was built.
+        pipeline = (
+            xgb_model
+            if folded is not None
+            else Pipeline(
+                [("float64", FunctionTransformer(_as_float64)), ("scaler", scaler), ("classifier", xgb_model)]
+            )
+        )
+        return xgb_model, scaler, pipeline, store.X, store.y, store
     except Exception as e:
         st.error(f"Error loading model/data: {e}")
         st.stop()
 
 
 @st.cache_resource
-def get_shap_explainer(_model):
-    return shap.TreeExplainer(_model)
+def get_shap_background(_store, method: str, size: int, fingerprint: str):
+    """
+    Summarized background for interventional SHAP, built once per (method, size, data).
+    """
+    return summarize_background(_store.X_scaled, size, method, y=_store.y.to_numpy())
+
+
+@st.cache_resource
+def get_shap_explainer(
+    _model,
+    mode: str = "tree_path_dependent",
+    _store=None,
+    background_method: str = SHAP_BACKGROUND_METHOD,
+    background_size: int = SHAP_BACKGROUND_SIZE,
+):
+    """
+    TreeExplainer in `mode`; interventional mode summarizes `_store` into its background.
+    """
+    background = None
+    if mode == "interventional":
+        background = get_shap_background(_store, background_method, background_size, _store.fingerprint)
+    return make_tree_explainer(_model, mode, background)
+
+
+@st.cache_resource
+def get_dice_explainer(_pipeline, _X, _y):
+    """
+    Build the DiCE explainer once per process instead of per button press.
+
+    Returns (dice_exp, lock); `generate_counterfactuals` keeps per-call state on the
+    explainer, so callers hold the lock while generating.
+    """
+    from dice_ml import Data, Dice, Model
 
+    if len(_X) > DICE_MAX_ROWS:
+        rows = np.sort(uniform_sample_indices(len(_X), DICE_MAX_ROWS))
+        _X, _y = _X.iloc[rows], _y.iloc[rows]
+
+    # DiCE requires a pandas DataFrame here.
+    # Reason: passing numpy arrays triggers `ValueError: should provide a pandas dataframe`.
+    dice_df = pd.concat([_X.astype(np.float64), _y.astype(int).rename("HealthImpactClass")], axis=1)
+    dice_data = Data(
+        dataframe=dice_df,
+        continuous_features=list(_X.columns),
+        outcome_name="HealthImpactClass",
+    )
+    dice_model = Model(model=_pipeline, backend="sklearn", model_type="classifier")
+    return Dice(dice_data, dice_model, method="genetic"), threading.Lock()
+
+
+@st.cache_resource
+def get_job_scheduler():
+    """
+    Process-wide job scheduler, so identical requests from different sessions run once.
+    """
+    return JobScheduler(max_workers=JOB_WORKERS, cache_size=JOB_RESULT_CACHE_SIZE, default_timeout=JOB_TIMEOUT_S)
+
+
+@st.cache_resource
+def get_shap_sample(
+    _explainer,
+    _store,
+    tolerance: float = SHAP_SAMPLE_TOLERANCE,
+    batch_size: int = SHAP_SAMPLE_BATCH_SIZE,
+    min_size: int = SHAP_SAMPLE_MIN_SIZE,
+    max_size: int = SHAP_SAMPLE_MAX_SIZE,
+    stratified: bool = SHAP_SAMPLE_STRATIFIED,
+    min_per_class: int = SHAP_SAMPLE_MIN_PER_CLASS,
+):
+    """
+    Adaptive SHAP sample, sized once per process.
+
+    Returns (result, X_shap, X_scaled_shap) where `result` is the AdaptiveSampleResult
+    (chosen size, achieved error, per-row weights) and the two matrices are the gathered
+    sample rows. With `stratified`, every class gets at least `min_per_class` rows and
+    `result.weights` reweight global estimates back to population proportions.
+    """
+    result = adaptive_shap_sample(
+        _explainer,
+        _store.X_scaled,
+        _store.feature_cols,
+        tolerance=tolerance,
+        batch_size=batch_size,
+        min_size=min_size,
+        max_size=max_size,
+        y=_store.y.to_numpy() if stratified else None,
+        min_per_class=min_per_class,
+    )
+    X_shap, X_scaled_shap = _store.take(result.indices)
+    return result, X_shap, X_scaled_shap
+
+
+@st.cache_resource
+def get_drift_reference(_explainer, _store, _X_scaled_shap, _shap_weights=None):
+    """
+    Reference sketches of the training distribution (features + per-class SHAP), built once.
+    """
+    return build_drift_reference(
+        _explainer, _store.X_scaled, _X_scaled_shap, _store.feature_cols, shap_weights=_shap_weights
+    )
+
+
+@st.cache_resource
+def get_neighbor_index(_model, _explainer, _store, _scaler, fingerprint: str):
+    """
+    KD-tree for "similar conditions" lookup; rebuilt only when `fingerprint` (data + scaler) changes.
+
+    Distances are measured in standardized units, so a folded model's index uses the
+    scaler it absorbed. Query defaults are the medians from the store's one-pass statistics.
+    """
+    return SimilarConditionsIndex(
+        _model,
+        _explainer,
+        _store.X,
+        _store.X_scaled,
+        source_scaler(_model) if is_folded(_model) else _scaler,
+        _store.feature_cols,
+        CONDITION_FEATURES,
+        _store.stats.feature_quantiles[QUANTILE_LEVELS.index(0.5)],
+    )
+
+
+@st.cache_resource
+def get_leaf_index(_model, _explainer, _store, model_version: str, fingerprint: str):
+    """
+    Leaf-sharing index for model-aware similar-case lookup; rebuilt per model version and data.
+    """
+    return LeafIndex(_model, _explainer, _store.X_scaled, _store.feature_cols)
+
+
+@st.cache_resource
+def get_whatif_engine(_model, _explainer, _scaler, _store, fingerprint: str):
+    """
+    Shared what-if engine (and its memo cache); rebuilt when `fingerprint` changes.
+    """
+    return WhatIfEngine.from_data(_model, _explainer, _scaler, _store.X, _store.feature_cols)
+
+
+@st.cache_resource
+def get_scenario_engine(_model, _explainer, _scaler, _store, _shap_rows, _shap_weights, model_version: str, fingerprint: str):
+    """
+    Shared policy-scenario engine (and its result cache), rebuilt per model version and data.
+
+    SHAP shifts use SCENARIO_SHAP_ROWS rows of the SHAP sample, keeping their weights.
+    """
+    pick = uniform_sample_indices(len(_shap_rows), SCENARIO_SHAP_ROWS)
+    weights = None if _shap_weights is None else np.asarray(_shap_weights)[pick]
+    return ScenarioEngine(_model, _explainer, _scaler, _store, np.asarray(_shap_rows)[pick], weights)
+
+
+_MODEL_VERSIONS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_model_version(model) -> str:
+    """
+    Content hash of a model's booster, computed once per loaded model object.
+    """
+    version = _MODEL_VERSIONS.get(model)
+    if version is None:
+        version = _MODEL_VERSIONS[model] = model_version(model.get_booster())
+    return version
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_partial_dependence(
+    _model,
+    _store,
+    _scaler,
+    model_version: str,
+    fingerprint: str,
+    feature: str,
+    n_points: int = 20,
+    n_rows: int = 1000,
+):
+    """
+    PDP/ICE curves for one feature, cached per (model version, data, feature, grid, rows).
+    """
+    rows = np.sort(uniform_sample_indices(_store.n_rows, n_rows))
+    return partial_dependence(
+        _model.get_booster(),
+        _store.buffer[0],
+        _store.X_scaled,
+        _store.feature_cols,
+        feature,
+        _scaler,
+        n_points=n_points,
+        rows=rows,
+    )
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_class_transitions(
+    _model,
+    _store,
+    _scaler,
+    model_version: str,
+    fingerprint: str,
+    feature: str,
+    n_rows: int = 2000,
+):
+    """
+    Predicted class per record on each constant piece of `feature`, cached like the PDP curves.
+    """
+    rows = np.sort(uniform_sample_indices(_store.n_rows, n_rows))
+    return class_transitions(
+        _model.get_booster(), _store.X_scaled, _store.feature_cols, feature, _scaler, rows=rows
+    )
+
+
+@st.cache_resource(max_entries=4)
+def load_candidate_model(path: str, mtime: float, _model, _scaler, _explainer):
+    """
+    Load another model version for comparison; reloaded when the file changes (`mtime`).
+
+    Returns (tree model, scaler, explainer). The scaler is the candidate pipeline's own
+    scaler if it has one, otherwise `_scaler`; the explainer uses the same mode and
+    background as the deployed `_explainer`. When the deployed `_model` is folded, an
+    unfolded candidate is folded with its scaler so both read the same raw rows.
+    """
+    if is_folded(_model):
+        xgb_model, scaler = _unpack_model(joblib.load(path), source_scaler(_model))
+        if not is_folded(xgb_model):
+            xgb_model = fold_model(xgb_model, scaler)
+        scaler = _scaler
+    else:
+        xgb_model, scaler = _unpack_model(joblib.load(path), _scaler)
+    return xgb_model, scaler, explainer_like(xgb_model, _explainer)
+
+
+@st.cache_resource(max_entries=4)
+def get_model_comparison(
+    _model_a,
+    _model_b,
+    _explainer_a,
+    _explainer_b,
+    _store,
+    _shap_rows,
+    _shap_weights,
+    version_a: str,
+    version_b: str,
+    fingerprint: str,
+    all_rows: bool = False,
+):
+    """
+    Baseline vs candidate comparison over the shared scaled matrix, cached per version pair.
+    """
+    if all_rows:
+        rows, weights = np.arange(_store.n_rows), None
+    else:
+        rows, weights = _shap_rows, _shap_weights
+    return compare_models(
+        _model_a, _model_b, _explainer_a, _explainer_b, _store.X_scaled, _store.feature_cols, rows, weights
+    )
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import shap
+
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import _global_shap_to_class_list
+
+
+# Conventional PSI bands: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift.
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+
+
+class StreamingHistogram:
+    """
+    Fixed-memory histogram sketch over fixed bin edges (plus under/overflow bins).
+
+    Edges are chosen once from the reference data, so updating is a vectorized bin
+    count and the sketch never grows with the number of rows seen.
+    """
+
+    __slots__ = ("edges", "counts")
+
+    def __init__(self, edges: np.ndarray) -> None:
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+
+    @classmethod
+    def from_reference(
+        cls, values: np.ndarray, n_bins: int = 20, weights: np.ndarray | None = None
+    ) -> "StreamingHistogram":
+        """
+        Equal-mass bins from the reference quantiles, pre-filled with the reference.
+
+        With `weights` (e.g. a class-stratified sample) the counts are weighted, scaled so
+        they still sum to the number of values.
+        """
+        edges = np.unique(np.quantile(values, np.linspace(0.0, 1.0, n_bins + 1)[1:-1]))
+        hist = cls(edges)
+        if weights is None:
+            hist.update(values)
+        else:
+            weights = np.asarray(weights, dtype=np.float64)
+            bins = np.searchsorted(hist.edges, np.asarray(values).reshape(-1), side="right")
+            hist.counts = np.bincount(bins, weights=weights * len(weights) / weights.sum(), minlength=len(hist.counts))
+        return hist
+
+    def empty_like(self) -> "StreamingHistogram":
+        return StreamingHistogram(self.edges)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values).reshape(-1)
+        self.counts += np.bincount(np.searchsorted(self.edges, values, side="right"), minlength=len(self.counts))
+
+    @property
+    def total(self) -> float:
+        return self.counts.sum().item()
+
+    def proportions(self) -> np.ndarray:
+        total = self.total
+        return self.counts / total if total else np.zeros(len(self.counts))
+
+    def quantile(self, q: float) -> float:
+        """
+        Approximate quantile by interpolating inside the matching bin.
+        """
+        if self.total == 0:
+            return float("nan")
+        cdf = np.cumsum(self.counts) / self.total
+        i = int(np.searchsorted(cdf, q))
+        # Under/overflow bins are open-ended; clamp to the outermost edge.
+        lo = self.edges[max(i - 1, 0)]
+        hi = self.edges[min(i, len(self.edges) - 1)]
+        prev = cdf[i - 1] if i > 0 else 0.0
+        frac = (q - prev) / (cdf[i] - prev) if cdf[i] > prev else 0.0
+        return float(lo + (hi - lo) * frac)
+
+
+def psi(reference: StreamingHistogram, current: StreamingHistogram, eps: float = 1e-4) -> float:
+    """
+    Population Stability Index between two sketches sharing the same edges.
+    """
+    p = np.clip(reference.proportions(), eps, None)
+    q = np.clip(current.proportions(), eps, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(reference: StreamingHistogram, current: StreamingHistogram) -> float:
+    """
+    Kolmogorov-Smirnov statistic evaluated on the shared bin edges.
+    """
+    if reference.total == 0 or current.total == 0:
+        return 0.0
+    return float(np.max(np.abs(np.cumsum(reference.proportions()) - np.cumsum(current.proportions()))))
+
+
+def drift_status(value: float) -> str:
+    if value >= PSI_MAJOR:
+        return "major"
+    if value >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+@dataclass(frozen=True)
+class DriftReference:
+    """
+    Read-only reference sketches (training distribution), shared across sessions.
+
+    Feature sketches are in scaled units, i.e. the space `scaler.pkl` was fit on.
+    `shap[c][f]` is the sketch of class c's SHAP values for feature f.
+    """
+
+    feature_cols: list[str]
+    features: List[StreamingHistogram]
+    shap: List[List[StreamingHistogram]]
+
+
+def build_drift_reference(
+    explainer: "shap.TreeExplainer",
+    X_scaled: np.ndarray,
+    X_scaled_shap: np.ndarray,
+    feature_cols: list[str],
+    n_bins: int = 20,
+    shap_weights: np.ndarray | None = None,
+) -> DriftReference:
+    features = [StreamingHistogram.from_reference(X_scaled[:, j], n_bins) for j in range(len(feature_cols))]
+    with span("explainer.shap_values"):
+        raw = explainer.shap_values(X_scaled_shap)
+    per_class = _global_shap_to_class_list(raw, feature_cols)
+    shap_sketches = [
+        [StreamingHistogram.from_reference(v[:, j], n_bins, shap_weights) for j in range(len(feature_cols))]
+        for v in per_class
+    ]
+    return DriftReference(feature_cols=list(feature_cols), features=features, shap=shap_sketches)
+
+
+@dataclass
+class DriftMonitor:
+    """
+    Streaming drift monitor: accumulates incoming batches into sketches and scores them.
+
+    Memory is fixed: one sketch per feature and per (class, feature) SHAP pair, plus a
+    bounded history of per-batch scores. SHAP is computed on at most
+    `shap_rows_per_batch` rows of each batch to keep the cost flat over large inputs.
+    """
+
+    reference: DriftReference
+    scaler: object
+    explainer: "shap.TreeExplainer"
+    shap_rows_per_batch: int = 200
+    history_size: int = 500
+    seed: int = 42
+    features: List[StreamingHistogram] = field(init=False)
+    shap: List[List[StreamingHistogram]] = field(init=False)
+    history: Deque[Dict[str, float]] = field(init=False)
+    rows_seen: int = field(init=False, default=0)
+    batches_seen: int = field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        self._rng = np.random.default_rng(self.seed)
+        self.reset()
+
+    def reset(self) -> None:
+        self.features = [h.empty_like() for h in self.reference.features]
+        self.shap = [[h.empty_like() for h in row] for row in self.reference.shap]
+        self.history = deque(maxlen=self.history_size)
+        self.rows_seen = 0
+        self.batches_seen = 0
+
+    def snapshot(self) -> dict:
+        """
+        Copy of the accumulated state, for `restore` if a multi-batch input fails partway.
+        """
+        return {
+            "features": [h.counts.copy() for h in self.features],
+            "shap": [[h.counts.copy() for h in row] for row in self.shap],
+            "history": list(self.history),
+            "rows_seen": self.rows_seen,
+            "batches_seen": self.batches_seen,
+            "rng": self._rng.bit_generator.state,
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        for h, counts in zip(self.features, snapshot["features"]):
+            h.counts = counts.copy()
+        for row, row_counts in zip(self.shap, snapshot["shap"]):
+            for h, counts in zip(row, row_counts):
+                h.counts = counts.copy()
+        self.history = deque(snapshot["history"], maxlen=self.history_size)
+        self.rows_seen = snapshot["rows_seen"]
+        self.batches_seen = snapshot["batches_seen"]
+        self._rng.bit_generator.state = snapshot["rng"]
+
+    def update(self, batch: pd.DataFrame) -> Dict[str, float]:
+        """
+        Add a batch of raw feature rows; return that batch's own drift scores.
+        """
+        if len(batch) == 0:
+            return {}
+        cols = self.reference.feature_cols
+        X_batch = np.asarray(self.scaler.transform(batch[cols]), dtype=np.float32)
+
+        batch_features = [h.empty_like() for h in self.reference.features]
+        for j in range(len(cols)):
+            batch_features[j].update(X_batch[:, j])
+            self.features[j].counts += batch_features[j].counts
+
+        m = min(self.shap_rows_per_batch, len(X_batch))
+        if m:
+            idx = self._rng.choice(len(X_batch), m, replace=False)
+            with span("explainer.shap_values"):
+                raw = self.explainer.shap_values(X_batch[idx])
+            for c, v in enumerate(_global_shap_to_class_list(raw, cols)):
+                for j in range(len(cols)):
+                    self.shap[c][j].update(v[:, j])
+
+        self.rows_seen += len(X_batch)
+        self.batches_seen += 1
+        feature_psi = [psi(ref, cur) for ref, cur in zip(self.reference.features, batch_features)]
+        summary = {
+            "batch": self.batches_seen,
+            "rows": len(X_batch),
+            "batch_max_feature_psi": float(max(feature_psi)),
+            "cumulative_max_shap_psi": float(self.shap_scores().to_numpy().max()),
+        }
+        self.history.append(summary)
+        return summary
+
+    def feature_scores(self) -> pd.DataFrame:
+        """
+        Cumulative PSI/KS per feature against the training distribution.
+        """
+        rows = []
+        for feat, ref, cur in zip(self.reference.feature_cols, self.reference.features, self.features):
+            value = psi(ref, cur) if cur.total else 0.0
+            rows.append(
+                {
+                    "Feature": feat,
+                    "PSI": value,
+                    "KS": ks(ref, cur),
+                    "Median (scaled) ref": ref.quantile(0.5),
+                    "Median (scaled) now": cur.quantile(0.5),
+                    "Status": drift_status(value) if cur.total else "no data",
+                }
+            )
+        return pd.DataFrame(rows).sort_values("PSI", ascending=False)
+
+    def shap_scores(self) -> pd.DataFrame:
+        """
+        Cumulative PSI of SHAP values: rows are classes, columns are features.
+        """
+        data = [
+            [psi(ref, cur) if cur.total else 0.0 for ref, cur in zip(ref_row, cur_row)]
+            for ref_row, cur_row in zip(self.reference.shap, self.shap)
+        ]
+        return pd.DataFrame(
+            data,
+            index=[f"Class {c}" for c in range(len(data))],
+            columns=self.reference.feature_cols,
+        )
+
+    def history_frame(self) -> Optional[pd.DataFrame]:
+        return pd.DataFrame(list(self.history)).set_index("batch") if self.history else None
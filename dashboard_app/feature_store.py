@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+SHAP_SAMPLE_SIZE = 1000
+SHAP_SAMPLE_SEED = 42
+
+
+def _readonly(arr: np.ndarray) -> np.ndarray:
+    arr.setflags(write=False)
+    return arr
+
+
+QUANTILE_LEVELS = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+
+@dataclass(frozen=True)
+class DatasetStats:
+    """
+    Dataset-level statistics gathered in one streaming pass over the raw features.
+
+    Quantiles come from a uniform reservoir of rows, so they are exact up to the reservoir
+    size and approximate beyond it.
+    """
+
+    n_rows: int
+    class_counts: np.ndarray  # index = class label
+    feature_min: np.ndarray
+    feature_max: np.ndarray
+    feature_mean: np.ndarray
+    feature_quantiles: np.ndarray  # (len(QUANTILE_LEVELS), n_features)
+
+    def to_dict(self) -> dict:
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        return {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in data.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DatasetStats":
+        return cls(**{k: v if k == "n_rows" else np.asarray(v) for k, v in data.items()})
+
+
+class StatsAccumulator:
+    """
+    Streaming min/max/mean, class counts and a bottom-k reservoir for quantiles.
+    """
+
+    def __init__(self, n_features: int, reservoir_size: int = 100_000, seed: int = SHAP_SAMPLE_SEED) -> None:
+        self.n_rows = 0
+        self.class_counts = np.zeros(0, dtype=np.int64)
+        self.minimum = np.full(n_features, np.inf)
+        self.maximum = np.full(n_features, -np.inf)
+        self.total = np.zeros(n_features)
+        self._rng = np.random.default_rng(seed)
+        self._size = reservoir_size
+        self._keys = np.empty(0)
+        self._rows = np.empty((0, n_features), dtype=np.float32)
+
+    def update(self, X_raw: np.ndarray, y: np.ndarray) -> None:
+        if len(X_raw) == 0:
+            return
+        self.n_rows += len(X_raw)
+        counts = np.bincount(np.asarray(y, dtype=np.int64))
+        if len(counts) > len(self.class_counts):
+            self.class_counts = np.pad(self.class_counts, (0, len(counts) - len(self.class_counts)))
+        self.class_counts[: len(counts)] += counts
+        np.minimum(self.minimum, X_raw.min(axis=0), out=self.minimum)
+        np.maximum(self.maximum, X_raw.max(axis=0), out=self.maximum)
+        self.total += X_raw.sum(axis=0, dtype=np.float64)
+
+        # Keeping the rows with the k smallest random keys is a uniform sample of all rows seen.
+        keys = np.concatenate([self._keys, self._rng.random(len(X_raw))])
+        rows = np.concatenate([self._rows, np.asarray(X_raw, dtype=np.float32)])
+        if len(keys) > self._size:
+            keep = np.argpartition(keys, self._size)[: self._size]
+            keys, rows = keys[keep], rows[keep]
+        self._keys, self._rows = keys, rows
+
+    def result(self) -> DatasetStats:
+        """
+        Statistics so far; with no rows seen, quantiles are NaN (min/max stay at +/-inf).
+        """
+        if self.n_rows:
+            quantiles = np.quantile(self._rows.astype(np.float64), QUANTILE_LEVELS, axis=0)
+        else:
+            quantiles = np.full((len(QUANTILE_LEVELS), self._rows.shape[1]), np.nan)
+        return DatasetStats(
+            n_rows=self.n_rows,
+            class_counts=self.class_counts.copy(),
+            feature_min=self.minimum.copy(),
+            feature_max=self.maximum.copy(),
+            feature_mean=self.total / max(self.n_rows, 1),
+            feature_quantiles=quantiles,
+        )
+
+
+@dataclass(frozen=True)
+class FeatureStore:
+    """
+    Process-wide, read-only feature matrices shared by every session.
+
+    `buffer` is a single float32 block of shape (2, n_rows, n_features): slot 0 holds the
+    raw feature values and slot 1 the scaled ones. `X` and `X_scaled` are views into it,
+    so sessions never hold their own copies of the dataset. In out-of-core mode the buffer
+    and labels are read-only memory maps (`storage == "memmap"`). For a model with the
+    scaler folded in (see `dashboard_app.folding`) slot 1 is slot 0: `X_scaled` is the raw
+    matrix and only one copy exists.
+    """
+
+    buffer: np.ndarray
+    feature_cols: list[str]
+    X: pd.DataFrame
+    X_scaled: np.ndarray
+    y: pd.Series
+    fingerprint: str
+    stats: DatasetStats
+    storage: str = "memory"
+
+    @property
+    def n_rows(self) -> int:
+        return self.buffer.shape[1]
+
+    @property
+    def folded(self) -> bool:
+        return self.buffer.strides[0] == 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes the buffer occupies (one slot when `X_scaled` aliases the raw matrix).
+        """
+        return self.buffer.nbytes // 2 if self.folded else self.buffer.nbytes
+
+    def take(self, indices: np.ndarray) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Gather rows once into a read-only (raw DataFrame, scaled array) pair.
+
+        Fancy indexing has to copy, so callers cache the result (e.g. the SHAP sample)
+        per process rather than per rerun.
+        """
+        indices = _readonly(np.asarray(indices).copy())
+        rows = _readonly(self.buffer[:, indices, :])
+        X_rows = pd.DataFrame(rows[0], columns=self.feature_cols, index=indices, copy=False)
+        return X_rows, rows[1]
+
+
+def build_feature_store(
+    X: pd.DataFrame,
+    y: pd.Series,
+    scaler,
+    feature_cols: list[str],
+) -> FeatureStore:
+    """
+    Build the shared float32 store from the loaded (float64) frame.
+
+    The scaled slot is computed from the stored float32 raw values (see `scale_raw`), so
+    anything that rescales `X` (the sklearn pipeline, DiCE, what-if edits) scores a record
+    exactly as `X_scaled` does. With `scaler=None` (a folded model that reads raw values)
+    nothing is scaled and `X_scaled` aliases the raw matrix.
+    """
+    n_rows, n_features = len(X), len(feature_cols)
+    buffer = np.empty((1 if scaler is None else 2, n_rows, n_features), dtype=np.float32)
+    buffer[0] = X[feature_cols].to_numpy(dtype=np.float64)
+    if scaler is not None:
+        buffer[1] = scale_raw(buffer[0], scaler, feature_cols)
+    _readonly(buffer)
+    # Changes whenever the data or the scaler does; used to key derived indexes.
+    fingerprint = hashlib.blake2b(buffer.data, digest_size=16).hexdigest()
+
+    y_small = _readonly(np.asarray(y, dtype=np.int8).copy())
+    stats = StatsAccumulator(n_features)
+    stats.update(buffer[0], y_small)
+    return _make_store(buffer, y_small, y.name, feature_cols, fingerprint, stats.result(), "memory")
+
+
+def scale_raw(raw: np.ndarray, scaler, feature_cols: list[str]) -> np.ndarray:
+    """
+    float32 raw rows scaled in float64 and cast back to float32.
+
+    This is what a float64 pipeline computes for the stored raw values. Scaling the CSV's
+    float64 values instead would put a few records on the other side of a split threshold
+    from their own stored raw row.
+    """
+    return np.asarray(
+        scaler.transform(pd.DataFrame(np.asarray(raw, dtype=np.float64), columns=feature_cols)), dtype=np.float32
+    )
+
+
+def _make_store(buffer, y, y_name, feature_cols, fingerprint, stats, storage) -> FeatureStore:
+    # A raw-only buffer is viewed as two slots, slot 1 aliasing slot 0 (stride 0, no copy).
+    X_raw, X_scaled = buffer[0], buffer[-1]
+    if len(buffer) == 1:
+        buffer = np.broadcast_to(buffer, (2,) + buffer.shape[1:])
+    return FeatureStore(
+        buffer=buffer,
+        feature_cols=list(feature_cols),
+        X=pd.DataFrame(X_raw, columns=feature_cols, copy=False),
+        X_scaled=X_scaled,
+        y=pd.Series(y, name=y_name, copy=False),
+        fingerprint=fingerprint,
+        stats=stats,
+        storage=storage,
+    )
+
+
+def build_feature_store_memmap(
+    csv_path: str,
+    scaler,
+    feature_cols: list[str],
+    label_col: str,
+    cache_dir: str,
+    chunk_rows: int = 200_000,
+) -> FeatureStore:
+    """
+    Out-of-core store: stream the CSV once in chunks into memory-mapped files.
+
+    The buffer file has the same (2, n_rows, n_features) float32 layout, values and
+    fingerprint as `build_feature_store`, and dataset statistics are gathered in the same
+    pass. Files are named after the CSV (path, size, mtime) and scaler, and are reused while
+    both are unchanged, so a restart only maps them. With `scaler=None` only the raw slot
+    is written.
+    """
+    stat = os.stat(csv_path)
+    key = hashlib.blake2b(digest_size=12)
+    key.update(f"{os.path.abspath(csv_path)}|{stat.st_size}|{stat.st_mtime_ns}|{','.join(feature_cols)}|raw32".encode())
+    if scaler is not None:
+        key.update(np.asarray(scaler.mean_, dtype=np.float64).tobytes())
+        key.update(np.asarray(scaler.scale_, dtype=np.float64).tobytes())
+    base = Path(cache_dir) / f"store-{key.hexdigest()}"
+    meta_path = base.with_suffix(".json")
+    if not meta_path.exists():
+        _ingest_csv(csv_path, scaler, feature_cols, label_col, base, chunk_rows)
+
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    n_rows = meta["n_rows"]
+    slots = 1 if scaler is None else 2
+    buffer = np.memmap(base.with_suffix(".f32"), dtype=np.float32, mode="r", shape=(slots, n_rows, len(feature_cols)))
+    y = np.memmap(base.with_suffix(".labels"), dtype=np.int8, mode="r", shape=(n_rows,))
+    stats = DatasetStats.from_dict(meta["stats"])
+    return _make_store(buffer, y, label_col, feature_cols, meta["fingerprint"], stats, "memmap")
+
+
+def _ingest_csv(csv_path: str, scaler, feature_cols: list[str], label_col: str, base: Path, chunk_rows: int) -> None:
+    base.parent.mkdir(parents=True, exist_ok=True)
+    raw_tmp, scaled_tmp, labels_tmp = (base.with_suffix(s) for s in (".f32.tmp", ".scaled.tmp", ".labels.tmp"))
+    stats = StatsAccumulator(len(feature_cols))
+    with open(raw_tmp, "wb") as raw_f, open(scaled_tmp, "wb") as scaled_f, open(labels_tmp, "wb") as labels_f:
+        for chunk in pd.read_csv(csv_path, usecols=feature_cols + [label_col], chunksize=chunk_rows):
+            raw = chunk[feature_cols].to_numpy(dtype=np.float64).astype(np.float32)
+            labels = chunk[label_col].to_numpy().astype(np.int8)
+            raw_f.write(raw.tobytes())
+            if scaler is not None:
+                scaled_f.write(scale_raw(raw, scaler, feature_cols).tobytes())
+            labels_f.write(labels.tobytes())
+            stats.update(raw, labels)
+    if stats.n_rows == 0:
+        raise ValueError(f"No rows in {csv_path}")
+
+    # Slot 1 (scaled) follows slot 0 (raw) in the buffer file.
+    with open(raw_tmp, "ab") as raw_f, open(scaled_tmp, "rb") as scaled_f:
+        shutil.copyfileobj(scaled_f, raw_f, 16 * 1024 * 1024)
+    os.remove(scaled_tmp)
+
+    slots = 1 if scaler is None else 2
+    buffer = np.memmap(raw_tmp, dtype=np.float32, mode="r", shape=(slots, stats.n_rows, len(feature_cols)))
+    fingerprint = hashlib.blake2b(buffer.data, digest_size=16).hexdigest()
+    del buffer
+    os.replace(raw_tmp, base.with_suffix(".f32"))
+    os.replace(labels_tmp, base.with_suffix(".labels"))
+    meta = {"n_rows": stats.n_rows, "fingerprint": fingerprint, "stats": stats.result().to_dict()}
+    meta_tmp = base.with_suffix(".json.tmp")
+    meta_tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(meta_tmp, base.with_suffix(".json"))
+
+
+def uniform_sample_indices(n_rows: int, sample_size: int = SHAP_SAMPLE_SIZE, seed: int = SHAP_SAMPLE_SEED) -> np.ndarray:
+    """
+    The original fixed SHAP sample: `sample_size` rows drawn without replacement.
+    """
+    rng = np.random.default_rng(seed)
+    return rng.choice(n_rows, min(sample_size, n_rows), replace=False)
+
+
+@lru_cache(maxsize=4)
+def shuffled_row_order(n_rows: int, seed: int = SHAP_SAMPLE_SEED) -> np.ndarray:
+    """
+    Deterministic row permutation for streaming over a full matrix in random order.
+    """
+    return _readonly(np.random.default_rng(seed).permutation(n_rows))
+
+
+def object_nbytes(obj: Any) -> int:
+    """
+    Best-effort size of an object's payload. Array views count as 0 (they own no data).
+    """
+    if isinstance(obj, np.ndarray):
+        return 0 if obj.base is not None else obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    return sys.getsizeof(obj)
+
+
+def memory_report(
+    store: FeatureStore,
+    session_state: Mapping[str, Any],
+    extra_shared: Optional[Mapping[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Bytes held process-wide by the shared store and per session by `session_state`.
+    """
+    shared = {
+        "feature buffer (raw + scaled)": store.nbytes,
+        "labels": store.y.values.nbytes,
+    }
+    for name, value in (extra_shared or {}).items():
+        shared[name] = object_nbytes(value)
+
+    session = {str(k): object_nbytes(v) for k, v in session_state.items()}
+
+    rss = None
+    try:
+        import psutil
+
+        rss = psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    return {
+        "shared": shared,
+        "shared_total": sum(shared.values()),
+        "session": session,
+        "session_total": sum(session.values()),
+        "process_rss": rss,
+    }
@@ -0,0 +1,171 @@
+"""
+Fold the StandardScaler into the booster: a model that takes raw feature values.
+
+Run (from the project root, next to xgb_model.pkl and scaler.pkl):
+    python -m dashboard_app.folding --out xgb_model_folded.pkl
+
+Trees only compare one feature with a threshold, and scaling is a per-feature increasing
+affine map, so every split `scaled_x < t` can be rewritten as `raw_x < T` in raw units.
+Leaf values and covers are untouched, so predictions and SHAP values on raw rows equal
+those of the original model on scaled rows.
+
+T is chosen exactly rather than as `t * scale + mean`: XGBoost compares float32 values,
+and the dashboard scales in float64 and then casts to float32, so T is the smallest float32
+raw value whose scaled float32 value is >= t. Every float32 input then takes the same
+branch in both models. When the dashboard finds an up-to-date folded model next to
+`xgb_model.pkl` it loads that one and skips scaling (see `FOLDED_MODEL_PATH`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+
+import numpy as np
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+from dashboard_app.pdp import model_version
+
+
+def _scaled32(x: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    The float32 model input for float32 raw values: scaled in float64, then cast.
+    """
+    return ((x.astype(np.float64) - mean) / scale).astype(np.float32)
+
+
+def raw_thresholds(thresholds: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    For each scaled float32 threshold t, the smallest float32 raw value x with scaled(x) >= t.
+
+    Scaling is non-decreasing in x (scale > 0), so `x < T` holds exactly when `scaled(x) < t`.
+    The affine estimate is at most a few float32 steps away and is corrected step by step.
+    """
+    t = np.asarray(thresholds, dtype=np.float32)
+    mean, scale = np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+    out = (t.astype(np.float64) * scale + mean).astype(np.float32)
+    while True:
+        low = _scaled32(out, mean, scale) < t
+        if not low.any():
+            break
+        out[low] = np.nextafter(out[low], np.float32(np.inf))
+    while True:
+        below = np.nextafter(out, np.float32(-np.inf))
+        high = _scaled32(below, mean, scale) >= t
+        if not high.any():
+            break
+        out[high] = below[high]
+    return out
+
+
+def folding_source(booster, scaler) -> str:
+    """
+    Identifies the (model, scaler) pair a folded model was built from.
+    """
+    key = hashlib.blake2b(digest_size=16)
+    key.update(model_version(booster).encode())
+    key.update(np.asarray(scaler.mean_, dtype=np.float64).tobytes())
+    key.update(np.asarray(scaler.scale_, dtype=np.float64).tobytes())
+    return key.hexdigest()
+
+
+def fold_scaler(booster, scaler) -> xgb.Booster:
+    """
+    A copy of `booster` whose split thresholds are in raw units of `scaler`'s input.
+
+    The fitted scaler's mean/scale and `folding_source` are kept as booster attributes, so
+    the folded model can be checked against its source and unfolded statistics recovered.
+    """
+    mean = np.asarray(scaler.mean_, dtype=np.float64)
+    scale = np.asarray(scaler.scale_, dtype=np.float64)
+    if not (scale > 0).all():
+        raise ValueError("Scaler has non-positive scale_; cannot fold it into the thresholds")
+
+    model = json.loads(bytes(booster.save_raw(raw_format="json")))
+    gbm = model["learner"]["gradient_booster"]
+    trees = (gbm["gbtree"] if "gbtree" in gbm else gbm)["model"]["trees"]
+    for tree in trees:
+        if tree["categories_nodes"]:
+            raise ValueError("Categorical splits cannot be folded")
+        internal = np.asarray(tree["left_children"]) != -1
+        features = np.asarray(tree["split_indices"])[internal]
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        conditions[internal] = raw_thresholds(conditions[internal], mean[features], scale[features])
+        # float32 values print exactly as Python floats, so they survive the JSON round trip.
+        tree["split_conditions"] = [float(c) for c in conditions]
+
+    folded = xgb.Booster()
+    folded.load_model(bytearray(json.dumps(model).encode()))
+    folded.set_attr(
+        folded_from=folding_source(booster, scaler),
+        scaler_mean=json.dumps(mean.tolist()),
+        scaler_scale=json.dumps(scale.tolist()),
+    )
+    return folded
+
+
+def fold_model(model, scaler) -> xgb.XGBClassifier:
+    """
+    `model` (an XGBClassifier on scaled input) as an XGBClassifier on raw input.
+    """
+    folded = xgb.XGBClassifier()
+    folded.load_model(bytearray(fold_scaler(model.get_booster(), scaler).save_raw(raw_format="json")))
+    return folded
+
+
+def is_folded(model) -> bool:
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    return booster.attr("folded_from") is not None
+
+
+def source_scaler(model) -> StandardScaler:
+    """
+    The scaler a folded model absorbed, rebuilt from its booster attributes.
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    mean = np.asarray(json.loads(booster.attr("scaler_mean")))
+    scale = np.asarray(json.loads(booster.attr("scaler_scale")))
+    return _fitted_scaler(mean, scale)
+
+
+def identity_scaler(n_features: int) -> StandardScaler:
+    """
+    A fitted StandardScaler that leaves values unchanged: the model-input "scaler" of a folded model.
+    """
+    return _fitted_scaler(np.zeros(n_features), np.ones(n_features))
+
+
+def is_identity_scaler(scaler) -> bool:
+    return bool(np.all(scaler.mean_ == 0) and np.all(scaler.scale_ == 1))
+
+
+def _fitted_scaler(mean: np.ndarray, scale: np.ndarray) -> StandardScaler:
+    scaler = StandardScaler()
+    scaler.mean_, scaler.scale_, scaler.var_ = mean, scale, scale**2
+    scaler.n_features_in_ = len(mean)
+    scaler.n_samples_seen_ = 0
+    return scaler
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="xgb_model.pkl")
+    parser.add_argument("--scaler", default="scaler.pkl")
+    parser.add_argument("--out", default="xgb_model_folded.pkl")
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    from dashboard_app.data import _unpack_model
+
+    model, scaler = _unpack_model(joblib.load(args.model), joblib.load(args.scaler))
+    folded = fold_model(model, scaler)
+    joblib.dump(folded, args.out)
+    print(f"wrote {args.out} (folded from {folding_source(model.get_booster(), scaler)})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import weakref
+
+import numpy as np
+
+
+# Class count per booster, so allocating an output does not parse the config on every call.
+_N_CLASSES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def inplace_input(X_scaled: np.ndarray) -> np.ndarray:
+    """
+    `X_scaled` as the booster's in-place API reads it without copying: C-contiguous float32.
+
+    Views into the shared store (`store.X_scaled[i : i + 1]`, row ranges) already are, so
+    this is a no-op for them; anything else is converted once here.
+    """
+    if X_scaled.dtype == np.float32 and X_scaled.flags.c_contiguous:
+        return X_scaled
+    return np.ascontiguousarray(X_scaled, dtype=np.float32)
+
+
+def n_classes(booster) -> int:
+    """
+    Number of probability columns `predict_proba` returns (2 for a binary objective).
+    """
+    n = _N_CLASSES.get(booster)
+    if n is None:
+        num_class = int(json.loads(booster.save_config())["learner"]["learner_model_param"]["num_class"])
+        n = _N_CLASSES[booster] = max(num_class, 2)
+    return n
+
+
+def predict_proba(booster, X_scaled: np.ndarray, out: np.ndarray | None = None, chunk_rows: int = 65_536) -> np.ndarray:
+    """
+    Class probabilities (rows, n_classes) from in-place prediction on scaled rows.
+
+    No DataFrame, scaler or DMatrix is involved. The result is written to `out` (float32,
+    allocated here if not given; zero rows give an empty (0, n_classes) array); large
+    inputs are scored chunk by chunk. XGBoost still allocates each chunk's output, which
+    is then copied into `out`.
+    """
+    X_scaled = inplace_input(X_scaled)
+    if out is None:
+        out = np.empty((len(X_scaled), n_classes(booster)), dtype=np.float32)
+    for start in range(0, len(X_scaled), chunk_rows):
+        stop = min(start + chunk_rows, len(X_scaled))
+        proba = np.asarray(booster.inplace_predict(X_scaled[start:stop]))
+        if proba.ndim == 1:  # binary objective returns P(class 1)
+            out[start:stop, 0] = 1.0 - proba
+            out[start:stop, 1] = proba
+        else:
+            out[start:stop] = proba
+    return out
+
+
+def predict_classes(booster, X_scaled: np.ndarray, out: np.ndarray | None = None, chunk_rows: int = 65_536) -> np.ndarray:
+    """
+    Predicted class per row (int8), scoring `X_scaled` in place chunk by chunk (no copies of the matrix).
+    """
+    X_scaled = inplace_input(X_scaled)
+    if out is None:
+        out = np.empty(len(X_scaled), dtype=np.int8)
+    for start in range(0, len(X_scaled), chunk_rows):
+        stop = min(start + chunk_rows, len(X_scaled))
+        proba = np.asarray(booster.inplace_predict(X_scaled[start:stop]))
+        out[start:stop] = (proba > 0.5) if proba.ndim == 1 else proba.argmax(axis=1)
+    return out
+
+
+def predict_class(booster, X_scaled: np.ndarray, row: int) -> int:
+    """
+    Predicted class of one stored row, scored on a view of the shared matrix.
+    """
+    proba = np.asarray(booster.inplace_predict(inplace_input(X_scaled[row : row + 1]))).reshape(-1)
+    return int(proba[0] > 0.5) if proba.size == 1 else int(proba.argmax())
@@ -0,0 +1,208 @@
+"""
+Chunked ingest of user-supplied CSVs: validation, scaling, predictions and global SHAP.
+
+The file is read `chunk_rows` rows at a time, so memory is bounded by one chunk plus
+fixed-size summaries, whatever the file size. Predictions cover every valid row. SHAP is
+computed on at most `shap_rows_per_chunk` rows of each chunk, each weighted by the
+chunk's size over its explained rows, so running mean(|SHAP|) estimates the whole file
+(exact when every row is explained). A weighted reservoir keeps `sample_rows` explained
+rows with their SHAP values for beeswarm plots.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import IO, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from dashboard_app.feature_store import DatasetStats, StatsAccumulator
+from dashboard_app.inference import predict_classes
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import _global_shap_to_class_list
+
+
+LABEL_COL = "HealthImpactClass"
+
+
+@dataclass(frozen=True)
+class UploadSummary:
+    """
+    Everything the dashboard shows about an ingested file; small whatever the file size.
+
+    `mean_abs_by_class` is (n_classes, n_features) like `global_mean_abs_by_class`;
+    `sample_shap[c]` holds class c's SHAP values for the raw rows in `sample_X`.
+    `label_counts` and `n_correct` are None when the file has no label column.
+    """
+
+    name: str
+    n_rows: int
+    n_invalid: int
+    n_explained: int
+    predicted_counts: np.ndarray
+    label_counts: np.ndarray | None
+    n_correct: int | None
+    mean_abs_by_class: np.ndarray
+    sample_X: np.ndarray
+    sample_shap: np.ndarray
+    base_values: np.ndarray
+    stats: DatasetStats
+
+
+def check_columns(columns, feature_cols: list[str]) -> None:
+    """
+    Raise ValueError naming any model feature missing from `columns`.
+    """
+    missing = [c for c in feature_cols if c not in set(columns)]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+
+
+def scale_rows(scaler, X_raw: np.ndarray) -> np.ndarray:
+    """
+    `scaler.transform` for raw rows: scaled in float64, then cast to the model's float32.
+    """
+    mean = np.asarray(scaler.mean_, dtype=np.float64)
+    scale = np.asarray(scaler.scale_, dtype=np.float64)
+    return ((np.asarray(X_raw, dtype=np.float64) - mean) / scale).astype(np.float32)
+
+
+class UploadAccumulator:
+    """
+    Running predictions, weighted mean(|SHAP|) and a weighted reservoir of explained rows.
+    """
+
+    def __init__(self, name: str, n_features: int, n_classes: int, sample_rows: int, seed: int) -> None:
+        self.name = name
+        self.n_rows = 0
+        self.n_invalid = 0
+        self.n_explained = 0
+        self.n_classes = n_classes
+        self.predicted_counts = np.zeros(n_classes, dtype=np.int64)
+        self.label_counts: np.ndarray | None = None
+        self.n_correct = 0
+        self._abs_sums = np.zeros((n_classes, n_features))
+        self._weight = 0.0
+        self._rng = np.random.default_rng(seed)
+        self._size = sample_rows
+        self._keys = np.empty(0)
+        self._X = np.empty((0, n_features), dtype=np.float32)
+        self._shap = np.empty((n_classes, 0, n_features), dtype=np.float32)
+        self._stats = StatsAccumulator(n_features, seed=seed)
+
+    def update(
+        self,
+        X_raw: np.ndarray,
+        predicted: np.ndarray,
+        labels: np.ndarray | None,
+        explained: np.ndarray,
+        shap_by_class: list[np.ndarray],
+        n_invalid: int,
+    ) -> None:
+        """
+        Add one chunk: its valid raw rows, their predictions and (optional, -1 = missing)
+        labels, and the SHAP values of the rows at positions `explained`.
+        """
+        self.n_rows += len(X_raw)
+        self.n_invalid += n_invalid
+        self.predicted_counts += np.bincount(predicted, minlength=self.n_classes)[: self.n_classes]
+        if labels is not None:
+            known = labels >= 0
+            counts = np.bincount(labels[known], minlength=self.n_classes)[: self.n_classes]
+            self.label_counts = counts if self.label_counts is None else self.label_counts + counts
+            self.n_correct += int((labels[known] == predicted[known]).sum())
+        self._stats.update(X_raw, predicted)
+        if len(explained) == 0:
+            return
+
+        self.n_explained += len(explained)
+        weight = len(X_raw) / len(explained)
+        shap = np.stack(shap_by_class).astype(np.float32)
+        self._abs_sums += weight * np.abs(shap).sum(axis=1, dtype=np.float64)
+        self._weight += weight * len(explained)
+
+        # Smallest Exp(1)/weight keys form a weighted sample without replacement (Efraimidis-Spirakis).
+        keys = np.concatenate([self._keys, self._rng.exponential(size=len(explained)) / weight])
+        X = np.concatenate([self._X, X_raw[explained]])
+        shap = np.concatenate([self._shap, shap], axis=1)
+        if len(keys) > self._size:
+            keep = np.sort(np.argpartition(keys, self._size)[: self._size])
+            keys, X, shap = keys[keep], X[keep], shap[:, keep]
+        self._keys, self._X, self._shap = keys, X, shap
+
+    def result(self, base_values: np.ndarray) -> UploadSummary:
+        return UploadSummary(
+            name=self.name,
+            n_rows=self.n_rows,
+            n_invalid=self.n_invalid,
+            n_explained=self.n_explained,
+            predicted_counts=self.predicted_counts.copy(),
+            label_counts=None if self.label_counts is None else self.label_counts.copy(),
+            n_correct=None if self.label_counts is None else self.n_correct,
+            mean_abs_by_class=self._abs_sums / max(self._weight, 1.0),
+            sample_X=self._X.copy(),
+            sample_shap=self._shap.copy(),
+            base_values=np.asarray(base_values, dtype=np.float64).reshape(-1),
+            stats=self._stats.result(),
+        )
+
+
+def iter_ingest(
+    source: str | IO,
+    name: str,
+    model,
+    explainer,
+    scaler,
+    feature_cols: list[str],
+    chunk_rows: int = 50_000,
+    shap_rows_per_chunk: int = 2_000,
+    sample_rows: int = 2_000,
+    seed: int = 42,
+    on_chunk: Callable[[], None] | None = None,
+) -> Iterator[UploadSummary]:
+    """
+    Stream `source` (path or file object) chunk by chunk; yields the summary so far after each chunk.
+
+    Rows with a missing or non-numeric feature are dropped and counted as invalid. A
+    `HealthImpactClass` column, if present, is compared with the predictions. `on_chunk`
+    is called before each chunk is processed (e.g. a job's cancellation check).
+    """
+    header = pd.read_csv(source, nrows=0).columns
+    check_columns(header, feature_cols)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    has_labels = LABEL_COL in header
+
+    booster = model.get_booster()
+    n_classes = len(np.atleast_1d(explainer.expected_value))
+    acc = UploadAccumulator(name, len(feature_cols), n_classes, sample_rows, seed)
+    rng = np.random.default_rng(seed)
+    usecols = feature_cols + ([LABEL_COL] if has_labels else [])
+    for chunk in pd.read_csv(source, usecols=usecols, chunksize=chunk_rows):
+        if on_chunk is not None:
+            on_chunk()
+        X64 = chunk[feature_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        valid = np.isfinite(X64).all(axis=1)
+        if not valid.any():
+            acc.n_invalid += len(valid)
+            yield acc.result(explainer.expected_value)
+            continue
+        X64 = X64[valid]
+        labels = None
+        if has_labels:
+            raw_labels = pd.to_numeric(chunk[LABEL_COL], errors="coerce").to_numpy(dtype=np.float64)[valid]
+            known = np.isfinite(raw_labels) & (raw_labels >= 0) & (raw_labels < n_classes)
+            labels = np.where(known, raw_labels, -1).astype(np.int64)
+
+        X_scaled = scale_rows(scaler, X64)
+        predicted = predict_classes(booster, X_scaled).astype(np.int64)
+        m = min(shap_rows_per_chunk, len(X_scaled))
+        explained = np.sort(rng.choice(len(X_scaled), m, replace=False)) if m else np.empty(0, dtype=np.int64)
+        shap_by_class: list[np.ndarray] = []
+        if m:
+            with span("explainer.shap_values"):
+                raw = explainer.shap_values(X_scaled[explained])
+            shap_by_class = _global_shap_to_class_list(raw, feature_cols)
+        acc.update(X64.astype(np.float32), predicted, labels, explained, shap_by_class, int((~valid).sum()))
+        yield acc.result(explainer.expected_value)
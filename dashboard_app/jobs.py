@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+from dashboard_app.metrics import span
+
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed out"
+FINISHED = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job by `JobContext.check()` once it is cancelled or past its timeout.
+    """
+
+
+@dataclass
+class Job:
+    """
+    One scheduled computation. Fields are written by the scheduler under its lock.
+
+    `subscribers` counts the sessions waiting on the job; a cancel only stops the job when
+    the last of them gives up.
+    """
+
+    id: str
+    key: Hashable
+    label: str
+    timeout: float
+    submitted: float = field(default_factory=time.monotonic)
+    started: float | None = None
+    finished: float | None = None
+    status: str = PENDING
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: str | None = None
+    subscribers: int = 1
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+
+class JobContext:
+    """
+    Handle passed to a job function for progress reports and cooperative cancellation.
+    """
+
+    def __init__(self, job: Job, lock: threading.Lock) -> None:
+        self._job = job
+        self._lock = lock
+
+    @property
+    def cancelled(self) -> bool:
+        job = self._job
+        return job.cancel_event.is_set() or time.monotonic() - job.started > job.timeout
+
+    def check(self) -> None:
+        """
+        Raise JobCancelled if the job should stop; call between units of work.
+        """
+        if self.cancelled:
+            raise JobCancelled()
+
+    def report(self, progress: float, message: str = "") -> None:
+        self.check()
+        with self._lock:
+            self._job.progress = min(max(float(progress), 0.0), 1.0)
+            if message:
+                self._job.message = message
+
+
+class JobScheduler:
+    """
+    Thread pool for long-running explanations shared by every session of the process.
+
+    `submit` returns the in-flight job with the same key if there is one, or the cached
+    finished job, so identical requests from different sessions run once. Sessions keep the
+    job id and poll `get`. Only successful results are cached (LRU, `cache_size` entries);
+    failed, cancelled and timed-out keys run again on the next submit.
+
+    Timeouts are cooperative: `JobContext.check()` raises once the job is over its time,
+    and a job that never checks (e.g. one opaque library call) is reported as timed out
+    when polled past its deadline, its eventual result discarded.
+    """
+
+    def __init__(self, max_workers: int = 2, cache_size: int = 64, default_timeout: float = 120.0) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard-job")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: dict[str, Job] = {}
+        self._inflight: dict[Hashable, Job] = {}
+        self._results: OrderedDict[Hashable, Job] = OrderedDict()
+        self._cache_size = cache_size
+        self.default_timeout = default_timeout
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable[..., Any],
+        *args,
+        label: str = "",
+        timeout: float | None = None,
+        **kwargs,
+    ) -> Job:
+        """
+        Schedule `fn(ctx, *args, **kwargs)` under `key`, or join an identical job.
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+            inflight = self._inflight.get(key)
+            if inflight is not None and not inflight.cancel_event.is_set():
+                inflight.subscribers += 1
+                return inflight
+
+            job = Job(
+                id=f"job-{next(self._ids)}",
+                key=key,
+                label=label,
+                timeout=self.default_timeout if timeout is None else timeout,
+            )
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """
+        Current state of a job (None if unknown); marks overdue jobs as timed out.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == RUNNING and job.elapsed > job.timeout:
+                job.cancel_event.set()
+                self._finish(job, TIMED_OUT, error=f"Timed out after {job.timeout:.0f}s")
+            return job
+
+    def cancel(self, job_id: str) -> None:
+        """
+        Withdraw one session's interest; the job stops once no session waits on it.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return
+            job.subscribers -= 1
+            if job.subscribers > 0:
+                return
+            job.cancel_event.set()
+            self._finish(job, CANCELLED)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            counts = {"in_flight": len(self._inflight), "cached_results": len(self._results)}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        with self._lock:
+            if job.done:
+                return
+            job.status = RUNNING
+            job.started = time.monotonic()
+        ctx = JobContext(job, self._lock)
+        try:
+            with span(f"job.{job.label or 'run'}"):
+                result = fn(ctx, *args, **kwargs)
+        except JobCancelled:
+            with self._lock:
+                if not job.done and job.elapsed > job.timeout:
+                    self._finish(job, TIMED_OUT, error=f"Timed out after {job.timeout:.0f}s")
+                elif not job.done:
+                    self._finish(job, CANCELLED)
+            return
+        except Exception as e:
+            with self._lock:
+                if not job.done:
+                    self._finish(job, FAILED, error=f"{type(e).__name__}: {e}")
+            return
+        with self._lock:
+            if job.done:
+                # Cancelled or timed out while the last step ran; drop the result.
+                return
+            job.result = result
+            job.progress = 1.0
+            self._finish(job, DONE)
+            self._results[job.key] = job
+            while len(self._results) > self._cache_size:
+                evicted = self._results.popitem(last=False)[1]
+                self._jobs.pop(evicted.id, None)
+
+    def _finish(self, job: Job, status: str, error: str | None = None) -> None:
+        # Caller holds the lock.
+        job.status = status
+        job.error = error
+        job.finished = time.monotonic()
+        if self._inflight.get(job.key) is job:
+            del self._inflight[job.key]
+        if status != DONE:
+            # Keep the record briefly so polling sessions see the outcome, not a vanished id.
+            self._prune_unfinished()
+
+    def _prune_unfinished(self, keep: int = 256) -> None:
+        stale = [j.id for j in self._jobs.values() if j.done and j.status != DONE]
+        for job_id in stale[:-keep] if len(stale) > keep else []:
+            del self._jobs[job_id]
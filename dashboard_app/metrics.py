@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Opt-in: timing is a no-op unless DASHBOARD_METRICS is set.
+METRICS_ENABLED = os.environ.get("DASHBOARD_METRICS", "").strip().lower() in {"1", "true", "yes", "on"}
+METRICS_DIR = Path(os.environ.get("DASHBOARD_METRICS_DIR", "metrics"))
+
+# Prometheus-style cumulative histogram bucket upper bounds (seconds).
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL_SPAN = nullcontext()
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (count, sum and per-bucket counts).
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile by linear interpolation inside the matching bucket.
+        """
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, c in enumerate(self.counts):
+            upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+            if c and seen + c >= target:
+                return lower + (upper - lower) * (target - seen) / c
+            seen += c
+            lower = upper
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    Process-wide stage timings shared by all sessions.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._local = threading.local()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = self._histograms[stage] = Histogram()
+            hist.observe(seconds)
+        spans = getattr(self._local, "spans", None)
+        if spans is not None:
+            spans.append((stage, seconds))
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        with self._lock:
+            return dict(self._histograms)
+
+    def in_rerun(self) -> bool:
+        return getattr(self._local, "spans", None) is not None
+
+    @contextmanager
+    def rerun(self, labels: dict, stage: str = "rerun") -> Iterator[List[Tuple[str, float]]]:
+        """
+        Collect the spans recorded by this script thread during one rerun and export them.
+
+        `labels` is read on exit, so callers can add e.g. the selected role mid-rerun. The
+        whole rerun is timed under `stage`.
+        """
+        spans: List[Tuple[str, float]] = []
+        self._local.spans = spans
+        start = time.perf_counter()
+        try:
+            yield spans
+        finally:
+            self._local.spans = None
+            spans.append((stage, time.perf_counter() - start))
+            self.observe(stage, spans[-1][1])
+            try:
+                self.export(spans, labels)
+            except OSError:
+                pass
+
+    def export(self, spans: List[Tuple[str, float]], labels: dict) -> None:
+        """
+        Append one JSON line for the rerun and rewrite the Prometheus text file.
+        """
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        record = {"ts": time.time(), **labels, "spans": [{"stage": s, "seconds": round(t, 6)} for s, t in spans]}
+        with open(METRICS_DIR / "stage_timings.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+        tmp = METRICS_DIR / "dashboard_metrics.prom.tmp"
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp, METRICS_DIR / "dashboard_metrics.prom")
+
+    def to_prometheus(self) -> str:
+        """
+        Render all histograms in the Prometheus text exposition format.
+        """
+        name = "dashboard_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Wall-clock time spent in each dashboard stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, hist in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, c in zip(BUCKETS, hist.counts):
+                cumulative += c
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {hist.total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        REGISTRY.observe(self.stage, time.perf_counter() - self.start)
+
+
+def span(stage: str):
+    """
+    Time a block under `stage`. Returns a shared no-op context when metrics are disabled.
+    """
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _Span(stage)
+
+
+def rerun_scope(labels: dict):
+    """
+    Group the spans of one script rerun; yields the span list, or None when disabled.
+    """
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return REGISTRY.rerun(labels)
+
+
+def fragment_scope(name: str, labels: dict):
+    """
+    Time one run of the fragment `name`.
+
+    During a full rerun this is a "fragment.<name>" span. When Streamlit reruns only the
+    fragment, no full-rerun scope is open, so it opens its own and records it as
+    "fragment_rerun".
+    """
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    if REGISTRY.in_rerun():
+        return _Span(f"fragment.{name}")
+    return REGISTRY.rerun({**labels, "fragment": name}, stage="fragment_rerun")
+
+
+def current_session_id() -> Optional[str]:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else None
+    except Exception:
+        return None
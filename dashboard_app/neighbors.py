@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import shap
+import xgboost as xgb
+from sklearn.neighbors import KDTree
+
+from dashboard_app.inference import predict_classes
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import local_shap_1d_and_base_value
+
+
+class ExplanationCache:
+    """
+    Per-record SHAP explanations (for each record's predicted class), computed on demand
+    and kept in a bounded LRU shared by all sessions.
+    """
+
+    def __init__(
+        self,
+        explainer: "shap.TreeExplainer",
+        X_scaled: np.ndarray,
+        predictions: np.ndarray,
+        feature_cols: list[str],
+        max_cached: int = 10_000,
+    ) -> None:
+        self.explainer = explainer
+        self.X_scaled = X_scaled
+        self.predictions = predictions
+        self.feature_cols = list(feature_cols)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._max_cached = max_cached
+
+    def get(self, indices: np.ndarray) -> Dict[int, Tuple[np.ndarray, float]]:
+        out: Dict[int, Tuple[np.ndarray, float]] = {}
+        for i in (int(i) for i in indices):
+            with self._lock:
+                cached = self._cache.get(i)
+                if cached is not None:
+                    self._cache.move_to_end(i)
+            if cached is None:
+                cached = local_shap_1d_and_base_value(
+                    explainer=self.explainer,
+                    instance_scaled=self.X_scaled[i : i + 1],
+                    class_idx=int(self.predictions[i]),
+                    feature_cols=self.feature_cols,
+                )
+                with self._lock:
+                    self._cache[i] = cached
+                    while len(self._cache) > self._max_cached:
+                        self._cache.popitem(last=False)
+            out[i] = cached
+        return out
+
+
+class SimilarConditionsIndex:
+    """
+    KD-tree over (a subset of) the standardized feature matrix for "similar conditions" lookup.
+
+    Predictions for every record are computed once at build time; per-record SHAP
+    explanations are computed lazily for returned neighbours and kept in a bounded LRU
+    cache shared by all sessions. `typical_values` (raw, one per feature, e.g. the
+    dataset medians) are the defaults offered for a new query.
+    """
+
+    def __init__(
+        self,
+        model,
+        explainer: "shap.TreeExplainer",
+        X: pd.DataFrame,
+        X_scaled: np.ndarray,
+        scaler,
+        feature_cols: list[str],
+        index_features: list[str],
+        typical_values: np.ndarray,
+        leaf_size: int = 40,
+        max_cached_explanations: int = 10_000,
+    ) -> None:
+        self.explainer = explainer
+        self.X_scaled = X_scaled
+        self.feature_cols = list(feature_cols)
+        self.index_features = list(index_features)
+        self.typical_values = dict(zip(self.feature_cols, np.asarray(typical_values, dtype=np.float64).tolist()))
+        self._cols = np.array([self.feature_cols.index(f) for f in self.index_features])
+        self._mean = np.asarray(scaler.mean_, dtype=np.float64)[self._cols]
+        self._scale = np.asarray(scaler.scale_, dtype=np.float64)[self._cols]
+
+        with span("neighbors.build"):
+            # Standardized from the raw values with `scaler`, whatever units the model reads.
+            raw = X.to_numpy()[:, self._cols].astype(np.float64)
+            self.tree = KDTree((raw - self._mean) / self._scale, leaf_size=leaf_size)
+            self.predictions = predict_classes(model.get_booster(), X_scaled)
+
+        self._explanations = ExplanationCache(
+            explainer, X_scaled, self.predictions, self.feature_cols, max_cached_explanations
+        )
+
+    def scale_conditions(self, conditions: Dict[str, float]) -> np.ndarray:
+        """
+        Map raw values for `index_features` into the index's scaled space: (1, n_index_features).
+        """
+        raw = np.array([float(conditions[f]) for f in self.index_features], dtype=np.float64)
+        return ((raw - self._mean) / self._scale).reshape(1, -1)
+
+    def query(self, conditions: Dict[str, float], k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (row indices, distances) of the k most similar historical records.
+        """
+        with span("neighbors.query"):
+            dist, idx = self.tree.query(self.scale_conditions(conditions), k=min(k, self.tree.data.shape[0]))
+        return idx[0], dist[0]
+
+    def explanations(self, indices: np.ndarray) -> Dict[int, Tuple[np.ndarray, float]]:
+        """
+        SHAP values (for each record's predicted class) and base value, computed on demand.
+        """
+        return self._explanations.get(indices)
+
+
+def top_k_by_count(counts: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k largest counts, by count descending then index ascending.
+
+    Every index above the k-th largest count is kept, then the lowest indices tied with it,
+    so the result does not depend on how the partition orders ties.
+    """
+    n = len(counts)
+    if 0 < k < n:
+        kth = np.partition(counts, n - k)[n - k]
+        above = np.flatnonzero(counts > kth)
+        top = np.concatenate([above, np.flatnonzero(counts == kth)[: k - len(above)]])
+    else:
+        top = np.arange(n)[:k]
+    return top[np.lexsort((top, -counts[top]))]
+
+
+class LeafIndex:
+    """
+    Model-aware similarity: records ranked by how many trees put them in the query's leaf.
+
+    The booster's leaf assignments (`pred_leaf`) for every record are stored as inverted
+    lists: `postings[indptr[l] : indptr[l + 1]]` are the rows in leaf `l`, where leaves are
+    numbered densely across all trees. A query only reads the lists of its own leaves, one
+    per tree, and counts shared leaves per record with one `bincount`. For a multiclass
+    model the count can be restricted to the trees of one class.
+    """
+
+    def __init__(
+        self,
+        model,
+        explainer: "shap.TreeExplainer",
+        X_scaled: np.ndarray,
+        feature_cols: list[str],
+        chunk_rows: int = 65_536,
+        max_cached_explanations: int = 10_000,
+    ) -> None:
+        self.booster = model.get_booster()
+        self.explainer = explainer
+        self.X_scaled = X_scaled
+        self.feature_cols = list(feature_cols)
+        self.n_rows = len(X_scaled)
+
+        with span("leaves.build"):
+            # int32 leaf matrices per chunk, kept only until their rows are in `postings`.
+            chunks = [
+                self._pred_leaf(X_scaled[start : start + chunk_rows]) for start in range(0, self.n_rows, chunk_rows)
+            ]
+            self.n_trees = chunks[0].shape[1]
+            self._n_nodes = max(int(leaves.max()) for leaves in chunks) + 1
+            key_dtype = np.int32 if self.n_trees * self._n_nodes <= np.iinfo(np.int32).max else np.int64
+            offsets = np.arange(self.n_trees, dtype=key_dtype) * self._n_nodes
+            counts = np.zeros(self.n_trees * self._n_nodes, dtype=np.int64)
+            for i, leaves in enumerate(chunks):
+                chunks[i] = leaves = leaves.astype(key_dtype, copy=False) + offsets
+                counts += np.bincount(leaves.ravel(), minlength=len(counts))
+
+            # Dense leaf ids ordered by (tree, node); `_lut` maps tree * n_nodes + node to them.
+            present = counts > 0
+            self.n_leaves = int(present.sum())
+            self._lut = np.full(len(counts), -1, dtype=np.int32)
+            self._lut[present] = np.arange(self.n_leaves, dtype=np.int32)
+            self.indptr = np.zeros(self.n_leaves + 1, dtype=np.int64)
+            np.cumsum(counts[present], out=self.indptr[1:])
+            del counts, present
+
+            # Counting sort over chunks: `fill` is the next free slot of each leaf list, so a chunk's
+            # rows go after earlier chunks'. Only the chunk itself is sorted, to rank rows within a leaf.
+            self.postings = np.empty(self.indptr[-1], dtype=np.min_scalar_type(max(self.n_rows - 1, 0)))
+            fill = self.indptr[:-1].copy()
+            start = 0
+            while chunks:
+                dense = self._lut[chunks.pop(0)].ravel()
+                order = np.argsort(dense, kind="stable")
+                local = np.bincount(dense, minlength=self.n_leaves)
+                first = np.cumsum(local) - local
+                ids = dense[order]
+                self.postings[fill[ids] + np.arange(len(ids)) - first[ids]] = start + order // self.n_trees
+                fill += local
+                start += len(dense) // self.n_trees
+                del dense, order, ids
+
+            self.predictions = predict_classes(self.booster, X_scaled)
+            config = json.loads(self.booster.save_config())["learner"]
+            n_groups = max(int(config["learner_model_param"]["num_class"]), 1)
+            per_tree = int(config["gradient_booster"]["gbtree_model_param"]["num_parallel_tree"])
+            self.tree_class = (np.arange(self.n_trees) // per_tree) % n_groups
+
+        self._explanations = ExplanationCache(
+            explainer, X_scaled, self.predictions, self.feature_cols, max_cached_explanations
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.postings.nbytes + self.indptr.nbytes + self._lut.nbytes + self.predictions.nbytes
+
+    def _pred_leaf(self, X_scaled: np.ndarray) -> np.ndarray:
+        leaves = self.booster.predict(xgb.DMatrix(X_scaled), pred_leaf=True)
+        return np.asarray(leaves, dtype=np.int32).reshape(len(X_scaled), -1)
+
+    def leaf_ids(self, row_scaled: np.ndarray) -> np.ndarray:
+        """
+        Dense leaf id per tree for one scaled row; -1 where no stored record reached that leaf.
+        """
+        nodes = self._pred_leaf(np.asarray(row_scaled, dtype=np.float32).reshape(1, -1))[0]
+        keys = np.arange(self.n_trees, dtype=np.int64) * self._n_nodes + nodes
+        ids = np.full(self.n_trees, -1, dtype=np.int64)
+        known = nodes < self._n_nodes
+        ids[known] = self._lut[keys[known]]
+        return ids
+
+    def trees_for(self, class_idx: int | None = None) -> int:
+        return self.n_trees if class_idx is None else int((self.tree_class == class_idx).sum())
+
+    def query(
+        self,
+        row_scaled: np.ndarray,
+        k: int = 10,
+        exclude: int | None = None,
+        class_idx: int | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (row indices, shared-leaf counts) of the k records sharing most leaves with the row.
+
+        `exclude` drops one stored row (the query itself); `class_idx` counts only that
+        class's trees. Ties are broken by row index.
+        """
+        with span("leaves.query"):
+            ids = self.leaf_ids(row_scaled)
+            if class_idx is not None:
+                ids = ids[self.tree_class == class_idx]
+            ids = ids[ids >= 0]
+            lists = [self.postings[self.indptr[i] : self.indptr[i + 1]] for i in ids]
+            rows = np.concatenate(lists) if lists else np.empty(0, dtype=self.postings.dtype)
+            counts = np.bincount(rows, minlength=self.n_rows).astype(np.int64)
+            if exclude is not None:
+                counts[exclude] = -1
+            top = top_k_by_count(counts, max(0, min(k, self.n_rows - (exclude is not None))))
+        return top, counts[top]
+
+    def explain_row(self, row_scaled: np.ndarray) -> Tuple[int, np.ndarray, float]:
+        """
+        Predicted class, SHAP values toward it and base value for a scaled row that is not stored.
+        """
+        row = np.asarray(row_scaled, dtype=np.float32).reshape(1, -1)
+        pred_class = int(predict_classes(self.booster, row)[0])
+        shap_1d, base = local_shap_1d_and_base_value(
+            explainer=self.explainer, instance_scaled=row, class_idx=pred_class, feature_cols=self.feature_cols
+        )
+        return pred_class, shap_1d, base
+
+    def explanations(self, indices: np.ndarray) -> Dict[int, Tuple[np.ndarray, float]]:
+        """
+        SHAP values (for each record's predicted class) and base value, computed on demand.
+        """
+        return self._explanations.get(indices)
@@ -0,0 +1,160 @@
+"""
+Multiprocess SHAP over a shared row matrix.
+
+Rows are split into shards and explained by a process pool. Each worker rebuilds the
+explainer once from the serialized booster (plus the background rows in interventional
+mode), attaches to the input matrix and the output tensor by name, and writes its shard's
+SHAP values in place. Only shard bounds and timings cross process boundaries; no large
+array is pickled.
+
+The input is shared through `multiprocessing.shared_memory` (or opened directly when it is
+already an `np.memmap`). The output is a (n_classes, n_rows, n_features) float32 tensor in
+shared memory, or in a memmap file when `out_path` is given, so `values[c]` is class c's
+SHAP matrix, in the layout `_global_shap_to_class_list` returns.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import xgboost as xgb
+
+from dashboard_app.background import background_data_of, explainer_from_data
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import _global_shap_to_class_list
+
+
+_WORKER: dict = {}
+
+
+def _share(arr: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple]:
+    """
+    Copy `arr` into a new shared memory block; returns (block, spec for `_open`).
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, ("shm", shm.name, arr.shape, arr.dtype.str)
+
+
+def _spec(arr: np.ndarray) -> tuple | None:
+    """
+    Spec for opening `arr` in another process without copying, if it is file-backed.
+    """
+    if not (isinstance(arr, np.memmap) and arr.filename is not None and arr.flags.c_contiguous):
+        return None
+    # Slices of a memmap inherit the mapping's `offset`; locate the view within the file.
+    root = arr
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    offset = root.offset + (arr.ctypes.data - root.ctypes.data)
+    return ("memmap", arr.filename, arr.shape, arr.dtype.str, offset)
+
+
+def _open(spec: tuple, mode: str = "r"):
+    """
+    Attach to an array described by `_share`/`_spec`; returns (array, handle to keep alive).
+    """
+    if spec[0] == "shm":
+        _, name, shape, dtype = spec
+        shm = shared_memory.SharedMemory(name=name)
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf), shm
+    _, path, shape, dtype, offset = spec
+    return np.memmap(path, dtype=np.dtype(dtype), mode=mode, shape=shape, offset=offset), None
+
+
+def _init_worker(booster_raw: bytearray, background: np.ndarray | None, feature_cols, x_spec, out_spec) -> None:
+    booster = xgb.Booster()
+    booster.load_model(booster_raw)
+    _WORKER["explainer"] = explainer_from_data(booster, background)
+    _WORKER["feature_cols"] = feature_cols
+    _WORKER["X"], _WORKER["x_handle"] = _open(x_spec)
+    _WORKER["out"], _WORKER["out_handle"] = _open(out_spec, mode="r+")
+
+
+def _explain_shard(start: int, stop: int) -> tuple[int, float]:
+    """
+    SHAP for rows [start, stop), written into the shared output; returns (rows, seconds).
+    """
+    t0 = time.perf_counter()
+    raw = _WORKER["explainer"].shap_values(np.asarray(_WORKER["X"][start:stop]))
+    out = _WORKER["out"]
+    for c, vals in enumerate(_global_shap_to_class_list(raw, _WORKER["feature_cols"])):
+        out[c, start:stop] = vals
+    return stop - start, time.perf_counter() - t0
+
+
+def _shards(n_rows: int, workers: int, max_shard_rows: int) -> list[tuple[int, int]]:
+    # About four shards per worker balances uneven shard times without much per-task overhead.
+    size = int(min(max_shard_rows, max(256, -(-n_rows // (workers * 4)))))
+    return [(start, min(start + size, n_rows)) for start in range(0, n_rows, size)]
+
+
+def parallel_shap_values(
+    model,
+    explainer,
+    X_scaled: np.ndarray,
+    feature_cols: list[str],
+    workers: int | None = None,
+    max_shard_rows: int = 8192,
+    out_path: str | None = None,
+) -> np.ndarray:
+    """
+    SHAP values for every row of `X_scaled` as a (n_classes, n_rows, n_features) float32 array.
+
+    `explainer` supplies the mode and background (the workers rebuild an equivalent one for
+    `model`). With `out_path` the result is a memmap file there; otherwise the shared
+    output is copied into a regular array and released. `workers=1` runs inline.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_rows = len(X_scaled)
+    n_classes = len(np.atleast_1d(explainer.expected_value))
+    shape = (n_classes, n_rows, len(feature_cols))
+
+    if workers == 1:
+        out = np.empty(shape, dtype=np.float32) if out_path is None else np.lib.format.open_memmap(
+            out_path, mode="w+", dtype=np.float32, shape=shape
+        )
+        with span("parallel_shap"):
+            for start, stop in _shards(n_rows, 1, max_shard_rows):
+                raw = explainer.shap_values(np.asarray(X_scaled[start:stop]))
+                for c, vals in enumerate(_global_shap_to_class_list(raw, feature_cols)):
+                    out[c, start:stop] = vals
+        return out
+
+    blocks: list[shared_memory.SharedMemory] = []
+    out = None
+    try:
+        x_spec = _spec(X_scaled)
+        if x_spec is None:
+            block, x_spec = _share(np.ascontiguousarray(X_scaled))
+            blocks.append(block)
+        if out_path is None:
+            block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 4)
+            blocks.append(block)
+            out = np.ndarray(shape, dtype=np.float32, buffer=block.buf)
+            out_spec = ("shm", block.name, shape, np.dtype(np.float32).str)
+        else:
+            out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=shape)
+            out_spec = _spec(out)
+
+        booster_raw = model.get_booster().save_raw("ubj") if hasattr(model, "get_booster") else model.save_raw("ubj")
+        initargs = (booster_raw, background_data_of(explainer), list(feature_cols), x_spec, out_spec)
+        with span("parallel_shap"), ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=initargs
+        ) as pool:
+            shards = _shards(n_rows, workers, max_shard_rows)
+            list(pool.map(_explain_shard, *zip(*shards)))
+
+        if out_path is None:
+            return out.copy()
+        out.flush()
+        return out
+    finally:
+        out = None  # drop the view into shared memory before its block is closed
+        for block in blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,177 @@
+"""
+Operator-triggered cProfile capture of a session's next reruns.
+
+Profiling is off unless `DASHBOARD_PROFILE_TOKEN` is set; then `?profile=<token>&reruns=N`
+arms it for the session that opened the URL. Each of the next N reruns of `app.main` (or
+fragment-only reruns) is profiled on the script thread, dumped to a timestamped `.prof`
+file under `PROFILE_DIR` and summarized for the sidebar panel. Background jobs run on
+worker threads and are not included.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hmac
+import pstats
+import re
+import sysconfig
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from dashboard_app.config import PROFILE_DIR, PROFILE_KEEP, PROFILE_MAX_RERUNS, PROFILE_RERUNS, PROFILE_TOKEN, PROFILE_TOP_N
+from dashboard_app.metrics import current_session_id
+
+
+PROFILING_ENABLED = bool(PROFILE_TOKEN)
+
+REMAINING_KEY = "profile_remaining"
+CAPTURES_KEY = "profile_captures"
+
+_NULL_SCOPE = nullcontext()
+_local = threading.local()
+_STDLIB = str(Path(sysconfig.get_paths()["stdlib"]))
+
+
+@dataclass(frozen=True)
+class ProfileCapture:
+    """
+    One profiled rerun: where its full profile was written and its heaviest functions.
+
+    `functions` holds the top functions by cumulative and by own time; `packages` sums own
+    time per top-level package, so it accounts for the whole rerun.
+    """
+
+    name: str
+    path: Path
+    started: float
+    seconds: float
+    n_calls: int
+    functions: pd.DataFrame
+    packages: pd.DataFrame
+
+
+def arm_from_query_params() -> None:
+    """
+    Start capturing this session's next reruns if the URL carries the operator token.
+
+    The parameters are removed from the URL, so a reload does not re-arm profiling.
+    """
+    if not PROFILING_ENABLED or "profile" not in st.query_params:
+        return
+    token = st.query_params.get("profile", "")
+    reruns = st.query_params.get("reruns", "")
+    del st.query_params["profile"]
+    if "reruns" in st.query_params:
+        del st.query_params["reruns"]
+    if not hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+        return
+    n = int(reruns) if reruns.isdigit() else PROFILE_RERUNS
+    st.session_state[REMAINING_KEY] = max(1, min(n, PROFILE_MAX_RERUNS))
+
+
+def remaining_reruns() -> int:
+    if not PROFILING_ENABLED:
+        return 0
+    return int(st.session_state.get(REMAINING_KEY, 0))
+
+
+def captures() -> list[ProfileCapture]:
+    if not PROFILING_ENABLED:
+        return []
+    return list(st.session_state.get(CAPTURES_KEY, []))
+
+
+def stop() -> None:
+    st.session_state[REMAINING_KEY] = 0
+
+
+def profile_scope(name: str):
+    """
+    Profile the enclosed rerun if this session is armed; a shared no-op otherwise.
+
+    Only the outermost scope on a thread profiles, so a fragment inside a profiled full
+    rerun is not profiled twice.
+    """
+    if not PROFILING_ENABLED or getattr(_local, "active", False) or remaining_reruns() <= 0:
+        return _NULL_SCOPE
+    return _capture(name)
+
+
+@contextmanager
+def _capture(name: str):
+    remaining = remaining_reruns()
+    st.session_state[REMAINING_KEY] = remaining - 1
+    profiler = cProfile.Profile()
+    started = time.time()
+    _local.active = True
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _local.active = False
+        capture = _save(profiler, name, started, time.time() - started)
+        kept = st.session_state.get(CAPTURES_KEY, [])
+        st.session_state[CAPTURES_KEY] = (kept + [capture])[-PROFILE_KEEP:]
+
+
+def _save(profiler: cProfile.Profile, name: str, started: float, seconds: float) -> ProfileCapture:
+    directory = Path(PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(started)) + f"{started % 1:.3f}"[1:]
+    session = re.sub(r"[^\w-]", "", current_session_id() or "local")[:8]
+    path = directory / f"{stamp}-{session}-{name}.prof"
+    profiler.dump_stats(path)
+    stats = pstats.Stats(profiler)
+    functions, packages = summarize(stats, PROFILE_TOP_N)
+    return ProfileCapture(name, path, started, seconds, stats.total_calls, functions, packages)
+
+
+def summarize(stats: pstats.Stats, top_n: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Top `top_n` functions by cumulative and by own time, and own time per package.
+    """
+    rows = [
+        {
+            "Function": f"{func} ({_short_path(filename)}:{line})" if filename != "~" else func,
+            "Package": _package(filename),
+            "Calls": calls,
+            "Own s": own,
+            "Cumulative s": cumulative,
+        }
+        for (filename, line, func), (_, calls, own, cumulative, _) in stats.stats.items()
+    ]
+    table = pd.DataFrame(rows, columns=["Function", "Package", "Calls", "Own s", "Cumulative s"])
+    top = pd.concat([table.nlargest(top_n, "Cumulative s"), table.nlargest(top_n, "Own s")])
+    functions = top[~top.index.duplicated()].sort_values("Cumulative s", ascending=False)
+    packages = (
+        table.groupby("Package", as_index=False)[["Own s"]].sum().sort_values("Own s", ascending=False)
+    )
+    return functions.reset_index(drop=True), packages.reset_index(drop=True)
+
+
+def _short_path(filename: str) -> str:
+    marker = "site-packages/"
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    if filename.startswith(_STDLIB):
+        return filename[len(_STDLIB) :].lstrip("/")
+    return filename
+
+
+def _package(filename: str) -> str:
+    if filename == "~":
+        return "builtins"
+    if "site-packages/" in filename:
+        return filename.split("site-packages/", 1)[1].split("/", 1)[0].removesuffix(".py")
+    if filename.startswith(_STDLIB):
+        return "stdlib"
+    if "/dashboard_app/" in filename:
+        return "dashboard_app"
+    return "other"
@@ -0,0 +1,340 @@
+"""
+Batch report generator: headless HTML/PDF briefings with the dashboard's charts.
+
+Run (from the project root, next to xgb_model.pkl and scaler.pkl):
+    python -m dashboard_app.reports --out reports --data regions/*.csv --workers 8
+
+Each `--data` CSV is one region (same columns as the bundled dataset; `HealthImpactClass`
+is optional). Without `--data` a single report set is built from the bundled dataset.
+Regions are fanned out over a process pool; each worker builds the explainer once (in the
+dashboard's `DASHBOARD_SHAP_MODE`, over the same summarized background) and,
+per region, computes SHAP in one batched call and renders every requested role's charts
+with the non-interactive Agg backend. With fewer regions than workers (e.g. one report
+over the whole bundled dataset, `--max-rows 0`), regions are rendered in turn and each
+region's rows are explained on the pool instead (`dashboard_app.parallel_shap`). HTML
+reports embed their images, so each output file is self-contained.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import html
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from matplotlib.backends.backend_pdf import PdfPages  # noqa: E402
+
+from dashboard_app.background import background_data_of, explainer_from_data  # noqa: E402
+from dashboard_app.config import CLASS_LABELS_SHORT, FEATURE_COLS, SHAP_EXPLAINER_MODE  # noqa: E402
+from dashboard_app.feature_store import uniform_sample_indices  # noqa: E402
+from dashboard_app.parallel_shap import parallel_shap_values  # noqa: E402
+from dashboard_app.shap_utils import _global_shap_to_class_list  # noqa: E402
+from dashboard_app.views.plots import (  # noqa: E402
+    make_aggregated_waterfall_figure,
+    make_global_shap_all_classes_stacked_bar_figure,
+    make_global_shap_beeswarm_figure,
+    make_global_shap_total_bar_figure,
+)
+
+
+REPORT_ROLES = ("Scientist", "Regulator", "Public Health Officer")
+REPORT_FORMATS = ("html", "pdf")
+
+
+@dataclass(frozen=True)
+class RegionData:
+    name: str
+    X: np.ndarray  # raw features in FEATURE_COLS order
+    y: np.ndarray | None = None
+
+
+@dataclass(frozen=True)
+class _Section:
+    title: str
+    figure: object | None = None
+    table: pd.DataFrame | None = None
+    note: str | None = None
+
+
+_WORKER: dict = {}
+
+
+def _init_worker(model, scaler, background: np.ndarray | None) -> None:
+    _WORKER["model"] = model
+    _WORKER["booster"] = model.get_booster()
+    _WORKER["scaler"] = scaler
+    _WORKER["explainer"] = explainer_from_data(model, background)
+
+
+def _role_sections(role: str, X_raw, per_class, base_values, groups) -> list[_Section]:
+    """
+    The charts each role sees in the dashboard, rebuilt from precomputed SHAP arrays.
+    """
+    mean_abs = np.stack([np.abs(v).mean(axis=0) for v in per_class], axis=0)
+    sections = [
+        _Section(
+            "Global SHAP Summary (All Classes)",
+            figure=make_global_shap_all_classes_stacked_bar_figure(FEATURE_COLS, mean_abs),
+        )
+    ]
+
+    if role == "Scientist":
+        for c, vals in enumerate(per_class):
+            sections.append(
+                _Section(
+                    f"Global SHAP - Class {c}",
+                    figure=make_global_shap_beeswarm_figure(vals, base_values[c], X_raw, FEATURE_COLS, c),
+                )
+            )
+    elif role == "Regulator":
+        sections.append(
+            _Section("Global SHAP - Total", figure=make_global_shap_total_bar_figure(FEATURE_COLS, mean_abs.mean(axis=0)))
+        )
+    elif role == "Public Health Officer":
+        in_class = groups == 0
+        if not in_class.any():
+            sections.append(_Section("Aggregated Local SHAP - Class 0", note="No Class 0 records in this region."))
+        else:
+            mean_shap = per_class[0][in_class].mean(axis=0)
+            sections.append(
+                _Section(
+                    f"Aggregated Local SHAP - Class 0 (n={int(in_class.sum())})",
+                    figure=make_aggregated_waterfall_figure(mean_shap, X_raw[in_class].mean(axis=0), FEATURE_COLS),
+                )
+            )
+            top = (
+                pd.DataFrame({"Feature": FEATURE_COLS, "Mean SHAP": mean_shap})
+                .assign(AbsMeanSHAP=lambda d: d["Mean SHAP"].abs())
+                .sort_values("AbsMeanSHAP", ascending=False)
+                .drop(columns=["AbsMeanSHAP"])
+                .head(10)
+            )
+            sections.append(_Section("Top factors (by |mean SHAP|)", table=top))
+    else:
+        raise ValueError(f"Unknown report role: {role}")
+    return sections
+
+
+def _figure_png(fig) -> str:
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=110, bbox_inches="tight", facecolor="white")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def _write_html(path: Path, title: str, summary: pd.DataFrame, sections: list[_Section]) -> None:
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif;max-width:1000px;margin:2em auto;color:#222}"
+        "img{max-width:100%}table{border-collapse:collapse}td,th{border:1px solid #ddd;padding:4px 8px}</style>",
+        f"</head><body><h1>{html.escape(title)}</h1>",
+        summary.to_html(index=False, float_format="{:.1f}".format),
+    ]
+    for section in sections:
+        parts.append(f"<h2>{html.escape(section.title)}</h2>")
+        if section.figure is not None:
+            parts.append(f"<img alt='{html.escape(section.title)}' src='data:image/png;base64,{_figure_png(section.figure)}'>")
+        if section.table is not None:
+            parts.append(section.table.to_html(index=False, float_format="{:.4f}".format))
+        if section.note:
+            parts.append(f"<p>{html.escape(section.note)}</p>")
+    parts.append("</body></html>")
+    path.write_text("\n".join(parts), encoding="utf-8")
+
+
+def _table_figure(title: str, table: pd.DataFrame):
+    fig, ax = plt.subplots(figsize=(10, 0.5 + 0.35 * (len(table) + 1)))
+    ax.axis("off")
+    ax.set_title(title, loc="left")
+    cells = table.round(4).astype(str).values
+    ax.table(cellText=cells, colLabels=list(table.columns), loc="upper left", cellLoc="left")
+    return fig
+
+
+def _write_pdf(path: Path, title: str, summary: pd.DataFrame, sections: list[_Section]) -> None:
+    with PdfPages(path) as pdf:
+        fig = _table_figure(title, summary.round(1))
+        pdf.savefig(fig)
+        plt.close(fig)
+        for section in sections:
+            if section.figure is not None:
+                # Beeswarms hold thousands of markers; rasterizing the scatter layers keeps
+                # PDF size and write time flat while text and axes stay vector.
+                for ax in section.figure.axes:
+                    for collection in ax.collections:
+                        collection.set_rasterized(True)
+                section.figure.suptitle(section.title, x=0.01, ha="left", fontsize=10)
+                pdf.savefig(section.figure, bbox_inches="tight", dpi=110)
+            if section.table is not None:
+                fig = _table_figure(section.title, section.table)
+                pdf.savefig(fig)
+                plt.close(fig)
+            if section.note:
+                fig = plt.figure(figsize=(10, 1.5))
+                fig.text(0.01, 0.5, f"{section.title}: {section.note}")
+                pdf.savefig(fig)
+                plt.close(fig)
+
+
+def render_region_reports(
+    region: RegionData,
+    roles: tuple[str, ...],
+    out_dir: str,
+    formats: tuple[str, ...] = REPORT_FORMATS,
+    max_rows: int = 1000,
+    shap_workers: int = 1,
+) -> tuple[list[str], float]:
+    """
+    Write every role's report for one region; returns (paths written, seconds).
+
+    Runs in a worker, or in the parent with `shap_workers` > 1 to explain the region's
+    rows on a pool of that size. `max_rows` <= 0 explains every row.
+    """
+    start = time.perf_counter()
+    if max_rows <= 0:
+        rows = np.arange(len(region.X))
+    else:
+        rows = np.sort(uniform_sample_indices(len(region.X), max_rows))
+    X_raw = np.asarray(region.X[rows], dtype=np.float64)
+    X_scaled = np.asarray(
+        _WORKER["scaler"].transform(pd.DataFrame(X_raw, columns=FEATURE_COLS)), dtype=np.float32
+    )
+
+    if shap_workers > 1:
+        per_class = list(
+            parallel_shap_values(_WORKER["model"], _WORKER["explainer"], X_scaled, FEATURE_COLS, workers=shap_workers)
+        )
+    else:
+        per_class = _global_shap_to_class_list(_WORKER["explainer"].shap_values(X_scaled), FEATURE_COLS)
+    base_values = np.asarray(_WORKER["explainer"].expected_value).reshape(-1)
+    predicted = np.asarray(_WORKER["booster"].inplace_predict(X_scaled)).argmax(axis=1)
+    groups = predicted if region.y is None else np.asarray(region.y)[rows].astype(int)
+
+    classes = sorted(CLASS_LABELS_SHORT)
+    summary = pd.DataFrame(
+        {
+            "Class": [f"Class {c}" for c in classes],
+            "Predicted (%)": [(predicted == c).mean() * 100 for c in classes],
+        }
+    )
+    if region.y is not None:
+        summary["Recorded (%)"] = [(groups == c).mean() * 100 for c in classes]
+
+    written = []
+    out = Path(out_dir)
+    for role in roles:
+        title = f"{role} Briefing - {region.name} ({len(rows)} of {len(region.X)} records)"
+        sections = _role_sections(role, X_raw, per_class, base_values, groups)
+        stem = out / f"{region.name}_{role.lower().replace(' ', '_')}"
+        if "html" in formats:
+            _write_html(stem.with_suffix(".html"), title, summary, sections)
+            written.append(str(stem.with_suffix(".html")))
+        if "pdf" in formats:
+            _write_pdf(stem.with_suffix(".pdf"), title, summary, sections)
+            written.append(str(stem.with_suffix(".pdf")))
+        for section in sections:
+            if section.figure is not None:
+                plt.close(section.figure)
+    return written, time.perf_counter() - start
+
+
+def generate_reports(
+    regions: list[RegionData],
+    model,
+    scaler,
+    out_dir: str,
+    roles: tuple[str, ...] = REPORT_ROLES,
+    formats: tuple[str, ...] = REPORT_FORMATS,
+    workers: int | None = None,
+    max_rows: int = 1000,
+    background: np.ndarray | None = None,
+) -> list[str]:
+    """
+    Render all regions' reports, one region per task on a process pool (inline when `workers` is 1).
+
+    SHAP is interventional over `background` (model-input rows) when given, else path-dependent.
+
+    With fewer regions than workers, a pool over regions would leave workers idle, so regions
+    are rendered in turn and each one's SHAP is sharded over rows on `workers` processes.
+    """
+    workers = workers or os.cpu_count() or 1
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    written: list[str] = []
+    if workers == 1 or len(regions) < workers:
+        _init_worker(model, scaler, background)
+        for region in regions:
+            paths, seconds = render_region_reports(region, roles, out_dir, formats, max_rows, shap_workers=workers)
+            print(f"{region.name}: {len(paths)} files in {seconds:.2f} s")
+            written.extend(paths)
+        return written
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model, scaler, background)) as pool:
+        futures = {
+            pool.submit(render_region_reports, region, roles, out_dir, formats, max_rows): region.name
+            for region in regions
+        }
+        for future in as_completed(futures):
+            paths, seconds = future.result()
+            print(f"{futures[future]}: {len(paths)} files in {seconds:.2f} s")
+            written.extend(paths)
+    return written
+
+
+def load_region(path: str) -> RegionData:
+    header = pd.read_csv(path, nrows=0).columns
+    label = ["HealthImpactClass"] if "HealthImpactClass" in header else []
+    df = pd.read_csv(path, usecols=FEATURE_COLS + label)
+    y = df["HealthImpactClass"].to_numpy() if label else None
+    return RegionData(Path(path).stem, df[FEATURE_COLS].to_numpy(dtype=np.float64), y)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="reports", help="Output directory.")
+    parser.add_argument("--data", nargs="*", default=[], help="One CSV per region (default: the bundled dataset).")
+    parser.add_argument("--roles", nargs="+", default=list(REPORT_ROLES), choices=REPORT_ROLES)
+    parser.add_argument("--formats", nargs="+", default=list(REPORT_FORMATS), choices=REPORT_FORMATS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (1 = inline).")
+    parser.add_argument("--max-rows", type=int, default=1000, help="Rows explained per region (0 = all).")
+    args = parser.parse_args(argv)
+
+    from dashboard_app.data import get_shap_explainer, load_model_and_data
+
+    xgb_model, scaler, _pipeline, _X, y, store = load_model_and_data.__wrapped__()
+    # The dashboard's explainer, so expected values and charts match what it shows.
+    background = background_data_of(get_shap_explainer.__wrapped__(xgb_model, SHAP_EXPLAINER_MODE, store))
+    if args.data:
+        regions = [load_region(path) for path in args.data]
+    else:
+        regions = [RegionData("all", np.asarray(store.buffer[0], dtype=np.float64), y.to_numpy())]
+
+    start = time.perf_counter()
+    written = generate_reports(
+        regions,
+        xgb_model,
+        scaler,
+        args.out,
+        tuple(args.roles),
+        tuple(args.formats),
+        args.workers,
+        args.max_rows,
+        background,
+    )
+    print(f"wrote {len(written)} files for {len(regions)} region(s) in {time.perf_counter() - start:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
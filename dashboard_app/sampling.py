@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import shap
+
+from dashboard_app.feature_store import shuffled_row_order
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import _global_shap_to_class_list
+
+
+def allocate_quotas(class_counts: np.ndarray, total: int, min_per_class: int = 0) -> np.ndarray:
+    """
+    Per-class sample sizes for a budget of `total` rows.
+
+    Each class gets `min_per_class` rows (or all of its rows if it has fewer); the rest
+    of the budget is split in proportion to class size, capped at each class's size.
+    """
+    counts = np.asarray(class_counts, dtype=np.int64)
+    total = int(min(total, counts.sum()))
+    quotas = np.minimum(counts, min_per_class)
+    if quotas.sum() >= total:
+        # Floors alone exceed the budget: split it evenly, smallest classes first.
+        quotas = np.zeros_like(counts)
+        for i, c in enumerate(np.argsort(counts, kind="stable")):
+            quotas[c] = min(counts[c], (total - quotas.sum()) // (len(counts) - i))
+        return quotas
+    while quotas.sum() < total:
+        room = counts - quotas
+        open_ = room > 0
+        extra = np.floor((total - quotas.sum()) * counts * open_ / counts[open_].sum()).astype(np.int64)
+        if extra.sum() == 0:
+            extra[np.argmax(room)] = 1
+        quotas += np.minimum(extra, room)
+    return quotas
+
+
+def stratified_row_order(y: np.ndarray, quotas: np.ndarray, seed: int = 42, min_per_class: int = 0) -> np.ndarray:
+    """
+    Row order whose prefixes follow the class quotas.
+
+    Within each class rows are shuffled. The first `min_per_class` rows of every class
+    come first (interleaved), then the rest of each class's quota interleaved at rates
+    proportional to what is left of it, then all rows beyond the quotas. So early
+    prefixes already hold each class's floor and the first `quotas.sum()` rows hold the
+    quotas exactly.
+    """
+    y = np.asarray(y)
+    rng = np.random.default_rng(seed)
+    keys = np.empty(len(y), dtype=np.float64)
+    for c, q in enumerate(quotas):
+        rows = rng.permutation(np.flatnonzero(y == c))
+        k = np.arange(len(rows)) + rng.random(len(rows))
+        floor = min(int(q), min_per_class)
+        keys[rows] = np.where(
+            k < floor,
+            k / max(floor, 1),
+            1.0 + (k - floor) / max(int(q) - floor, 1),
+        )
+    return np.argsort(keys, kind="stable")
+
+
+def stratum_weights(strata: np.ndarray, population_counts: np.ndarray) -> np.ndarray:
+    """
+    Per-row weights that reweight a stratified sample to population proportions (sum to 1).
+
+    A row of stratum c gets (N_c / N) / n_c, where n_c is how many sampled rows are in c.
+    """
+    strata = np.asarray(strata)
+    sampled = np.bincount(strata, minlength=len(population_counts))
+    share = np.asarray(population_counts, dtype=np.float64) / np.sum(population_counts)
+    per_row = np.divide(share, sampled, out=np.zeros_like(share), where=sampled > 0)[strata]
+    return per_row / per_row.sum()
+
+
+@dataclass(frozen=True)
+class AdaptiveSampleResult:
+    """
+    Outcome of `adaptive_shap_sample`.
+
+    `ci_halfwidth` is the confidence-interval half-width of each mean(|SHAP|) entry and
+    `rel_error` the largest half-width relative to its class's top mean(|SHAP|).
+    `weights` (aligned with `indices`, summing to 1) reweight the sample to population
+    class proportions; they are uniform when the sample is not stratified.
+    """
+
+    indices: np.ndarray
+    weights: np.ndarray
+    mean_abs_by_class: np.ndarray
+    ci_halfwidth: np.ndarray
+    rel_error: float
+    rank_stable: bool
+    converged: bool
+    n_batches: int
+    stratified: bool = False
+
+    @property
+    def size(self) -> int:
+        return len(self.indices)
+
+
+def _rankings(mean_abs_by_class: np.ndarray, top_k: int) -> np.ndarray:
+    return np.argsort(-mean_abs_by_class, axis=1, kind="stable")[:, :top_k]
+
+
+def adaptive_shap_sample(
+    explainer: "shap.TreeExplainer",
+    X_scaled: np.ndarray,
+    feature_cols: list[str],
+    tolerance: float = 0.05,
+    batch_size: int = 250,
+    min_size: int = 250,
+    max_size: int = 5000,
+    top_k: int = 5,
+    patience: int = 2,
+    z: float = 1.96,
+    seed: int = 42,
+    y: np.ndarray | None = None,
+    min_per_class: int = 0,
+) -> AdaptiveSampleResult:
+    """
+    Grow a SHAP sample in batches until global importance stabilizes.
+
+    Rows are drawn in a fixed shuffled order. After each batch the per-class mean(|SHAP|)
+    and its normal-approximation CI are updated from running sums. The sample stops
+    growing once, for every class:
+      - the CI half-width of every feature is within `tolerance` of that class's top
+        mean(|SHAP|), and
+      - the top-`top_k` feature ranking has been unchanged for `patience` batches,
+    or when `max_size` rows (or the whole dataset) have been used.
+
+    With labels `y`, rows are drawn stratified by class instead: each class's first
+    `min_per_class` rows come first, then quotas from `allocate_quotas` (see
+    `stratified_row_order`); the mean and CI are stratified estimates weighted back to
+    population proportions.
+    """
+    n_rows = len(X_scaled)
+    max_size = min(max_size, n_rows)
+    top_k = min(top_k, len(feature_cols))
+
+    if y is None:
+        order = shuffled_row_order(n_rows, seed)
+        strata = np.zeros(n_rows, dtype=np.int64)
+        population = np.array([n_rows])
+    else:
+        y = np.asarray(y).astype(np.int64)
+        population = np.bincount(y)
+        quotas = allocate_quotas(population, max_size, min_per_class)
+        order = stratified_row_order(y, quotas, seed, min_per_class)
+        strata = y
+    share = population / population.sum()
+
+    sums = sq_sums = None
+    counts = np.zeros(len(population), dtype=np.int64)
+    done = 0
+    stable_batches = 0
+    prev_rank = None
+    n_batches = 0
+    converged = False
+    while done < max_size:
+        stop = min(done + batch_size, max_size)
+        batch = order[done:stop]
+        with span("explainer.shap_values"):
+            raw = explainer.shap_values(X_scaled[batch])
+        abs_vals = np.abs(np.stack(_global_shap_to_class_list(raw, feature_cols), axis=0)).astype(np.float64)
+
+        # Running sums per stratum: (n_strata, n_classes, n_features).
+        if sums is None:
+            sums = np.zeros((len(population),) + abs_vals.shape[::2])
+            sq_sums = np.zeros_like(sums)
+        batch_strata = strata[batch]
+        for s_ in np.unique(batch_strata):
+            rows = batch_strata == s_
+            sums[s_] += abs_vals[:, rows].sum(axis=1)
+            sq_sums[s_] += np.square(abs_vals[:, rows]).sum(axis=1)
+        counts += np.bincount(batch_strata, minlength=len(population))
+        done = stop
+        n_batches += 1
+
+        # Stratified estimate over strata seen so far (weights renormalized among them).
+        seen = counts > 0
+        w = share * seen / share[seen].sum()
+        n = np.maximum(counts, 1)[:, None, None]
+        stratum_mean = sums / n
+        stratum_var = np.maximum(sq_sums / n - np.square(stratum_mean), 0.0) * n / np.maximum(n - 1, 1)
+        mean = np.einsum("s,scf->cf", w, stratum_mean)
+        halfwidth = z * np.sqrt(np.einsum("s,scf->cf", np.square(w), stratum_var / n))
+        scale = np.maximum(mean.max(axis=1, keepdims=True), 1e-12)
+        rel_error = float((halfwidth / scale).max())
+
+        rank = _rankings(mean, top_k)
+        stable_batches = stable_batches + 1 if prev_rank is not None and np.array_equal(rank, prev_rank) else 0
+        prev_rank = rank
+
+        if done >= min_size and rel_error <= tolerance and stable_batches >= patience:
+            converged = True
+            break
+
+    indices = np.sort(order[:done])
+    return AdaptiveSampleResult(
+        indices=indices,
+        weights=stratum_weights(strata[indices], population),
+        mean_abs_by_class=mean,
+        ci_halfwidth=halfwidth,
+        rel_error=rel_error,
+        rank_stable=stable_batches >= patience,
+        converged=converged,
+        n_batches=n_batches,
+        stratified=y is not None,
+    )
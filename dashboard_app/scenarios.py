@@ -0,0 +1,242 @@
+"""
+Population-wide policy scenarios: feature edits applied to every record, then re-scored.
+
+A scenario scales, shifts and caps features in raw units (e.g. "PM2.5 -20%, NO2 -10%").
+Every record is re-scored, so class distributions and transition matrices are exact. Several
+scenarios are stacked into one batch and scored with a single in-place booster call per
+chunk of rows. SHAP shifts are estimated on a weighted subsample of the SHAP sample, with
+all scenarios explained in one `shap_values` call.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+import shap
+
+from dashboard_app.inference import predict_classes, predict_proba
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import _global_shap_to_class_list
+
+
+@dataclass(frozen=True)
+class FeatureEdit:
+    """
+    `x -> min(x * scale + shift, cap)` for one feature, in raw units (cap None = no cap).
+    """
+
+    feature: str
+    scale: float = 1.0
+    shift: float = 0.0
+    cap: float | None = None
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        out = np.asarray(values, dtype=np.float64) * self.scale + self.shift
+        if self.cap is not None:
+            np.minimum(out, self.cap, out=out)
+        return out
+
+    def describe(self) -> str:
+        parts = []
+        if self.scale != 1.0:
+            parts.append(f"{(self.scale - 1) * 100:+.0f}%")
+        if self.shift:
+            parts.append(f"{self.shift:+g}")
+        if self.cap is not None:
+            parts.append(f"cap {self.cap:g}")
+        return f"{self.feature} {' '.join(parts) or 'unchanged'}"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    edits: tuple[FeatureEdit, ...]
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    """
+    One scenario scored on every record.
+
+    `transitions[i, j]` counts records predicted class i at baseline and class j under the
+    scenario. `shap_mean` is the weighted mean signed SHAP (n_classes, n_features) over the
+    engine's SHAP rows, comparable with `ScenarioEngine.baseline_shap`.
+    """
+
+    scenario: Scenario
+    transitions: np.ndarray
+    proba_mean: np.ndarray
+    shap_mean: np.ndarray
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.transitions.sum(axis=0)
+
+    @property
+    def n_changed(self) -> int:
+        return int(self.transitions.sum() - np.trace(self.transitions))
+
+    def transition_table(self) -> pd.DataFrame:
+        """
+        Row: baseline class, column: scenario class, value: record count.
+        """
+        labels = [f"Class {c}" for c in range(len(self.transitions))]
+        return pd.DataFrame(self.transitions, index=labels, columns=labels)
+
+
+class ScenarioEngine:
+    """
+    Applies scenarios to the shared store and re-scores every record.
+
+    Baseline predictions and SHAP are computed once. Edited columns are recomputed from
+    the raw matrix in float64 and scaled like `scaler.transform`; the other columns are
+    copied from `X_scaled`. Results are memoized per set of edits in a bounded LRU shared
+    by all sessions.
+    """
+
+    def __init__(
+        self,
+        model,
+        explainer: "shap.TreeExplainer",
+        scaler,
+        store,
+        shap_rows: np.ndarray,
+        shap_weights: np.ndarray | None = None,
+        chunk_rows: int = 262_144,
+        cache_size: int = 64,
+    ) -> None:
+        self.booster = model.get_booster()
+        self.explainer = explainer
+        self.feature_cols = list(store.feature_cols)
+        self.raw = store.buffer[0]
+        self.X_scaled = store.X_scaled
+        self.chunk_rows = chunk_rows
+        self._mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self._scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        self.shap_rows = np.sort(np.asarray(shap_rows))
+        order = np.argsort(np.asarray(shap_rows), kind="stable")
+        weights = np.ones(len(shap_rows)) if shap_weights is None else np.asarray(shap_weights, dtype=np.float64)
+        self.shap_weights = weights[order] / weights.sum()
+
+        with span("scenarios.baseline"):
+            self.baseline_pred = predict_classes(self.booster, self.X_scaled)
+            self.n_classes = len(np.atleast_1d(explainer.expected_value))
+            self.baseline_counts = np.bincount(self.baseline_pred, minlength=self.n_classes)
+            self.baseline_proba = predict_proba(self.booster, self.X_scaled).mean(axis=0, dtype=np.float64)
+            self.baseline_shap = self._mean_shap([np.ascontiguousarray(self.X_scaled[self.shap_rows])])[0]
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[tuple[FeatureEdit, ...], ScenarioResult]" = OrderedDict()
+        self._cache_size = cache_size
+
+    def transform(self, scenario: Scenario, rows: slice | np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Scaled float32 matrix of `rows` with the scenario's edits applied.
+        """
+        X = self.X_scaled[rows]
+        if out is None:
+            out = np.empty(X.shape, dtype=np.float32)
+        out[:] = X
+        for edit in scenario.edits:
+            j = self.feature_cols.index(edit.feature)
+            out[:, j] = (edit.apply(self.raw[rows, j]) - self._mean[j]) / self._scale[j]
+        return out
+
+    def evaluate(self, scenarios: Sequence[Scenario]) -> list[ScenarioResult]:
+        """
+        Results for `scenarios`, scoring the ones not cached together in one pass.
+
+        Results are cached by edits, so renaming a scenario does not re-score it.
+        """
+        with self._lock:
+            missing = list({s.edits: s for s in scenarios if s.edits not in self._cache}.values())
+        if missing:
+            with span("scenarios.evaluate"):
+                results = self._score(missing)
+            with self._lock:
+                self._cache.update((s.edits, r) for s, r in zip(missing, results))
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        with self._lock:
+            cached = []
+            for s in scenarios:
+                self._cache.move_to_end(s.edits)
+                cached.append(replace(self._cache[s.edits], scenario=s))
+        return cached
+
+    def _score(self, scenarios: list[Scenario]) -> list[ScenarioResult]:
+        k, n_rows, n_features = len(scenarios), len(self.X_scaled), len(self.feature_cols)
+        transitions = np.zeros((k, self.n_classes * self.n_classes), dtype=np.int64)
+        proba_sums = np.zeros((k, self.n_classes))
+
+        # Scenarios are stacked row-block by row-block: one booster call scores every
+        # scenario on a chunk, and the batch stays under `chunk_rows` rows.
+        rows_per_chunk = max(1, self.chunk_rows // k)
+        batch = np.empty((min(rows_per_chunk, n_rows) * k, n_features), dtype=np.float32)
+        for start in range(0, n_rows, rows_per_chunk):
+            stop = min(start + rows_per_chunk, n_rows)
+            m = stop - start
+            view = batch[: m * k].reshape(k, m, n_features)
+            for i, scenario in enumerate(scenarios):
+                self.transform(scenario, slice(start, stop), out=view[i])
+            with span("scenarios.predict"):
+                proba = predict_proba(self.booster, batch[: m * k], chunk_rows=m * k).reshape(k, m, -1)
+            pred = proba.argmax(axis=2)
+            base = self.baseline_pred[start:stop].astype(np.int64)
+            for i in range(k):
+                transitions[i] += np.bincount(
+                    base * self.n_classes + pred[i], minlength=self.n_classes * self.n_classes
+                )
+            proba_sums += proba.sum(axis=1, dtype=np.float64)
+
+        shap_mean = self._mean_shap([self.transform(s, self.shap_rows) for s in scenarios])
+        return [
+            ScenarioResult(
+                scenario,
+                transitions[i].reshape(self.n_classes, self.n_classes),
+                proba_sums[i] / n_rows,
+                shap_mean[i],
+            )
+            for i, scenario in enumerate(scenarios)
+        ]
+
+    def _mean_shap(self, blocks: list[np.ndarray]) -> np.ndarray:
+        """
+        Weighted mean signed SHAP (n_classes, n_features) of each block, in one explainer call.
+        """
+        n = len(self.shap_rows)
+        with span("explainer.shap_values"):
+            raw = self.explainer.shap_values(np.concatenate(blocks))
+        by_class = np.stack(_global_shap_to_class_list(raw, self.feature_cols))  # (n_classes, k*n, n_features)
+        by_class = by_class.reshape(self.n_classes, len(blocks), n, -1)
+        return np.einsum("ckrf,r->kcf", by_class, self.shap_weights)
+
+    def class_distribution(self, results: Sequence[ScenarioResult]) -> pd.DataFrame:
+        """
+        Share of records per predicted class (%): baseline, then one column per scenario.
+        """
+        n_rows = len(self.baseline_pred)
+        table = {"Baseline": self.baseline_counts / n_rows * 100}
+        for r in results:
+            table[r.scenario.name] = r.counts / n_rows * 100
+        return pd.DataFrame(table, index=[f"Class {c}" for c in range(self.n_classes)])
+
+    def shap_shift_table(self, result: ScenarioResult, class_idx: int) -> pd.DataFrame:
+        """
+        Mean SHAP toward `class_idx` per feature at baseline and under the scenario.
+        """
+        before, after = self.baseline_shap[class_idx], result.shap_mean[class_idx]
+        return pd.DataFrame(
+            {
+                "Feature": self.feature_cols,
+                "Mean SHAP (baseline)": before,
+                "Mean SHAP (scenario)": after,
+                "Shift": after - before,
+            }
+        ).sort_values("Shift", key=np.abs, ascending=False)
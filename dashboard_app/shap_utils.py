@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from typing import Tuple
+from typing import Callable, Iterator, Tuple
 
 import numpy as np
 import shap
 
+from dashboard_app.metrics import span
+
 
 def local_shap_1d_and_base_value(
     explainer: "shap.TreeExplainer",
@@ -15,7 +17,8 @@ def local_shap_1d_and_base_value(
     """
     Normalize SHAP outputs to (n_features,) for a single instance and a class.
     """
-    raw = explainer.shap_values(instance_scaled)
+    with span("explainer.shap_values"):
+        raw = explainer.shap_values(instance_scaled)
     n_features = len(feature_cols)
 
     if isinstance(raw, list):
@@ -69,6 +72,22 @@ def _global_shap_to_class_list(
     raise ValueError(f"Unexpected SHAP shape for global explanation: {arr.shape}")
 
 
+def class_shap_values_and_base(
+    explainer: "shap.TreeExplainer",
+    X_scaled: np.ndarray,
+    feature_cols: list[str],
+    class_idx: int,
+) -> Tuple[np.ndarray, float]:
+    """
+    SHAP values for one class, (n_samples, n_features), and that class's base value.
+    """
+    with span("explainer.shap_values"):
+        raw = explainer.shap_values(X_scaled)
+    shap_vals_2d = _global_shap_to_class_list(raw, feature_cols)[class_idx]
+    base_val = np.asarray(explainer.expected_value).reshape(-1)[class_idx]
+    return shap_vals_2d, float(base_val)
+
+
 def global_shap_total_exp(
     explainer: "shap.TreeExplainer",
     X_scaled: np.ndarray,
@@ -81,7 +100,8 @@ def global_shap_total_exp(
     Reason: beeswarm requires (n_samples, n_features). For multi-class, we aggregate
     by taking the mean SHAP value across classes (signed) for beeswarm-like view.
     """
-    raw = explainer.shap_values(X_scaled)
+    with span("explainer.shap_values"):
+        raw = explainer.shap_values(X_scaled)
     per_class = _global_shap_to_class_list(raw, feature_cols)
     shap_vals_total = np.mean(np.stack(per_class, axis=0), axis=0)  # (n_samples, n_features)
 
@@ -100,27 +120,73 @@ def global_shap_total_bar_values(
     explainer: "shap.TreeExplainer",
     X_scaled: np.ndarray,
     feature_cols: list[str],
+    weights: np.ndarray | None = None,
 ) -> np.ndarray:
     """
     Return mean(|SHAP|) aggregated across classes and samples: (n_features,).
+
+    `weights` (one per row) turn the sample mean into a weighted one, e.g. to reweight a
+    class-stratified sample back to population proportions.
     """
-    raw = explainer.shap_values(X_scaled)
-    per_class = _global_shap_to_class_list(raw, feature_cols)
-    stacked = np.stack(per_class, axis=0)  # (n_classes, n_samples, n_features)
-    return np.mean(np.abs(stacked), axis=(0, 1))
+    return global_mean_abs_by_class(explainer, X_scaled, feature_cols, weights).mean(axis=0)
 
 
 def global_mean_abs_by_class(
     explainer: "shap.TreeExplainer",
     X_scaled: np.ndarray,
     feature_cols: list[str],
+    weights: np.ndarray | None = None,
 ) -> np.ndarray:
     """
     Return mean(|SHAP|) per class: shape (n_classes, n_features).
 
-    Useful for 'all classes at once' stacked bar plots.
+    Useful for 'all classes at once' stacked bar plots. `weights` as in
+    `global_shap_total_bar_values`.
     """
-    raw = explainer.shap_values(X_scaled)
+    with span("explainer.shap_values"):
+        raw = explainer.shap_values(X_scaled)
     per_class = _global_shap_to_class_list(raw, feature_cols)  # list[(n_samples, n_features)]
-    return np.stack([np.mean(np.abs(v), axis=0) for v in per_class], axis=0)
+    return np.stack([np.average(np.abs(v), axis=0, weights=weights) for v in per_class], axis=0)
 
+
+def iter_global_mean_abs_by_class(
+    explainer: "shap.TreeExplainer",
+    X_scaled: np.ndarray,
+    feature_cols: list[str],
+    chunk_size: int = 256,
+    first_chunk_size: int = 64,
+    order: np.ndarray | None = None,
+    weights: np.ndarray | None = None,
+    on_chunk: Callable[[list[np.ndarray]], None] | None = None,
+) -> Iterator[Tuple[np.ndarray, int]]:
+    """
+    Stream mean(|SHAP|) per class over row chunks.
+
+    Yields (running mean_abs_by_class (n_classes, n_features), rows_done) after each chunk.
+    The first chunk is small so a usable estimate arrives quickly. `order` (row indices)
+    lets callers walk a large matrix in a shuffled order so early means are unbiased.
+    `weights` (one per row of `X_scaled`) give a running weighted mean. Once all rows are
+    consumed the result equals `global_mean_abs_by_class`. `on_chunk` receives each
+    chunk's per-class SHAP values, e.g. to keep them for a beeswarm.
+    """
+    n_rows = len(order) if order is not None else len(X_scaled)
+    sums = None
+    total_weight = 0.0
+    done = 0
+    while done < n_rows:
+        size = first_chunk_size if done == 0 else chunk_size
+        stop = min(done + size, n_rows)
+        rows = order[done:stop] if order is not None else slice(done, stop)
+        w = np.ones(stop - done) if weights is None else np.asarray(weights, dtype=np.float64)[rows]
+
+        with span("explainer.shap_values"):
+            raw = explainer.shap_values(X_scaled[rows])
+        per_class = _global_shap_to_class_list(raw, feature_cols)
+        if on_chunk is not None:
+            on_chunk(per_class)
+        chunk_sums = np.stack([w @ np.abs(v).astype(np.float64) for v in per_class], axis=0)
+
+        sums = chunk_sums if sums is None else sums + chunk_sums
+        total_weight += w.sum()
+        done = stop
+        yield sums / total_weight, done
@@ -51,6 +51,23 @@ def apply_light_theme_css() -> None:
             margin: 1rem 0;
             color: #000000;
         }
+        /* Explanation cards (every role view) */
+        .explanation-card {
+            background-color: rgba(248, 249, 250, 0.85);
+            border: 1px solid rgba(0, 0, 0, 0.08);
+            border-radius: 10px;
+            padding: 16px 18px;
+            box-shadow: 0 1px 2px rgba(0, 0, 0, 0.06);
+        }
+        .explanation-card h4 {
+            margin: 0 0 10px 0;
+        }
+        .explanation-card p {
+            margin: 0 0 10px 0;
+        }
+        .explanation-card p:last-child {
+            margin-bottom: 0;
+        }
         .warning-box {
             background-color: #ffebee;
             padding: 1rem;
@@ -119,3 +136,18 @@ def apply_light_theme_css() -> None:
         unsafe_allow_html=True,
     )
 
+
+
+def render_explanation_card(markdown_text: str, title: str = "Interpretation") -> None:
+    """
+    Boxed explanation text; styled by `.explanation-card` in `apply_light_theme_css`.
+    """
+    st.markdown(
+        f"""
+<div class="explanation-card">
+<h4>{title}</h4>
+{markdown_text}
+</div>
+        """,
+        unsafe_allow_html=True,
+    )
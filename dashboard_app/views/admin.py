@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+from dashboard_app.config import PROFILE_TOP_N
+from dashboard_app.feature_store import FeatureStore, memory_report
+from dashboard_app.metrics import METRICS_DIR, REGISTRY
+from dashboard_app.profiling import captures, remaining_reruns, stop
+
+
+def render_metrics_panel(spans: list[tuple[str, float]]) -> None:
+    """
+    Debug sidebar panel: this rerun's stage timings + process-wide histograms.
+    """
+    with st.sidebar.expander("⏱️ Stage Timings (debug)"):
+        st.markdown("**This rerun:**")
+        if spans:
+            st.dataframe(
+                pd.DataFrame(
+                    {"Stage": [s for s, _ in spans], "ms": [round(t * 1000, 1) for _, t in spans]}
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.markdown("_No stages recorded yet._")
+
+        st.markdown("**All sessions (process):**")
+        rows = [
+            {
+                "Stage": stage,
+                "Count": hist.count,
+                "Mean ms": round(hist.total / hist.count * 1000, 1),
+                "p50 ms": round(hist.quantile(0.5) * 1000, 1),
+                "p95 ms": round(hist.quantile(0.95) * 1000, 1),
+                "Max ms": round(hist.max * 1000, 1),
+            }
+            for stage, hist in sorted(REGISTRY.snapshot().items())
+            if hist.count
+        ]
+        if rows:
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        st.caption(f"Exported to `{METRICS_DIR}/stage_timings.jsonl` and `{METRICS_DIR}/dashboard_metrics.prom`.")
+
+
+def render_memory_panel(store: FeatureStore, extra_shared: dict) -> None:
+    """
+    Debug sidebar panel: bytes held by the shared store, this session and the process.
+    """
+    report = memory_report(store, st.session_state, extra_shared)
+
+    def mb(n: int) -> str:
+        return f"{n / 2**20:.2f} MB"
+
+    with st.sidebar.expander("🧠 Memory (debug)"):
+        st.markdown(f"**Shared (per process):** {mb(report['shared_total'])}")
+        for name, n in report["shared"].items():
+            st.markdown(f"- {name}: {mb(n)}")
+        st.markdown(f"**This session:** {mb(report['session_total'])} in {len(report['session'])} state keys")
+        if report["process_rss"] is not None:
+            st.markdown(f"**Process RSS:** {mb(report['process_rss'])}")
+
+
+def render_profile_panel() -> None:
+    """
+    Operator sidebar panel: profiling status and the top functions of each captured rerun.
+    """
+    with st.sidebar.expander("🔍 Profiles (operator)", expanded=True):
+        remaining = remaining_reruns()
+        if remaining:
+            st.markdown(f"Capturing the next **{remaining}** rerun(s) of this session.")
+            if st.button("Stop capturing", key="profile_stop"):
+                stop()
+                st.rerun()
+        else:
+            st.markdown("Not capturing.")
+
+        kept = captures()
+        if not kept:
+            st.markdown("_No profiles captured yet._")
+            return
+        idx = st.selectbox(
+            "Capture:",
+            list(range(len(kept)))[::-1],
+            format_func=lambda i: f"{time.strftime('%H:%M:%S', time.localtime(kept[i].started))} "
+            f"{kept[i].name} ({kept[i].seconds:.2f} s)",
+            key="profile_capture",
+        )
+        capture = kept[idx]
+        order = st.radio("Sort by:", ["Cumulative s", "Own s"], horizontal=True, key="profile_sort")
+        st.dataframe(
+            capture.functions.sort_values(order, ascending=False).head(PROFILE_TOP_N).style.format(
+                {"Own s": "{:.3f}", "Cumulative s": "{:.3f}"}
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.markdown("**Own time by package:**")
+        st.dataframe(
+            capture.packages.style.format({"Own s": "{:.3f}"}), use_container_width=True, hide_index=True
+        )
+        st.caption(f"{capture.n_calls:,} calls. Full profile: `{capture.path}` (`python -m pstats {capture.path}`).")
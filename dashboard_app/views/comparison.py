@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import streamlit as st
+
+from dashboard_app.config import CANDIDATE_MODEL_PATH
+from dashboard_app.data import get_model_comparison, get_model_version, load_candidate_model
+from dashboard_app.views.fragments import panel
+
+
+@panel("model_comparison")
+def model_comparison_view(xgb_model, explainer, scaler, store, shap_rows, shap_weights, feature_cols):
+    st.markdown('<p class="role-header">🔀 Model Comparison View</p>', unsafe_allow_html=True)
+    st.markdown(
+        '<div class="info-box">Compare a retrained model version against the deployed model on the same data.</div>',
+        unsafe_allow_html=True,
+    )
+
+    path = st.text_input("Candidate model file:", value=CANDIDATE_MODEL_PATH, key="cmp_path")
+    if not os.path.isfile(path):
+        st.info(f"No model file at '{path}'. Save the retrained model there (same format as xgb_model.pkl).")
+        return
+
+    try:
+        candidate, candidate_scaler, candidate_explainer = load_candidate_model(
+            path, os.path.getmtime(path), xgb_model, scaler, explainer
+        )
+    except Exception as e:
+        st.error(f"Could not load candidate model: {e}")
+        return
+    if not (
+        np.allclose(candidate_scaler.mean_, scaler.mean_) and np.allclose(candidate_scaler.scale_, scaler.scale_)
+    ):
+        st.error("The candidate model uses a different scaler; both versions must share the deployed scaler.")
+        return
+
+    version_a, version_b = get_model_version(xgb_model), get_model_version(candidate)
+    if version_a == version_b:
+        st.info("The candidate is identical to the deployed model.")
+        return
+
+    all_rows = st.checkbox(
+        "Explain every row (slower)",
+        value=False,
+        key="cmp_all_rows",
+        help=f"By default SHAP is compared on the {len(shap_rows)}-row SHAP sample; predictions always cover every row.",
+    )
+    with st.spinner("Scoring and explaining both versions..."):
+        result = get_model_comparison(
+            xgb_model, candidate, explainer, candidate_explainer, store, shap_rows, shap_weights,
+            version_a, version_b, store.fingerprint, all_rows,
+        )
+
+    st.markdown(
+        f"**Baseline** `{version_a[:12]}` vs **candidate** `{version_b[:12]}` · "
+        f"{len(result.pred_a):,} rows, {result.agreement * 100:.1f}% same predicted class"
+    )
+
+    col_rank, col_conf = st.columns([3, 2], gap="large")
+    with col_rank:
+        st.subheader("Global SHAP Rank Shifts")
+        target = st.selectbox(
+            "Importance:",
+            ["Total"] + [str(c) for c in range(result.mean_abs_a.shape[0])],
+            format_func=lambda v: v if v == "Total" else f"Class {v}",
+            key="cmp_rank_class",
+        )
+        table = result.rank_shift_table(feature_cols, None if target == "Total" else int(target))
+        st.dataframe(
+            table.style.format({"mean|SHAP| baseline": "{:.4f}", "mean|SHAP| candidate": "{:.4f}"}),
+            use_container_width=True,
+            hide_index=True,
+        )
+    with col_conf:
+        st.subheader("Predicted Class: Baseline vs Candidate")
+        st.dataframe(result.confusion(), use_container_width=True)
+
+    st.subheader("Rows Whose Explanations Changed Most")
+    k = st.slider("Rows to show:", 5, 100, 20, key="cmp_top_k")
+    st.dataframe(result.top_changed_rows(feature_cols, k), use_container_width=True, hide_index=True)
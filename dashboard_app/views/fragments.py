@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import functools
+
+import streamlit as st
+
+from dashboard_app.config import FRAGMENTS_ENABLED
+from dashboard_app.metrics import current_session_id, fragment_scope
+from dashboard_app.profiling import profile_scope
+
+
+def panel(name: str):
+    """
+    Make a view function an independently rerunnable `st.fragment` named `name`.
+
+    A widget inside the panel then reruns only the panel, with the arguments it was last
+    called with, so everything a panel reads must be passed in. Panels may nest; the
+    innermost one containing the widget reruns. Each run is timed by `fragment_scope`, and
+    fragment-only reruns are profiled like full ones when profiling is armed.
+    """
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with profile_scope(f"fragment.{name}"), fragment_scope(name, {"session": current_session_id()}):
+                return fn(*args, **kwargs)
+
+        return st.fragment(run) if FRAGMENTS_ENABLED else run
+
+    return decorate
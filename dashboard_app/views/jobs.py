@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable
+
+import streamlit as st
+
+from dashboard_app.jobs import CANCELLED, DONE, TIMED_OUT
+
+
+def submit_job(scheduler, state_key: str, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> None:
+    """
+    Submit (or join) a job and remember its id in this session under `state_key`.
+
+    A job this session was still waiting on under the same `state_key` is withdrawn first.
+    """
+    previous = st.session_state.get(state_key)
+    job = scheduler.submit(key, fn, *args, **kwargs)
+    if previous is not None:
+        # Joining the job we already wait on counted us twice; otherwise drop the old one.
+        scheduler.cancel(previous)
+    st.session_state[state_key] = job.id
+
+
+def render_job(scheduler, state_key: str, render_result: Callable[[Any], None], poll_interval: float = 1.0) -> None:
+    """
+    Show the outcome of this session's job under `state_key`, or poll it while it runs.
+
+    Polling runs in a fragment, so only the progress bar reruns every `poll_interval`
+    seconds; a full rerun is triggered once the job finishes to render its result.
+    """
+    job_id = st.session_state.get(state_key)
+    if job_id is None:
+        return
+    job = scheduler.get(job_id)
+    if job is None:
+        # Evicted from the result cache; the user can simply resubmit.
+        del st.session_state[state_key]
+        return
+
+    if not job.done:
+        _poll_job(scheduler, state_key, poll_interval)
+    elif job.status == DONE:
+        render_result(job.result)
+    elif job.status == CANCELLED:
+        st.info("Cancelled.")
+    elif job.status == TIMED_OUT:
+        st.warning(f"{job.error}. Try a smaller request.")
+    else:
+        st.error(f"Computation failed: {job.error}")
+
+
+def _poll_job(scheduler, state_key: str, poll_interval: float) -> None:
+    @st.fragment(run_every=poll_interval)
+    def poll() -> None:
+        job = scheduler.get(st.session_state.get(state_key, ""))
+        if job is None or job.done:
+            st.rerun()
+        waiting = "queued" if job.started is None else f"{job.elapsed:.0f}s"
+        st.progress(job.progress, text=f"{job.message or 'Working...'} ({waiting})")
+        if st.button("Cancel", key=f"{state_key}_cancel"):
+            scheduler.cancel(job.id)
+            del st.session_state[state_key]
+            st.rerun()
+
+    poll()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+from dashboard_app.drift import PSI_MAJOR, PSI_MODERATE, DriftMonitor
+from dashboard_app.views.fragments import panel
+
+
+@panel("monitoring")
+def monitoring_view(explainer, drift_reference, scaler, feature_cols):
+    st.markdown('<p class="role-header">📡 Data Monitor View</p>', unsafe_allow_html=True)
+    st.markdown(
+        '<div class="info-box">Compare incoming data and its SHAP explanations against the training distribution.</div>',
+        unsafe_allow_html=True,
+    )
+
+    monitor = st.session_state.get("drift_monitor")
+    if monitor is None or monitor.reference is not drift_reference:
+        monitor = DriftMonitor(reference=drift_reference, scaler=scaler, explainer=explainer)
+        st.session_state["drift_monitor"] = monitor
+    processed = st.session_state.setdefault("drift_processed_files", set())
+
+    st.subheader("📥 Incoming Batches")
+    uploads = st.file_uploader(
+        "Upload new data (CSV with the model's feature columns):",
+        type=["csv"],
+        accept_multiple_files=True,
+        key="drift_uploads",
+    )
+    chunk_rows = st.number_input(
+        "Rows per batch:", min_value=1000, max_value=1_000_000, value=50_000, step=1000, key="drift_chunk_rows"
+    )
+
+    for upload in uploads or []:
+        if upload.file_id in processed:
+            continue
+        # A file counts all at once or not at all: batches already added are rolled back on error.
+        snapshot = monitor.snapshot()
+        with st.spinner(f"Processing {upload.name}..."):
+            try:
+                for chunk in pd.read_csv(upload, usecols=feature_cols, chunksize=int(chunk_rows)):
+                    monitor.update(chunk.dropna())
+            except ValueError as e:
+                monitor.restore(snapshot)
+                st.error(f"Could not read {upload.name}: {e}")
+                continue
+        processed.add(upload.file_id)
+
+    if st.button("Reset monitor", key="drift_reset"):
+        monitor.reset()
+        # Files still in the uploader are not fed again; upload them anew to re-monitor them.
+        processed.clear()
+        processed.update(upload.file_id for upload in uploads or [])
+
+    if monitor.rows_seen == 0:
+        st.info("No incoming data yet. Upload one or more CSV files to start monitoring.")
+        return
+
+    st.markdown(f"**Rows monitored:** {monitor.rows_seen:,} in {monitor.batches_seen} batches")
+    st.caption(
+        f"PSI < {PSI_MODERATE} stable · {PSI_MODERATE}–{PSI_MAJOR} moderate shift · > {PSI_MAJOR} major shift. "
+        "KS is the largest gap between the binned CDFs."
+    )
+
+    col_feat, col_hist = st.columns([1, 1], gap="large")
+    with col_feat:
+        st.subheader("Feature Drift")
+        st.dataframe(
+            monitor.feature_scores().style.format(
+                {"PSI": "{:.3f}", "KS": "{:.3f}", "Median (scaled) ref": "{:.2f}", "Median (scaled) now": "{:.2f}"}
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+    with col_hist:
+        st.subheader("Per-Batch Drift")
+        history = monitor.history_frame()
+        if history is not None:
+            st.line_chart(history[["batch_max_feature_psi", "cumulative_max_shap_psi"]])
+
+    st.subheader("Explanation (SHAP) Drift by Class")
+    st.dataframe(
+        monitor.shap_scores().style.format("{:.3f}").background_gradient(cmap="Reds", vmin=0.0, vmax=PSI_MAJOR),
+        use_container_width=True,
+    )
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import streamlit as st
+
+from dashboard_app.data import get_model_version, get_partial_dependence
+from dashboard_app.inference import n_classes
+from dashboard_app.views.fragments import panel
+from dashboard_app.views.plots import plot_pdp_all_classes, plot_pdp_ice
+
+
+@panel("pdp")
+def render_pdp_section(model, store, scaler, feature_cols, key_prefix: str) -> None:
+    """
+    Partial dependence / ICE plots for any feature, computed in batched booster calls.
+    """
+    st.subheader("📈 Partial Dependence & ICE")
+    col_feat, col_class, col_rows = st.columns(3)
+    with col_feat:
+        feature = st.selectbox("Feature:", feature_cols, key=f"{key_prefix}_pdp_feature")
+    with col_class:
+        target = st.selectbox(
+            "Class:",
+            # One option per probability the model outputs, i.e. per PDP curve.
+            ["All Classes"] + [str(c) for c in range(n_classes(model.get_booster()))],
+            format_func=lambda v: v if v == "All Classes" else f"Class {v}",
+            key=f"{key_prefix}_pdp_class",
+        )
+    with col_rows:
+        n_rows = st.select_slider(
+            "Rows:", options=[200, 1000, 5000, 20000], value=1000, key=f"{key_prefix}_pdp_rows"
+        )
+
+    with st.spinner("Computing partial dependence..."):
+        result = get_partial_dependence(
+            model,
+            store,
+            scaler,
+            get_model_version(model),
+            store.fingerprint,
+            feature,
+            n_rows=min(int(n_rows), store.n_rows),
+        )
+
+    if target == "All Classes":
+        plot_pdp_all_classes(result)
+    else:
+        plot_pdp_ice(result, int(target))
+    st.caption(
+        "ICE: each thin line is one record's predicted probability as this feature alone is varied; "
+        "the bold line (PDP) is their average."
+    )
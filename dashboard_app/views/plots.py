@@ -1,55 +1,57 @@
 from __future__ import annotations
 
+import time
+
 import matplotlib.pyplot as plt
 import numpy as np
 import shap
 import streamlit as st
 
 from dashboard_app.config import CLASS_DESCRIPTIONS
+from dashboard_app.feature_store import shuffled_row_order
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import class_shap_values_and_base, iter_global_mean_abs_by_class
 
 
-def plot_global_shap_for_class(
-    explainer: "shap.TreeExplainer",
-    X_data,
-    X_scaled: np.ndarray,
+def make_global_shap_beeswarm_figure(
+    shap_vals_2d: np.ndarray,
+    base_val: float,
+    X_values: np.ndarray,
     feature_cols: list[str],
     class_idx: int,
-) -> None:
+    max_display: int = 12,
+):
     """
-    Global SHAP beeswarm + bar for a single class.
+    Beeswarm figure for one class's SHAP values (no Streamlit; usable headlessly).
     """
-    raw_shap_values = explainer.shap_values(X_scaled)
-
-    if isinstance(raw_shap_values, list):
-        shap_vals_2d = raw_shap_values[class_idx]
-        base_val = explainer.expected_value[class_idx]
-    else:
-        raw = np.asarray(raw_shap_values)
-        if raw.ndim != 3:
-            raise ValueError(f"Unexpected SHAP shape: {raw.shape}")
-        if raw.shape[2] == len(feature_cols):
-            shap_vals_2d = raw[:, class_idx, :]
-        elif raw.shape[1] == len(feature_cols):
-            shap_vals_2d = raw[:, :, class_idx]
-        else:
-            raise ValueError(f"Unexpected SHAP 3D shape: {raw.shape}")
-        base_val = np.asarray(explainer.expected_value)[class_idx]
-
     exp = shap.Explanation(
         values=shap_vals_2d,
         base_values=np.repeat(base_val, shap_vals_2d.shape[0]),
-        data=X_data.values,
+        data=X_values,
         feature_names=feature_cols,
     )
-
-    # Beeswarm
-    shap.plots.beeswarm(exp, max_display=12, show=False)
+    shap.plots.beeswarm(exp, max_display=max_display, show=False)
     fig = plt.gcf()
     fig.set_size_inches(10, 6)
     plt.title(f"SHAP Beeswarm - Class {class_idx}")
     plt.tight_layout()
-    st.pyplot(fig, use_container_width=True)
-    plt.close(fig)
+    return fig
+
+
+def plot_global_shap_for_class(
+    explainer: "shap.TreeExplainer",
+    X_data,
+    X_scaled: np.ndarray,
+    feature_cols: list[str],
+    class_idx: int,
+) -> None:
+    """
+    Global SHAP beeswarm + bar for a single class.
+    """
+    shap_vals_2d, base_val = class_shap_values_and_base(explainer, X_scaled, feature_cols, class_idx)
+
+    # Beeswarm
+    plot_global_shap_beeswarm(shap_vals_2d, base_val, X_data.values, feature_cols, class_idx)
 
     # # Bar
     # shap.plots.bar(exp, max_display=12, show=False)
@@ -61,9 +63,25 @@ def plot_global_shap_for_class(
     # plt.close(fig)
 
 
-def plot_global_shap_total_bar(feature_cols: list[str], total_mean_abs: np.ndarray) -> None:
+def plot_global_shap_beeswarm(
+    shap_vals_2d: np.ndarray,
+    base_val: float,
+    X_values: np.ndarray,
+    feature_cols: list[str],
+    class_idx: int,
+) -> None:
     """
-    Bar plot for Total mean(|SHAP|) across classes.
+    Beeswarm for one class from precomputed SHAP values (e.g. an uploaded file's sample).
+    """
+    with span("matplotlib.render"):
+        fig = make_global_shap_beeswarm_figure(shap_vals_2d, base_val, X_values, feature_cols, class_idx)
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+
+def make_global_shap_total_bar_figure(feature_cols: list[str], total_mean_abs: np.ndarray):
+    """
+    Bar figure for Total mean(|SHAP|) across classes.
     """
     order = np.argsort(total_mean_abs)[::-1]
     top_idx = order[:12]
@@ -78,20 +96,27 @@ def plot_global_shap_total_bar(feature_cols: list[str], total_mean_abs: np.ndarr
     ax.set_xlabel("Mean |SHAP| (averaged across classes + samples)")
     ax.set_title("Global SHAP - Total (All Classes)")
     plt.tight_layout()
-    st.pyplot(fig, use_container_width=True)
-    plt.close(fig)
+    return fig
 
 
-def plot_global_shap_all_classes_stacked_bar(
+def plot_global_shap_total_bar(feature_cols: list[str], total_mean_abs: np.ndarray) -> None:
+    """
+    Bar plot for Total mean(|SHAP|) across classes.
+    """
+    with span("matplotlib.render"):
+        fig = make_global_shap_total_bar_figure(feature_cols, total_mean_abs)
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+
+def make_global_shap_all_classes_stacked_bar_figure(
     feature_cols: list[str],
     mean_abs_by_class: np.ndarray,
     max_display: int = 12,
-) -> None:
+    title: str = "SHAP Summary (All Classes) - Stacked Bar",
+):
     """
-    Plot a SHAP summary bar for *all classes at once* (stacked bars).
-
-    This matches the common "summary_plot(plot_type='bar')" multi-class visualization,
-    where each feature bar is split into colored segments by class.
+    Stacked mean(|SHAP|) bar figure with one colored segment per class.
     """
     if mean_abs_by_class.ndim != 2:
         raise ValueError(f"Expected (n_classes, n_features), got {mean_abs_by_class.shape}")
@@ -126,14 +151,210 @@ def plot_global_shap_all_classes_stacked_bar(
         left = left + np.array(vals)
 
     ax.set_xlabel("mean(|SHAP value|) (average impact on model output magnitude)")
-    ax.set_title("SHAP Summary (All Classes) - Stacked Bar")
+    ax.set_title(title)
     ax.legend(loc="lower right", frameon=True)
 
     fig.patch.set_facecolor("white")
     ax.set_facecolor("white")
     plt.tight_layout()
-    st.pyplot(fig, use_container_width=True)
-    plt.close(fig)
+    return fig
+
+
+def plot_global_shap_all_classes_stacked_bar(
+    feature_cols: list[str],
+    mean_abs_by_class: np.ndarray,
+    max_display: int = 12,
+    title: str = "SHAP Summary (All Classes) - Stacked Bar",
+) -> None:
+    """
+    Plot a SHAP summary bar for *all classes at once* (stacked bars).
+
+    This matches the common "summary_plot(plot_type='bar')" multi-class visualization,
+    where each feature bar is split into colored segments by class.
+    """
+    with span("matplotlib.render"):
+        fig = make_global_shap_all_classes_stacked_bar_figure(feature_cols, mean_abs_by_class, max_display, title)
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+
+def make_aggregated_waterfall_figure(mean_shap: np.ndarray, mean_feature_values: np.ndarray, feature_cols: list[str]):
+    """
+    Waterfall figure of mean SHAP values over a group of instances (Public Health Officer view).
+    """
+    exp = shap.Explanation(
+        values=mean_shap,
+        base_values=0.0,
+        data=mean_feature_values,
+        feature_names=feature_cols,
+    )
+    plt.figure(figsize=(10, 6))
+    shap.plots.waterfall(exp, max_display=len(feature_cols), show=False)
+    fig = plt.gcf()
+    fig.patch.set_facecolor("white")
+    for ax in fig.axes:
+        ax.set_facecolor("white")
+    plt.tight_layout()
+    return fig
+
+
+def plot_class_mean_abs_bar(
+    feature_cols: list[str],
+    mean_abs: np.ndarray,
+    class_idx: int,
+    title: str | None = None,
+) -> None:
+    """
+    Bar plot of mean(|SHAP|) for a single class.
+    """
+    order = np.argsort(mean_abs)[::-1][:12]
+
+    with span("matplotlib.render"):
+        fig, ax = plt.subplots(figsize=(10, 5))
+        ax.barh(
+            [feature_cols[i] for i in reversed(order)],
+            [mean_abs[i] for i in reversed(order)],
+            color=plt.get_cmap("tab10")(class_idx % 10),
+            edgecolor="white",
+        )
+        ax.set_xlabel("mean(|SHAP value|)")
+        ax.set_title(title or f"SHAP Feature Importance - Class {class_idx}")
+        plt.tight_layout()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+
+def plot_pdp_ice(pd_result, class_idx: int, max_ice_lines: int = 100) -> None:
+    """
+    ICE curves (thin) + partial dependence (bold) of one class's probability for one feature.
+    """
+    grid = pd_result.grid
+    ice = pd_result.ice[:, :, class_idx]
+    step = max(1, len(ice) // max_ice_lines)
+
+    with span("matplotlib.render"):
+        fig, ax = plt.subplots(figsize=(10, 5))
+        for curve in ice[::step]:
+            ax.plot(grid, curve, color="#90caf9", linewidth=0.6, alpha=0.5)
+        ax.plot(grid, pd_result.pdp[:, class_idx], color="#0d47a1", linewidth=2.5, label="Partial dependence (mean)")
+        ax.set_xlabel(pd_result.feature)
+        ax.set_ylabel(f"P(Class {class_idx})")
+        ax.set_title(f"PDP / ICE - {pd_result.feature} (Class {class_idx}, {len(ice)} rows)")
+        ax.legend(loc="best")
+        fig.patch.set_facecolor("white")
+        ax.set_facecolor("white")
+        plt.tight_layout()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+
+def plot_pdp_all_classes(pd_result) -> None:
+    """
+    Partial dependence of every class's probability for one feature.
+    """
+    cmap = plt.get_cmap("tab10")
+    with span("matplotlib.render"):
+        fig, ax = plt.subplots(figsize=(10, 5))
+        for c in range(pd_result.pdp.shape[1]):
+            ax.plot(pd_result.grid, pd_result.pdp[:, c], color=cmap(c % 10), linewidth=2, label=f"Class {c}")
+        ax.set_xlabel(pd_result.feature)
+        ax.set_ylabel("Mean predicted probability")
+        ax.set_title(f"Partial Dependence - {pd_result.feature} (All Classes)")
+        ax.legend(loc="best")
+        fig.patch.set_facecolor("white")
+        ax.set_facecolor("white")
+        plt.tight_layout()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+
+def progressive_controls(key_prefix: str) -> tuple[bool, bool]:
+    """
+    Checkboxes for progressive SHAP: (progressive, extend_to_full_dataset).
+    """
+    progressive = st.checkbox(
+        "Progressive mode (stream SHAP in chunks)",
+        value=True,
+        key=f"{key_prefix}_progressive",
+        help="Draw the chart from running means after each chunk instead of waiting for the whole sample.",
+    )
+    full = st.checkbox(
+        "Extend to full dataset",
+        value=False,
+        key=f"{key_prefix}_progressive_full",
+        disabled=not progressive,
+        help="Keep streaming past the SHAP sample over every row (shuffled order).",
+    )
+    return progressive, progressive and full
+
+
+def render_progressive_global_shap(
+    explainer: "shap.TreeExplainer",
+    X_scaled: np.ndarray,
+    feature_cols: list[str],
+    class_idx: int | None = None,
+    shuffle: bool = False,
+    chunk_size: int = 256,
+    redraw_interval: float = 0.5,
+    weights: np.ndarray | None = None,
+    beeswarm_X: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Stream SHAP over row chunks and redraw the chart from running means.
+
+    Draws the all-classes stacked bar, or one class's importance bar when `class_idx`
+    is given. With `shuffle` (used when streaming the full dataset), rows are visited in
+    a fixed random order so early estimates are representative. `weights` (one per row)
+    give weighted means, e.g. for the class-stratified SHAP sample. The progress bar is
+    updated after every chunk, which is also where Streamlit stops the loop when the user
+    changes a widget or navigates away. Returns the final mean(|SHAP|) per class.
+
+    With `class_idx` and `beeswarm_X` (the raw rows of `X_scaled`, unshuffled), the
+    class's streamed SHAP values are kept and drawn as a beeswarm once streaming ends,
+    without explaining the rows again.
+    """
+    order = shuffled_row_order(len(X_scaled)) if shuffle else None
+    n_total = len(X_scaled)
+    keep = class_idx is not None and beeswarm_X is not None and order is None
+    kept: list[np.ndarray] = []
+
+    progress = st.progress(0.0)
+    chart = st.empty()
+    mean_abs = None
+    last_draw = 0.0
+    for mean_abs, done in iter_global_mean_abs_by_class(
+        explainer,
+        X_scaled,
+        feature_cols,
+        chunk_size=chunk_size,
+        order=order,
+        weights=weights,
+        on_chunk=(lambda per_class: kept.append(per_class[class_idx])) if keep else None,
+    ):
+        progress.progress(done / n_total, text=f"SHAP computed for {done:,} / {n_total:,} rows")
+        if done < n_total and time.perf_counter() - last_draw < redraw_interval:
+            continue
+        with chart.container():
+            if class_idx is None:
+                plot_global_shap_all_classes_stacked_bar(
+                    feature_cols,
+                    mean_abs,
+                    max_display=12,
+                    title=f"SHAP Summary (All Classes) - Stacked Bar (n={done:,})",
+                )
+            else:
+                plot_class_mean_abs_bar(
+                    feature_cols,
+                    mean_abs[class_idx],
+                    class_idx,
+                    title=f"SHAP Feature Importance - Class {class_idx} (n={done:,})",
+                )
+        last_draw = time.perf_counter()
+    progress.empty()
+    if keep and kept:
+        base_val = float(np.asarray(explainer.expected_value).reshape(-1)[class_idx])
+        plot_global_shap_beeswarm(np.concatenate(kept), base_val, beeswarm_X, feature_cols, class_idx)
+    return mean_abs
 
 
 def render_class_help() -> None:
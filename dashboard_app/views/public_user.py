@@ -1,56 +1,55 @@
 from __future__ import annotations
 
+from collections import Counter
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import shap
 import streamlit as st
 
 from dashboard_app.config import CLASS_DESCRIPTIONS, FEATURE_HIGH_EXPLANATION
+from dashboard_app.inference import predict_class
+from dashboard_app.metrics import span
 from dashboard_app.shap_utils import local_shap_1d_and_base_value
+from dashboard_app.styles import render_explanation_card
+from dashboard_app.views.fragments import panel
+from dashboard_app.views.similar_cases import render_similar_cases_section
+from dashboard_app.views.whatif import render_whatif_panel
 
 
-def public_user_view(explainer, X, X_scaled, feature_cols, model):
+@panel("public_user")
+def public_user_view(explainer, X, X_scaled, feature_cols, model, neighbor_index, whatif_engine, leaf_index, scaler):
     st.markdown('<p class="role-header">👤 Public User View</p>', unsafe_allow_html=True)
     st.markdown(
         '<div class="info-box">Understand your personal health risk based on current air quality conditions.</div>',
         unsafe_allow_html=True,
     )
-    st.markdown(
-        """
-<style>
-.explanation-card {
-    background-color: rgba(248, 249, 250, 0.85);
-    border: 1px solid rgba(0, 0, 0, 0.08);
-    border-radius: 10px;
-    padding: 16px 18px;
-    box-shadow: 0 1px 2px rgba(0, 0, 0, 0.06);
-}
-.explanation-card h4 {
-    margin: 0 0 10px 0;
-}
-.explanation-card p {
-    margin: 0 0 10px 0;
-}
-.explanation-card p:last-child {
-    margin-bottom: 0;
-}
-</style>
-        """,
-        unsafe_allow_html=True,
+    st.subheader("Check Your Health Risk")
+    mode = st.radio(
+        "How would you like to check?",
+        ["Record index", "Today's conditions", "What-if explorer", "Records like mine"],
+        horizontal=True,
+        key="public_user_mode",
     )
-
-    def render_explanation_card(markdown_text: str, title: str = "Simple Explanation") -> None:
-        st.markdown(
-            f"""
-<div class="explanation-card">
-<h4>{title}</h4>
-{markdown_text}
-</div>
-            """,
-            unsafe_allow_html=True,
+    if mode == "Today's conditions":
+        _similar_conditions_lookup(X, feature_cols, neighbor_index)
+        return
+    if mode == "What-if explorer":
+        render_whatif_panel(whatif_engine, X, feature_cols, key_prefix="public_user")
+        return
+    if mode == "Records like mine":
+        render_similar_cases_section(
+            leaf_index,
+            X,
+            feature_cols,
+            key_prefix="public_user",
+            scaler=scaler,
+            typical_values=neighbor_index.typical_values,
+            condition_features=neighbor_index.index_features,
         )
+        return
 
-    st.subheader("Check Your Health Risk")
     user_idx_raw = st.text_input(
         "Enter your location/instance index (integer):",
         value="0",
@@ -73,24 +72,10 @@ def public_user_view(explainer, X, X_scaled, feature_cols, model):
             instance = X_scaled[user_idx : user_idx + 1]
             instance_original = X.iloc[user_idx : user_idx + 1]
 
-            pred_class = int(model.predict(instance)[0])
-
-            # Alert box based on class (0=worst, 4=best)
-            if pred_class >= 3:
-                st.markdown(
-                    f'<div class="info-box"><strong>✅</strong><br>{CLASS_DESCRIPTIONS[pred_class]}</div>',
-                    unsafe_allow_html=True,
-                )
-            elif pred_class == 2:
-                st.markdown(
-                    f'<div class="alert-box"><strong>⚠️</strong><br>{CLASS_DESCRIPTIONS[pred_class]}</div>',
-                    unsafe_allow_html=True,
-                )
-            else:
-                st.markdown(
-                    f'<div class="warning-box"><strong>🚨</strong><br>{CLASS_DESCRIPTIONS[pred_class]}</div>',
-                    unsafe_allow_html=True,
-                )
+            with span("model.predict"):
+                pred_class = predict_class(model.get_booster(), X_scaled, user_idx)
+
+            _render_risk_alert(pred_class)
 
             shap_vals_1d, base_val = local_shap_1d_and_base_value(
                 explainer=explainer,
@@ -98,49 +83,124 @@ def public_user_view(explainer, X, X_scaled, feature_cols, model):
                 class_idx=pred_class,
                 feature_cols=feature_cols,
             )
-
-            local_exp = shap.Explanation(
-                values=shap_vals_1d,
-                base_values=base_val,
-                data=instance_original.values[0],
-                feature_names=feature_cols,
+            _render_risk_explanation(pred_class, shap_vals_1d, base_val, instance_original.values[0], feature_cols)
+
+
+def _similar_conditions_lookup(X, feature_cols, neighbor_index) -> None:
+    """
+    Enter today's readings, find the most similar historical records and explain them.
+    """
+    st.markdown("Enter today's air quality and weather readings (defaults are typical values).")
+    conditions = {}
+    cols = st.columns(3)
+    for i, feat in enumerate(neighbor_index.index_features):
+        with cols[i % 3]:
+            conditions[feat] = st.number_input(
+                feat,
+                value=round(neighbor_index.typical_values[feat], 1),
+                step=1.0,
+                format="%.1f",
+                key=f"public_user_cond_{feat}",
             )
+    k = st.slider("Number of similar records:", 3, 15, 5, key="public_user_k")
+
+    if not st.button("Find Similar Conditions", key="public_user_nn_btn"):
+        return
+
+    indices, distances = neighbor_index.query(conditions, k=k)
+    preds = neighbor_index.predictions[indices]
+
+    # Majority class among neighbours; ties go to the nearest record's class.
+    counts = Counter(int(p) for p in preds)
+    best = max(counts.values())
+    pred_class = next(int(p) for p in preds if counts[int(p)] == best)
+
+    _render_risk_alert(pred_class)
+    st.markdown(f"**{counts[pred_class]} of {len(indices)}** most similar historical records were Class {pred_class}.")
+
+    neighbours = X.iloc[indices][neighbor_index.index_features].copy()
+    neighbours.insert(0, "Predicted Class", preds.astype(int))
+    neighbours.insert(0, "Distance", np.round(distances, 3))
+    st.dataframe(neighbours, use_container_width=True)
+
+    # Average the cached explanations of the neighbours that share the consensus class.
+    agree = [int(i) for i, p in zip(indices, preds) if int(p) == pred_class]
+    explanations = neighbor_index.explanations(agree)
+    shap_vals_1d = np.mean([explanations[i][0] for i in agree], axis=0)
+    base_val = float(np.mean([explanations[i][1] for i in agree]))
+    values = X.iloc[agree][feature_cols].mean(axis=0).values
+    _render_risk_explanation(pred_class, shap_vals_1d, base_val, values, feature_cols)
 
-            st.subheader("📊 Why This Risk Level?")
-            feature_impacts = pd.DataFrame(
-                {
-                    "Feature": feature_cols,
-                    "Value": instance_original.values[0],
-                    "Impact": shap_vals_1d,
-                }
-            ).sort_values(by="Impact", key=abs, ascending=False)
-
-            top = feature_impacts.iloc[0]
-            top_feature = str(top["Feature"])
-            top_value = float(top["Value"])
-            top_impact = float(top["Impact"])
-
-            # Use feature-specific explanation hints (when available)
-            hint = FEATURE_HIGH_EXPLANATION.get(top_feature, {})
-            reason_text = hint.get("reason", "this feature strongly influences the prediction")
-            advice_text = hint.get("advice", "monitor air quality conditions and follow public health guidance")
-
-            direction = "increases" if top_impact > 0 else "decreases"
-            col_plot, col_text = st.columns([2, 1], gap="large")
-            with col_plot:
-                shap.plots.waterfall(local_exp, max_display=len(feature_cols), show=False)
-                fig = plt.gcf()
-                fig.set_size_inches(10, 6)
-                plt.tight_layout()
-                st.pyplot(fig, use_container_width=True)
-                plt.close(fig)
-            with col_text:
-                render_explanation_card(
-                    f"""
+
+def _render_risk_alert(pred_class: int) -> None:
+    # Alert box based on class (0=worst, 4=best)
+    if pred_class >= 3:
+        st.markdown(
+            f'<div class="info-box"><strong>✅</strong><br>{CLASS_DESCRIPTIONS[pred_class]}</div>',
+            unsafe_allow_html=True,
+        )
+    elif pred_class == 2:
+        st.markdown(
+            f'<div class="alert-box"><strong>⚠️</strong><br>{CLASS_DESCRIPTIONS[pred_class]}</div>',
+            unsafe_allow_html=True,
+        )
+    else:
+        st.markdown(
+            f'<div class="warning-box"><strong>🚨</strong><br>{CLASS_DESCRIPTIONS[pred_class]}</div>',
+            unsafe_allow_html=True,
+        )
+
+
+def _render_risk_explanation(
+    pred_class: int,
+    shap_vals_1d: np.ndarray,
+    base_val: float,
+    values: np.ndarray,
+    feature_cols: list[str],
+) -> None:
+    local_exp = shap.Explanation(
+        values=shap_vals_1d,
+        base_values=base_val,
+        data=values,
+        feature_names=feature_cols,
+    )
+
+    st.subheader("📊 Why This Risk Level?")
+    feature_impacts = pd.DataFrame(
+        {
+            "Feature": feature_cols,
+            "Value": values,
+            "Impact": shap_vals_1d,
+        }
+    ).sort_values(by="Impact", key=abs, ascending=False)
+
+    top = feature_impacts.iloc[0]
+    top_feature = str(top["Feature"])
+    top_value = float(top["Value"])
+    top_impact = float(top["Impact"])
+
+    # Use feature-specific explanation hints (when available)
+    hint = FEATURE_HIGH_EXPLANATION.get(top_feature, {})
+    reason_text = hint.get("reason", "this feature strongly influences the prediction")
+    advice_text = hint.get("advice", "monitor air quality conditions and follow public health guidance")
+
+    direction = "increases" if top_impact > 0 else "decreases"
+    col_plot, col_text = st.columns([2, 1], gap="large")
+    with col_plot:
+        with span("matplotlib.render"):
+            shap.plots.waterfall(local_exp, max_display=len(feature_cols), show=False)
+            fig = plt.gcf()
+            fig.set_size_inches(10, 6)
+            plt.tight_layout()
+            st.pyplot(fig, use_container_width=True)
+            plt.close(fig)
+    with col_text:
+        render_explanation_card(
+            f"""
 <p><strong>Main Reason:</strong> Predicted <strong>Class {pred_class}</strong> mainly because <strong>{top_feature}</strong>
 ({top_value:.2f}) <strong>{direction}</strong> the health impact (SHAP: {top_impact:+.4f}).</p>
 <p><strong>Why:</strong> {reason_text}.</p>
 <p><strong>What you can do:</strong> {advice_text}.</p>
-                    """
-                )
-
+            """,
+            title="Simple Explanation",
+        )
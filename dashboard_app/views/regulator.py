@@ -2,63 +2,64 @@ from __future__ import annotations
 
 import numpy as np
 import streamlit as st
-from dice_ml import Data, Model, Dice
-import pandas as pd
 
 from dashboard_app.config import CLASS_DESCRIPTIONS
+from dashboard_app.data import get_dice_explainer, get_job_scheduler, get_model_version
+from dashboard_app.inference import predict_class
+from dashboard_app.metrics import span
 from dashboard_app.shap_utils import global_mean_abs_by_class
+from dashboard_app.styles import render_explanation_card
+from dashboard_app.views.fragments import panel
 from dashboard_app.views.plots import (
     plot_global_shap_all_classes_stacked_bar,
     plot_global_shap_total_bar,
+    progressive_controls,
+    render_progressive_global_shap,
 )
-
-
-def regulator_view(explainer, X_shap, X_scaled_shap, X_full, y_full, feature_cols, pipeline):
+from dashboard_app.views.jobs import render_job, submit_job
+from dashboard_app.views.pdp import render_pdp_section
+from dashboard_app.views.scenarios import render_scenarios_section
+from dashboard_app.views.thresholds import render_thresholds_section
+from dashboard_app.views.whatif import render_whatif_panel
+
+
+@panel("regulator")
+def regulator_view(
+    explainer,
+    X_shap,
+    X_scaled_shap,
+    shap_weights,
+    X_full,
+    y_full,
+    feature_cols,
+    pipeline,
+    X_scaled_full,
+    whatif_engine,
+    model,
+    store,
+    scaler,
+    scenario_engine,
+):
     st.markdown('<p class="role-header">⚖️ Regulator View</p>', unsafe_allow_html=True)
     st.markdown(
         '<div class="info-box">Overall Global SHAP (all classes at once) + counterfactuals for instance_idx=0.</div>',
         unsafe_allow_html=True,
     )
-    st.markdown(
-        """
-<style>
-.explanation-card {
-    background-color: rgba(248, 249, 250, 0.85);
-    border: 1px solid rgba(0, 0, 0, 0.08);
-    border-radius: 10px;
-    padding: 16px 18px;
-    box-shadow: 0 1px 2px rgba(0, 0, 0, 0.06);
-}
-.explanation-card h4 {
-    margin: 0 0 10px 0;
-}
-.explanation-card p {
-    margin: 0 0 10px 0;
-}
-.explanation-card p:last-child {
-    margin-bottom: 0;
-}
-</style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    def render_explanation_card(markdown_text: str, title: str = "Policy Action Plan") -> None:
-        st.markdown(
-            f"""
-<div class="explanation-card">
-<h4>{title}</h4>
-{markdown_text}
-</div>
-            """,
-            unsafe_allow_html=True,
-        )
-
     st.subheader("Global SHAP (All Classes)")
+    progressive, full = progressive_controls("reg")
     col_plot, col_text = st.columns([2, 1], gap="large")
     with col_plot:
-        mean_abs = global_mean_abs_by_class(explainer, X_scaled_shap, feature_cols)
-        plot_global_shap_all_classes_stacked_bar(feature_cols, mean_abs, max_display=12)
+        if progressive:
+            render_progressive_global_shap(
+                explainer,
+                X_scaled_full if full else X_scaled_shap,
+                feature_cols,
+                shuffle=full,
+                weights=None if full else shap_weights,
+            )
+        else:
+            mean_abs = global_mean_abs_by_class(explainer, X_scaled_shap, feature_cols, weights=shap_weights)
+            plot_global_shap_all_classes_stacked_bar(feature_cols, mean_abs, max_display=12)
     with col_text:
         render_explanation_card(
             """
@@ -79,13 +80,22 @@ def regulator_view(explainer, X_shap, X_scaled_shap, X_full, y_full, feature_col
 <em>Action:</em> Shift from Reactive to Preventive. Do not wait for hospital admission spikes to act; intervention must occur at the environmental exposure stage.</p>
 <p><strong>Key Policy Takeaway</strong><br>
 The model proves that environmental precursors (AQI &amp; PM) are the earliest and strongest determinants of risk. Policy must be preventative (targeting emissions) rather than reactive (monitoring hospital cases).</p>
-            """
+            """,
+            title="Policy Action Plan",
         )
 
     # st.subheader("Global SHAP (Total)")
     # total_mean_abs = mean_abs.mean(axis=0)
     # plot_global_shap_total_bar(feature_cols, total_mean_abs)
 
+    render_whatif_panel(whatif_engine, X_full, feature_cols, key_prefix="reg")
+
+    render_pdp_section(model, store, scaler, feature_cols, key_prefix="reg")
+
+    render_thresholds_section(model, store, scaler, feature_cols, key_prefix="reg")
+
+    render_scenarios_section(scenario_engine, feature_cols, key_prefix="reg")
+
     st.subheader("🔄 Counterfactual Analysis")
     st.markdown("Use **instance_idx = 0** and choose a desired target class.")
 
@@ -96,52 +106,70 @@ The model proves that environmental precursors (AQI &amp; PM) are the earliest a
         key="reg_cf_desired_class",
     )
 
+    scheduler = get_job_scheduler()
     if st.button("Generate Counterfactual", key="reg_cf_btn"):
-        with st.spinner("Generating counterfactuals... (may take 30-60s)"):
-            query_instance = X_full.iloc[0:1]
-            pred = int(pipeline.predict(query_instance)[0])
+        query_instance = X_full.iloc[0:1]
+        with span("model.predict"):
+            pred = predict_class(model.get_booster(), X_scaled_full, 0)
 
+        if desired_class == pred:
             st.info(f"instance_idx=0 predicted class = {pred} (target = {desired_class})")
-            if desired_class == pred:
-                st.warning("Choose a different desired class than the current prediction.")
-                return
-
-            # DiCE requires a pandas DataFrame here.
-            # Reason: passing numpy arrays triggers `ValueError: should provide a pandas dataframe`.
-            dice_df = pd.concat([X_full, y_full.rename("HealthImpactClass")], axis=1)
-            dice_data = Data(
-                dataframe=dice_df,
-                continuous_features=feature_cols,
-                outcome_name="HealthImpactClass",
-            )
-
-            dice_model = Model(model=pipeline, backend="sklearn", model_type="classifier")
-            dice_exp = Dice(dice_data, dice_model, method="genetic")
+            st.warning("Choose a different desired class than the current prediction.")
+            return
+
+        dice_exp, dice_lock = get_dice_explainer(pipeline, X_full, y_full)
+        key = ("counterfactuals", get_model_version(model), store.fingerprint, 0, int(desired_class))
+        submit_job(
+            scheduler,
+            "reg_cf_job",
+            key,
+            _counterfactual_job,
+            dice_exp,
+            dice_lock,
+            query_instance,
+            pred,
+            int(desired_class),
+            label="dice",
+        )
 
+    def render_result(result) -> None:
+        query_instance, pred, target, cf_df = result
+        st.info(f"instance_idx=0 predicted class = {pred} (target = {target})")
+        if cf_df is None or len(cf_df) == 0:
+            st.warning("No counterfactuals found for this target class. Try another class.")
+            return
+
+        st.success("✅ Counterfactuals generated!")
+        st.markdown("**Original instance (idx=0):**")
+        st.dataframe(query_instance.T, use_container_width=True)
+        st.markdown("**Counterfactuals:**")
+        st.dataframe(cf_df[feature_cols], use_container_width=True)
+
+        st.markdown("**Key changes (first counterfactual):**")
+        first = cf_df.iloc[0]
+        for feat in feature_cols:
+            ov = float(query_instance[feat].iloc[0])
+            nv = float(first[feat])
+            if abs(ov - nv) > 1e-6:
+                st.markdown(f"- **{feat}**: {ov:.2f} → {nv:.2f}")
+
+    render_job(scheduler, "reg_cf_job", render_result)
+
+
+def _counterfactual_job(ctx, dice_exp, dice_lock, query_instance, pred: int, desired_class: int):
+    """
+    DiCE counterfactuals for one record. DiCE cannot be interrupted, so cancellation and
+    timeouts only take effect before generation starts.
+    """
+    ctx.report(0.0, "Waiting for the DiCE explainer")
+    with dice_lock:
+        ctx.report(0.1, "Generating counterfactuals (may take 30-60s)")
+        with span("dice.generate_counterfactuals"):
             counterfactuals = dice_exp.generate_counterfactuals(
                 query_instance,
                 total_CFs=3,
-                desired_class=int(desired_class),
+                desired_class=desired_class,
                 proximity_weight=0.5,
                 diversity_weight=1.0,
             )
-
-            cf_df = counterfactuals.cf_examples_list[0].final_cfs_df
-            if cf_df is None or len(cf_df) == 0:
-                st.warning("No counterfactuals found for this target class. Try another class.")
-                return
-
-            st.success("✅ Counterfactuals generated!")
-            st.markdown("**Original instance (idx=0):**")
-            st.dataframe(query_instance.T, use_container_width=True)
-            st.markdown("**Counterfactuals:**")
-            st.dataframe(cf_df[feature_cols], use_container_width=True)
-
-            st.markdown("**Key changes (first counterfactual):**")
-            first = cf_df.iloc[0]
-            for feat in feature_cols:
-                ov = float(query_instance[feat].iloc[0])
-                nv = float(first[feat])
-                if abs(ov - nv) > 1e-6:
-                    st.markdown(f"- **{feat}**: {ov:.2f} → {nv:.2f}")
-
+    return query_instance, pred, desired_class, counterfactuals.cf_examples_list[0].final_cfs_df
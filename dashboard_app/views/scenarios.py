@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+from dashboard_app.config import SCENARIO_MAX
+from dashboard_app.scenarios import FeatureEdit, Scenario
+from dashboard_app.views.fragments import panel
+
+
+# Starting edits per scenario slot: (feature, change %, shift, cap).
+_DEFAULT_EDITS = [
+    [("PM2_5", -20.0, 0.0, None), ("NO2", -10.0, 0.0, None)],
+    [("AQI", 0.0, 0.0, 150.0)],
+]
+
+
+@panel("scenarios")
+def render_scenarios_section(engine, feature_cols, key_prefix: str) -> None:
+    """
+    Policy scenarios: edit features for every record and compare the predicted class mix.
+    """
+    st.subheader("🏙️ Policy Scenarios")
+    st.markdown(
+        "Scale, shift or cap features for **every** record (e.g. PM2.5 −20%, NO₂ −10%) and see how the "
+        "predicted health impact classes change. A cap is an upper limit applied after the change and shift."
+    )
+    n_scenarios = st.number_input(
+        "Number of scenarios:", min_value=1, max_value=SCENARIO_MAX, value=2, key=f"{key_prefix}_scn_count"
+    )
+    scenarios = []
+    for i, col in enumerate(st.columns(int(n_scenarios))):
+        with col:
+            scenario = _scenario_editor(feature_cols, i, key_prefix, {s.name for s in scenarios})
+        if scenario is not None:
+            scenarios.append(scenario)
+    if not scenarios:
+        return
+
+    start = time.perf_counter()
+    with st.spinner("Scoring scenarios on every record..."):
+        results = engine.evaluate(scenarios)
+    elapsed = time.perf_counter() - start
+
+    n_rows = len(engine.baseline_pred)
+    st.caption(
+        f"{n_rows:,} records scored under {len(results)} scenario(s) in {elapsed * 1000:.0f} ms. "
+        f"SHAP shifts are estimated on {len(engine.shap_rows)} weighted rows of the SHAP sample."
+    )
+    distribution = engine.class_distribution(results)
+    col_table, col_chart = st.columns([2, 3], gap="large")
+    with col_table:
+        st.markdown("**Predicted class mix (% of records):**")
+        st.dataframe(distribution.style.format("{:.1f}"), use_container_width=True)
+        for r in results:
+            st.markdown(f"- **{r.scenario.name}**: {r.n_changed:,} records ({r.n_changed / n_rows:.1%}) change class")
+    with col_chart:
+        st.bar_chart(distribution, stack=False)
+
+    names = [r.scenario.name for r in results]
+    col_pick, col_class = st.columns(2)
+    with col_pick:
+        picked = st.selectbox("Scenario details:", range(len(results)), format_func=lambda i: names[i], key=f"{key_prefix}_scn_pick")
+    with col_class:
+        class_idx = st.selectbox(
+            "SHAP toward class:",
+            list(range(engine.n_classes)),
+            format_func=lambda c: f"Class {c}",
+            key=f"{key_prefix}_scn_class",
+        )
+    result = results[picked]
+    col_trans, col_shap = st.columns(2, gap="large")
+    with col_trans:
+        st.markdown("**Class transitions** (rows: baseline, columns: scenario):")
+        st.dataframe(result.transition_table(), use_container_width=True)
+    with col_shap:
+        st.markdown(f"**Mean SHAP shift toward Class {class_idx}:**")
+        st.dataframe(
+            engine.shap_shift_table(result, class_idx).style.format(
+                {"Mean SHAP (baseline)": "{:+.4f}", "Mean SHAP (scenario)": "{:+.4f}", "Shift": "{:+.4f}"}
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+def _scenario_editor(feature_cols, i: int, key_prefix: str, taken_names: set[str]) -> Scenario | None:
+    """
+    Name and edit table for scenario slot `i`; None (with a warning) if the edits are invalid
+    or the name is already used by an earlier slot (results are tabulated by name).
+    """
+    default_name = f"Scenario {chr(ord('A') + i)}"
+    name = st.text_input("Scenario name:", value=default_name, key=f"{key_prefix}_scn_name_{i}").strip() or default_name
+    defaults = _DEFAULT_EDITS[i] if i < len(_DEFAULT_EDITS) else []
+    table = st.data_editor(
+        pd.DataFrame(defaults, columns=["Feature", "Change (%)", "Shift", "Cap"]).astype(
+            {"Change (%)": float, "Shift": float, "Cap": float}
+        ),
+        num_rows="dynamic",
+        column_config={
+            "Feature": st.column_config.SelectboxColumn(options=list(feature_cols), required=True),
+            "Change (%)": st.column_config.NumberColumn(default=0.0, min_value=-100.0, format="%+.0f"),
+            "Shift": st.column_config.NumberColumn(default=0.0, help="Added after the change, in the feature's units."),
+            "Cap": st.column_config.NumberColumn(help="Upper limit; leave empty for none."),
+        },
+        hide_index=True,
+        use_container_width=True,
+        key=f"{key_prefix}_scn_edits_{i}",
+    )
+    table = table.dropna(subset=["Feature"])
+    if name in taken_names:
+        st.warning(f"{name}: another scenario already has this name; rename it to compare both.")
+        return None
+    if table["Feature"].duplicated().any():
+        st.warning(f"{name}: each feature can be edited only once.")
+        return None
+    edits = tuple(
+        FeatureEdit(
+            str(row["Feature"]),
+            scale=1.0 + (0.0 if pd.isna(row["Change (%)"]) else float(row["Change (%)"])) / 100.0,
+            shift=0.0 if pd.isna(row["Shift"]) else float(row["Shift"]),
+            cap=None if pd.isna(row["Cap"]) else float(row["Cap"]),
+        )
+        for _, row in table.iterrows()
+    )
+    st.caption("; ".join(e.describe() for e in edits) or "No edits (baseline).")
+    return Scenario(name, edits)
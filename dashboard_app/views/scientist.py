@@ -4,54 +4,26 @@ import numpy as np
 import streamlit as st
 
 from dashboard_app.shap_utils import global_mean_abs_by_class, global_shap_total_bar_values
+from dashboard_app.styles import render_explanation_card
+from dashboard_app.views.fragments import panel
+from dashboard_app.views.pdp import render_pdp_section
 from dashboard_app.views.plots import (
     plot_global_shap_all_classes_stacked_bar,
     plot_global_shap_for_class,
     plot_global_shap_total_bar,
+    progressive_controls,
+    render_progressive_global_shap,
 )
+from dashboard_app.views.upload import render_upload_section
 
 
-def scientist_view(explainer, X_shap, X_scaled_shap, feature_cols, y):
+@panel("scientist")
+def scientist_view(explainer, X_shap, X_scaled_shap, shap_weights, feature_cols, y, X_scaled, model, store, scaler):
     st.markdown('<p class="role-header">🔬 Scientist View</p>', unsafe_allow_html=True)
     st.markdown(
         '<div class="info-box">Analyze global feature importance across health impact classes.</div>',
         unsafe_allow_html=True,
     )
-    st.markdown(
-        """
-<style>
-.explanation-card {
-    background-color: rgba(248, 249, 250, 0.85);
-    border: 1px solid rgba(0, 0, 0, 0.08);
-    border-radius: 10px;
-    padding: 16px 18px;
-    box-shadow: 0 1px 2px rgba(0, 0, 0, 0.06);
-}
-.explanation-card h4 {
-    margin: 0 0 10px 0;
-}
-.explanation-card p {
-    margin: 0 0 10px 0;
-}
-.explanation-card p:last-child {
-    margin-bottom: 0;
-}
-</style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    def render_explanation_card(markdown_text: str, title: str = "Interpretation") -> None:
-        st.markdown(
-            f"""
-<div class="explanation-card">
-<h4>{title}</h4>
-{markdown_text}
-</div>
-            """,
-            unsafe_allow_html=True,
-        )
-
     class_labels = sorted(np.unique(y))
     options = ["All Classes"] + [str(c) for c in class_labels]
 
@@ -63,13 +35,20 @@ def scientist_view(explainer, X_shap, X_scaled_shap, feature_cols, y):
         else f"Class {v}",
         key="scientist_class_select",
     )
+    progressive, full = progressive_controls("scientist")
+    X_stream = X_scaled if full else X_scaled_shap
 
     if selected == "All Classes":
         st.subheader("Global SHAP Summary (All Classes at once)")
         col_plot, col_text = st.columns([2, 1], gap="large")
         with col_plot:
-            mean_abs = global_mean_abs_by_class(explainer, X_scaled_shap, feature_cols)
-            plot_global_shap_all_classes_stacked_bar(feature_cols, mean_abs, max_display=12)
+            if progressive:
+                render_progressive_global_shap(
+                    explainer, X_stream, feature_cols, shuffle=full, weights=None if full else shap_weights
+                )
+            else:
+                mean_abs = global_mean_abs_by_class(explainer, X_scaled_shap, feature_cols, weights=shap_weights)
+                plot_global_shap_all_classes_stacked_bar(feature_cols, mean_abs, max_display=12)
         with col_text:
             render_explanation_card(
                 """
@@ -83,13 +62,33 @@ def scientist_view(explainer, X_shap, X_scaled_shap, feature_cols, y):
 <p>The multiclass model is primarily driven by air quality indicators, especially AQI and particulate matter, with pollutants dominating global importance while weather and health variables play complementary roles.</p>
                 """
             )
+        render_pdp_section(model, store, scaler, feature_cols, key_prefix="scientist")
+        render_upload_section(model, explainer, scaler, store, feature_cols, key_prefix="scientist")
         return
 
     class_idx = int(selected)
     st.subheader(f"Global SHAP - Class {class_idx}")
     col_plot, col_text = st.columns([2, 1], gap="large")
     with col_plot:
-        plot_global_shap_for_class(explainer, X_shap, X_scaled_shap, feature_cols, class_idx)
+        if progressive:
+            # On the SHAP sample the beeswarm is drawn from the streamed values; the full
+            # dataset is too large for one, so the sample's beeswarm is opt-in there.
+            sample_beeswarm = full and st.checkbox(
+                "Also show the SHAP sample's beeswarm", value=False, key="scientist_full_beeswarm"
+            )
+            render_progressive_global_shap(
+                explainer,
+                X_stream,
+                feature_cols,
+                class_idx=class_idx,
+                shuffle=full,
+                weights=None if full else shap_weights,
+                beeswarm_X=None if full else X_shap.values,
+            )
+            if sample_beeswarm:
+                plot_global_shap_for_class(explainer, X_shap, X_scaled_shap, feature_cols, class_idx)
+        else:
+            plot_global_shap_for_class(explainer, X_shap, X_scaled_shap, feature_cols, class_idx)
     with col_text:
         if class_idx == 0:
             render_explanation_card(
@@ -151,3 +150,5 @@ def scientist_view(explainer, X_shap, X_scaled_shap, feature_cols, y):
                 """
             )
 
+    render_pdp_section(model, store, scaler, feature_cols, key_prefix="scientist")
+    render_upload_section(model, explainer, scaler, store, feature_cols, key_prefix="scientist")
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard_app.feature_store import scale_raw
+from dashboard_app.views.fragments import panel
+
+
+@panel("similar_cases")
+def render_similar_cases_section(
+    leaf_index,
+    X,
+    feature_cols,
+    key_prefix: str,
+    default_row: int = 0,
+    scaler=None,
+    typical_values: dict[str, float] | None = None,
+    condition_features: list[str] | None = None,
+) -> None:
+    """
+    Historical records the model treats most like a chosen record (shared leaves), with their explanations.
+
+    With `scaler` and `typical_values` the query can also be today's readings for
+    `condition_features`, the other features held at their typical values.
+    """
+    st.subheader("🧬 Records the Model Treats Alike")
+    st.markdown(
+        "Records are ranked by how many of the model's trees send them to the same leaf as the chosen record, "
+        "so similarity follows the model's own splits rather than raw distances."
+    )
+    source = "A stored record"
+    if scaler is not None and typical_values is not None:
+        source = st.radio(
+            "Compare with:",
+            ["A stored record", "Today's conditions"],
+            horizontal=True,
+            key=f"{key_prefix}_leaf_source",
+        )
+
+    if source == "Today's conditions":
+        row, label = None, "Today's conditions"
+        row_scaled = _conditions_row(scaler, typical_values, condition_features or [], feature_cols, key_prefix)
+        col_k, col_class = st.columns(2)
+    else:
+        col_row, col_k, col_class = st.columns(3)
+        with col_row:
+            row = int(
+                st.number_input(
+                    "Record index:",
+                    min_value=0,
+                    max_value=leaf_index.n_rows - 1,
+                    value=int(default_row),
+                    step=1,
+                    key=f"{key_prefix}_leaf_row",
+                )
+            )
+        label = f"Record {row}"
+        row_scaled = leaf_index.X_scaled[row]
+    with col_k:
+        k = st.slider("Number of records:", 3, 25, 10, key=f"{key_prefix}_leaf_k")
+
+    start = time.perf_counter()
+    if row is None:
+        pred_class, own, _ = leaf_index.explain_row(row_scaled)
+    else:
+        pred_class = int(leaf_index.predictions[row])
+    with col_class:
+        per_class = st.checkbox(
+            f"Only Class {pred_class} trees",
+            value=False,
+            key=f"{key_prefix}_leaf_per_class",
+            help="Count only the trees that score the record's predicted class.",
+        )
+
+    class_idx = pred_class if per_class else None
+    indices, shared = leaf_index.query(row_scaled, k=k, exclude=row, class_idx=class_idx)
+    explanations = leaf_index.explanations(indices if row is None else np.concatenate([[row], indices]))
+    if row is not None:
+        own = explanations[row][0]
+    elapsed = time.perf_counter() - start
+    n_trees = leaf_index.trees_for(class_idx)
+    st.caption(
+        f"{label}: predicted Class {pred_class}. {len(indices)} records found among "
+        f"{leaf_index.n_rows:,} in {elapsed * 1000:.0f} ms (leaves shared out of {n_trees} trees)."
+    )
+
+    preds = leaf_index.predictions[indices].astype(int)
+    table = X.iloc[indices][feature_cols].copy()
+    table.insert(0, "Top driver", [feature_cols[int(np.argmax(np.abs(explanations[int(i)][0])))] for i in indices])
+    table.insert(0, "Predicted Class", preds)
+    table.insert(0, "Shared leaves (%)", np.round(shared / max(n_trees, 1) * 100, 1))
+    st.dataframe(table, use_container_width=True)
+
+    # Compare the record's explanation with the mean of the similar records in its class.
+    agree = [int(i) for i, p in zip(indices, preds) if p == pred_class]
+    comparison = pd.DataFrame({"Feature": feature_cols, "This record": own})
+    if agree:
+        comparison["Similar records (mean)"] = np.mean([explanations[i][0] for i in agree], axis=0)
+    st.markdown(
+        f"**SHAP toward Class {pred_class}:** this record vs the {len(agree)} similar record(s) with the same prediction"
+    )
+    st.dataframe(
+        comparison.sort_values("This record", key=np.abs, ascending=False)
+        .head(8)
+        .style.format({c: "{:+.4f}" for c in comparison.columns if c != "Feature"}),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def _conditions_row(scaler, typical_values, condition_features, feature_cols, key_prefix: str) -> np.ndarray:
+    """
+    One scaled row from today's readings, other features at their typical values.
+    """
+    st.markdown("Enter today's readings (defaults are typical values); other features stay at typical values.")
+    raw = dict(typical_values)
+    cols = st.columns(3)
+    for i, feat in enumerate(condition_features):
+        with cols[i % 3]:
+            raw[feat] = st.number_input(
+                feat,
+                value=round(typical_values[feat], 1),
+                step=1.0,
+                format="%.1f",
+                key=f"{key_prefix}_leaf_cond_{feat}",
+            )
+    # Same path as the stored rows: float32 raw values scaled in float64 (identity when folded).
+    return scale_raw(np.array([[raw[f] for f in feature_cols]], dtype=np.float32), scaler, feature_cols)[0]
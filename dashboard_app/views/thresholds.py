@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import streamlit as st
+
+from dashboard_app.config import CLASS_LABELS_SHORT
+from dashboard_app.data import get_class_transitions, get_model_version
+from dashboard_app.views.fragments import panel
+
+
+@panel("thresholds")
+def render_thresholds_section(model, store, scaler, feature_cols, key_prefix: str) -> None:
+    """
+    Exact levels of one feature at which records change predicted class, read from the booster's splits.
+    """
+    st.subheader("🎯 Class-Flip Thresholds")
+    st.markdown(
+        "Levels of a feature at which records move from one class to another, holding every other "
+        "feature at its recorded value. Thresholds are the model's own split points, so they are exact."
+    )
+    classes = sorted(CLASS_LABELS_SHORT.keys())
+    default_feature = feature_cols.index("AQI") if "AQI" in feature_cols else 0
+    col_feat, col_from, col_to = st.columns(3)
+    with col_feat:
+        feature = st.selectbox("Feature:", feature_cols, index=default_feature, key=f"{key_prefix}_thr_feature")
+    with col_from:
+        from_class = st.selectbox(
+            "From class:", classes, index=min(2, len(classes) - 1), format_func=lambda c: f"Class {c}",
+            key=f"{key_prefix}_thr_from",
+        )
+    with col_to:
+        to_class = st.selectbox(
+            "To class:", classes, index=min(1, len(classes) - 1), format_func=lambda c: f"Class {c}",
+            key=f"{key_prefix}_thr_to",
+        )
+
+    with st.spinner("Evaluating the model at its split points..."):
+        result = get_class_transitions(
+            model, store, scaler, get_model_version(model), store.fingerprint, feature,
+            n_rows=min(2000, store.n_rows),
+        )
+
+    if from_class == to_class:
+        st.info("Pick two different classes to see transition thresholds.")
+        return
+
+    table = result.transition_table(int(from_class), int(to_class))
+    st.caption(
+        f"{len(result.thresholds)} split points for {feature}, evaluated over {len(result.rows)} records."
+    )
+    if table.empty:
+        st.info(f"No record moves between Class {from_class} and Class {to_class} by changing {feature} alone.")
+    else:
+        st.dataframe(table.style.format({"Threshold": "{:.3f}"}, precision=2), use_container_width=True, hide_index=True)
+
+    with st.expander("All class changes by threshold"):
+        st.bar_chart(result.flip_table(), x="Threshold", y="Records flipping (%)")
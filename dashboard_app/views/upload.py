@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import io
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard_app.config import UPLOAD_CHUNK_ROWS, UPLOAD_JOB_TIMEOUT_S, UPLOAD_SAMPLE_ROWS, UPLOAD_SHAP_ROWS_PER_CHUNK
+from dashboard_app.data import get_job_scheduler, get_model_version
+from dashboard_app.ingest import iter_ingest
+from dashboard_app.views.fragments import panel
+from dashboard_app.views.jobs import render_job, submit_job
+from dashboard_app.views.plots import (
+    plot_class_mean_abs_bar,
+    plot_global_shap_all_classes_stacked_bar,
+    plot_global_shap_beeswarm,
+    plot_global_shap_total_bar,
+)
+
+
+@panel("upload")
+def render_upload_section(model, explainer, scaler, store, feature_cols, key_prefix: str) -> None:
+    """
+    Upload a CSV (e.g. a station export) and explain it with the global SHAP charts.
+
+    The file is ingested in chunks by a background job; only its summary is kept.
+    """
+    st.subheader("📤 Explain Your Own Data")
+    upload = st.file_uploader(
+        "CSV with the model's feature columns (HealthImpactClass optional):",
+        type=["csv"],
+        key=f"{key_prefix}_upload",
+    )
+    col_chunk, col_shap = st.columns(2)
+    with col_chunk:
+        chunk_rows = st.number_input(
+            "Rows per chunk:",
+            min_value=1000,
+            max_value=1_000_000,
+            value=UPLOAD_CHUNK_ROWS,
+            step=1000,
+            key=f"{key_prefix}_upload_chunk_rows",
+        )
+    with col_shap:
+        shap_rows = st.number_input(
+            "SHAP rows per chunk:",
+            min_value=100,
+            max_value=int(chunk_rows),
+            value=min(UPLOAD_SHAP_ROWS_PER_CHUNK, int(chunk_rows)),
+            step=100,
+            key=f"{key_prefix}_upload_shap_rows",
+            help="Every row is predicted; SHAP runs on a uniform sample of each chunk, weighted back to the chunk.",
+        )
+
+    scheduler = get_job_scheduler()
+    state_key = f"{key_prefix}_upload_job"
+    if upload is not None and st.button("Analyse file", key=f"{key_prefix}_upload_btn"):
+        data = upload.getvalue()
+        key = (
+            "upload",
+            hashlib.blake2b(data, digest_size=16).hexdigest(),
+            get_model_version(model),
+            store.fingerprint,
+            getattr(explainer, "feature_perturbation", ""),
+            int(chunk_rows),
+            int(shap_rows),
+        )
+        submit_job(
+            scheduler,
+            state_key,
+            key,
+            _ingest_job,
+            data,
+            upload.name,
+            model,
+            explainer,
+            scaler,
+            list(feature_cols),
+            int(chunk_rows),
+            int(shap_rows),
+            label="upload",
+            timeout=UPLOAD_JOB_TIMEOUT_S,
+        )
+
+    render_job(scheduler, state_key, lambda summary: _render_summary(summary, store, feature_cols, key_prefix))
+
+
+def _ingest_job(ctx, data: bytes, name: str, model, explainer, scaler, feature_cols, chunk_rows: int, shap_rows: int):
+    """
+    Ingest an uploaded file; progress is the share of its bytes read so far.
+    """
+    source = io.BytesIO(data)
+    summary = None
+    for summary in iter_ingest(
+        source,
+        name,
+        model,
+        explainer,
+        scaler,
+        feature_cols,
+        chunk_rows=chunk_rows,
+        shap_rows_per_chunk=shap_rows,
+        sample_rows=UPLOAD_SAMPLE_ROWS,
+        on_chunk=ctx.check,
+    ):
+        ctx.report(source.tell() / max(len(data), 1), f"{summary.n_rows:,} rows processed")
+    return summary
+
+
+def _render_summary(summary, store, feature_cols, key_prefix: str) -> None:
+    if summary is None or summary.n_rows == 0:
+        st.warning("The file has no valid rows (every row has a missing or non-numeric feature).")
+        return
+
+    st.markdown(f"**{summary.name}**")
+    col_rows, col_invalid, col_explained = st.columns(3)
+    col_rows.metric("Rows analysed", f"{summary.n_rows:,}")
+    col_invalid.metric("Invalid rows dropped", f"{summary.n_invalid:,}")
+    col_explained.metric("Rows explained (SHAP)", f"{summary.n_explained:,}")
+
+    classes = np.arange(len(summary.predicted_counts))
+    table = pd.DataFrame(
+        {"Class": classes, "Predicted (%)": summary.predicted_counts / summary.n_rows * 100}
+    )
+    if summary.label_counts is not None:
+        labelled = int(summary.label_counts.sum())
+        table["Labelled (%)"] = summary.label_counts / max(labelled, 1) * 100
+        if labelled:
+            st.caption(f"Accuracy on the {labelled:,} labelled rows: {summary.n_correct / labelled:.1%}")
+    st.dataframe(table.style.format({c: "{:.1f}" for c in table.columns if c != "Class"}), hide_index=True)
+
+    selected = st.selectbox(
+        "Class:",
+        ["All Classes"] + [str(c) for c in classes],
+        format_func=lambda v: v if v == "All Classes" else f"Class {v}",
+        key=f"{key_prefix}_upload_class",
+    )
+    col_left, col_right = st.columns(2, gap="large")
+    if selected == "All Classes":
+        with col_left:
+            plot_global_shap_all_classes_stacked_bar(
+                feature_cols,
+                summary.mean_abs_by_class,
+                max_display=12,
+                title=f"SHAP Summary (All Classes) - {summary.name}",
+            )
+        with col_right:
+            plot_global_shap_total_bar(feature_cols, summary.mean_abs_by_class.mean(axis=0))
+    else:
+        class_idx = int(selected)
+        with col_left:
+            plot_global_shap_beeswarm(
+                summary.sample_shap[class_idx],
+                summary.base_values[class_idx],
+                summary.sample_X,
+                feature_cols,
+                class_idx,
+            )
+        with col_right:
+            plot_class_mean_abs_bar(feature_cols, summary.mean_abs_by_class[class_idx], class_idx)
+
+    with st.expander("Feature ranges vs training data"):
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Feature": feature_cols,
+                    "Mean (file)": summary.stats.feature_mean,
+                    "Mean (training)": store.stats.feature_mean,
+                    "Min (file)": summary.stats.feature_min,
+                    "Max (file)": summary.stats.feature_max,
+                }
+            ).style.format({c: "{:.2f}" for c in ("Mean (file)", "Mean (training)", "Min (file)", "Max (file)")}),
+            hide_index=True,
+        )
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+from dashboard_app.views.fragments import panel
+from dashboard_app.whatif import WHATIF_LATENCY_BUDGET_S
+
+
+@panel("whatif")
+def render_whatif_panel(engine, X, feature_cols, key_prefix: str) -> None:
+    """
+    What-if section: pick a starting record, then drag sliders to see the prediction move.
+    """
+    st.subheader("🎚️ What-if Analysis")
+    st.markdown("Start from a record, then drag the sliders to see how the prediction and its drivers change.")
+    start_idx = st.number_input(
+        "Start from record index:",
+        min_value=0,
+        max_value=len(X) - 1,
+        value=0,
+        step=1,
+        key=f"{key_prefix}_whatif_start",
+    )
+    _whatif_fragment(engine, X, feature_cols, key_prefix, int(start_idx))
+
+
+@panel("whatif_sliders")
+def _whatif_fragment(engine, X, feature_cols, key_prefix: str, start_idx: int) -> None:
+    # Slider changes rerun only this inner panel. Sliders report on release, which debounces
+    # drags; identical grid points are then served from the engine's memo cache.
+    row = X.iloc[start_idx]
+    values = {}
+    cols = st.columns(4)
+    for i, feat in enumerate(feature_cols):
+        with cols[i % 4]:
+            # The slider's grid (min + n * step) is the engine's, so moved values are scored as shown.
+            values[feat] = st.slider(
+                feat,
+                min_value=float(engine.lows[i]),
+                max_value=float(X[feat].max()),
+                value=float(row[feat]),
+                step=float(engine.steps[i]),
+                key=f"{key_prefix}_whatif_{start_idx}_{feat}",
+            )
+
+    result = engine.evaluate(values)
+
+    col_pred, col_chart = st.columns([1, 2], gap="large")
+    with col_pred:
+        st.metric("Predicted class", f"Class {result.pred_class}")
+        st.dataframe(
+            pd.DataFrame({"Probability": result.proba}, index=[f"Class {c}" for c in range(len(result.proba))]).style.format(
+                "{:.3f}"
+            ),
+            use_container_width=True,
+        )
+        latency_ms = result.latency_s * 1000
+        status = "cached" if result.cached else (
+            "within budget" if result.latency_s <= WHATIF_LATENCY_BUDGET_S else "over budget"
+        )
+        st.caption(f"Computed in {latency_ms:.1f} ms ({status}, budget {WHATIF_LATENCY_BUDGET_S * 1000:.0f} ms)")
+    with col_chart:
+        impacts = pd.DataFrame({"Feature": feature_cols, "SHAP": result.shap_values})
+        impacts = impacts.reindex(impacts["SHAP"].abs().sort_values(ascending=False).index)
+        st.markdown(f"**Feature contributions to Class {result.pred_class}** (base value {result.base_value:+.3f})")
+        st.bar_chart(impacts, x="Feature", y="SHAP", horizontal=True, sort=False)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, Tuple
+
+import numpy as np
+import shap
+
+from dashboard_app.metrics import span
+from dashboard_app.shap_utils import local_shap_1d_and_base_value
+
+
+# Budget for one uncached what-if evaluation (predict + SHAP), in seconds.
+WHATIF_LATENCY_BUDGET_S = 0.050
+
+
+@dataclass(frozen=True)
+class WhatIfResult:
+    values: np.ndarray  # raw feature values actually evaluated (snapped to the grid when on it)
+    pred_class: int
+    proba: np.ndarray  # (n_classes,)
+    shap_values: np.ndarray  # (n_features,) for pred_class
+    base_value: float
+    latency_s: float
+    cached: bool
+
+
+class WhatIfEngine:
+    """
+    Single-row predict + SHAP for interactive what-if edits.
+
+    Inputs are snapped to a per-feature grid `lows + n * steps` (raw units, the sliders'
+    own grid) and results are memoized per evaluated row in a bounded LRU shared by all
+    sessions, so dragging a slider back and forth is served from memory. Values off the
+    grid (a starting record's own values) are scored as given. Misses scale into a
+    preallocated float32 row and use the booster's in-place prediction (no DataFrame/DMatrix).
+    """
+
+    def __init__(
+        self,
+        model,
+        explainer: "shap.TreeExplainer",
+        scaler,
+        feature_cols: list[str],
+        steps: np.ndarray,
+        lows: np.ndarray | None = None,
+        cache_size: int = 4096,
+    ) -> None:
+        self.booster = model.get_booster()
+        self.explainer = explainer
+        self.feature_cols = list(feature_cols)
+        self.steps = np.asarray(steps, dtype=np.float64)
+        self.lows = np.zeros_like(self.steps) if lows is None else np.asarray(lows, dtype=np.float64)
+        self._mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self._scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self._tmp = np.empty(len(self.feature_cols), dtype=np.float64)
+        self._row = np.empty((1, len(self.feature_cols)), dtype=np.float32)
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[float, ...], WhatIfResult]" = OrderedDict()
+        self._cache_size = cache_size
+
+    @classmethod
+    def from_data(cls, model, explainer, scaler, X, feature_cols: list[str], resolution: int = 200, **kwargs) -> "WhatIfEngine":
+        """
+        Grid from the observed minimum, step per feature = observed range / `resolution`.
+        """
+        lows = X[feature_cols].min().to_numpy(dtype=np.float64)
+        span_ = X[feature_cols].max().to_numpy(dtype=np.float64) - lows
+        steps = np.where(span_ > 0, span_ / resolution, 1.0)
+        return cls(model, explainer, scaler, feature_cols, steps, lows, **kwargs)
+
+    def quantize(self, values: np.ndarray, tol: float = 1e-6) -> Tuple[Tuple[float, ...], np.ndarray]:
+        """
+        Snap values within `tol` steps of a grid point onto it; keep the others as given.
+
+        Returns (memo key, values to evaluate).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        offset = (values - self.lows) / self.steps
+        grid = np.rint(offset)
+        snapped = np.where(np.abs(offset - grid) <= tol, self.lows + grid * self.steps, values)
+        return tuple(snapped.tolist()), snapped
+
+    def evaluate(self, values: Dict[str, float] | np.ndarray) -> WhatIfResult:
+        """
+        Predict and explain one row of raw feature values (dict by name or array in feature order).
+        """
+        start = time.perf_counter()
+        if isinstance(values, dict):
+            values = np.array([float(values[f]) for f in self.feature_cols])
+        key, snapped = self.quantize(values)
+
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+        if hit is not None:
+            return replace(hit, latency_s=time.perf_counter() - start, cached=True)
+
+        with span("whatif.evaluate"), self._lock:
+            # The preallocated buffers are shared, so the miss path runs under the lock.
+            # Scale in float64 then cast, matching scaler.transform + XGBoost's float32 input.
+            np.subtract(snapped, self._mean, out=self._tmp)
+            np.divide(self._tmp, self._scale, out=self._tmp)
+            self._row[0] = self._tmp
+            proba = np.asarray(self.booster.inplace_predict(self._row)).reshape(-1)
+            if proba.size == 1:  # binary objective returns P(class 1)
+                proba = np.array([1.0 - proba[0], proba[0]])
+            pred_class = int(np.argmax(proba))
+            shap_1d, base = local_shap_1d_and_base_value(self.explainer, self._row, pred_class, self.feature_cols)
+
+            result = WhatIfResult(snapped, pred_class, proba, shap_1d, base, time.perf_counter() - start, False)
+            self._cache[key] = result
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result